@@ -0,0 +1,67 @@
+"""
+Management command to generate a large synthetic dataset for performance work
+Usage: python manage.py generate_data [--users 10000] [--bicycles 50000] [--rentals 10000000] [--seed 0]
+"""
+
+import os
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from apps.stations.models import Station
+from core.synthetic import DEFAULT_PASSWORD, generate
+
+
+class Command(BaseCommand):
+    help = 'Generate stations, riders, bicycles and a rental history with realistic demand patterns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--bicycles', type=int, default=50000)
+        parser.add_argument('--rentals', type=int, default=10000000)
+        parser.add_argument('--stations', type=int, help='Defaults to one station per 40 bicycles')
+        parser.add_argument('--days', type=int, default=365, help='Days of rental history before today')
+        parser.add_argument('--seed', type=int, default=0, help='Same seed and sizes, same data')
+        parser.add_argument(
+            '--prefix',
+            default='SYN',
+            help='Prefix of generated station codes, usernames and serial numbers',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Processes writing rentals (PostgreSQL only)',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if not prefix.isalnum() or len(prefix) > 4:
+            raise CommandError('--prefix must be 1-4 letters or digits')
+        if min(options['users'], options['bicycles']) < 1 or options['rentals'] < 0 or options['days'] < 1:
+            raise CommandError('--users, --bicycles and --days must be positive')
+        if (
+            Station.objects.filter(code__startswith=prefix).exists() or
+            get_user_model().objects.filter(username__startswith=prefix.lower()).exists()
+        ):
+            raise CommandError(f'Data with prefix {prefix} already exists; pick another --prefix')
+
+        started = time.perf_counter()
+
+        def progress(message):
+            self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)')
+
+        created = generate(
+            users=options['users'],
+            bicycles=options['bicycles'],
+            rentals=options['rentals'],
+            stations=options['stations'],
+            days=options['days'],
+            seed=options['seed'],
+            prefix=prefix,
+            workers=max(1, options['workers'] or 1),
+            progress=progress,
+        )
+        summary = ', '.join(f'{count} {name}' for name, count in created.items())
+        self.stdout.write(self.style.SUCCESS(f'Created {summary} in {time.perf_counter() - started:.1f}s'))
+        self.stdout.write(f'Riders log in as {prefix.lower()}000000 and up, password {DEFAULT_PASSWORD}')
\ No newline at end of file
@@ -1,3 +1,10 @@
-from django.test import TestCase
+from core import testing
 
-# Create your tests here.
+
+class AccountViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('profile', 'accounts:profile', 7, 'rider'),
+        testing.ViewBudget('profile edit', 'accounts:profile-edit', 4, 'rider'),
+        testing.ViewBudget('user admin', 'admin:accounts_user_changelist', 5, 'admin'),
+        testing.ViewBudget('penalty log admin', 'admin:accounts_penaltylog_changelist', 5, 'admin'),
+    ]
\ No newline at end of file
@@ -75,10 +75,10 @@ class UserProfileView(LoginRequiredMixin, DetailView):
         context = super().get_context_data(**kwargs)
         context['title'] = 'My Profile'
         context['total_rentals'] = self.request.user.get_total_rentals()
-        context['active_rental'] = self.request.user.rentals.filter(status='active').first()
+        context['active_rental'] = self.request.user.rentals.filter(status='active').select_related('bicycle').first()
         context['recent_rentals'] = self.request.user.rentals.filter(
             status='completed'
-        ).order_by('-end_time')[:5]
+        ).select_related('bicycle').order_by('-end_time')[:5]
         return context
 
 
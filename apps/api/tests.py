@@ -1,3 +1,12 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from core import testing
+
+
+class ApiViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget(
+            'station availability', lambda data: reverse('api:station-availability', args=[data.station.pk]),
+            3, 'rider',
+        ),
+    ]
\ No newline at end of file
@@ -1,8 +1,8 @@
 from django.urls import path
+from . import views
 
 app_name = 'api'
 
 urlpatterns = [
-    # API endpoints will be added here
-    # Example: path('bicycles/', BicycleListAPIView.as_view(), name='bicycle-list'),
+    path('stations/<int:pk>/availability/', views.StationAvailabilityView.as_view(), name='station-availability'),
 ]
\ No newline at end of file
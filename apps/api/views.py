@@ -1,3 +1,25 @@
-from django.shortcuts import render
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+from django.views import View
+from apps.stations.models import Station
+from core.mixins import AsyncLoginRequiredMixin
 
-# Create your views here.
+
+class StationAvailabilityView(AsyncLoginRequiredMixin, View):
+    """
+    Live bicycle counts and opening state of one station, for polling clients
+    Async, and answered in a single query.
+    """
+    async def get(self, request, pk):
+        station = await aget_object_or_404(
+            Station.objects.filter(is_active=True).with_open_flag().with_bike_counts(),
+            pk=pk
+        )
+        return JsonResponse({
+            'id': station.pk,
+            'name': station.name,
+            'capacity': station.capacity,
+            'available_bikes': station.available_count,
+            'total_bikes': station.total_count,
+            'is_open': station.is_open_now,
+        })
\ No newline at end of file
@@ -1,13 +1,39 @@
-from django.contrib import admin
-from .models import Bicycle, MaintenanceLog
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from .fleet_io import CONTENT_TYPES, import_fleet, open_upload, stream_export
+from .forms import BicycleImportForm
+from .maintenance import due_q, with_service_usage
+from .models import Bicycle, BicycleStatusEvent, MaintenanceLog
+
+
+class MaintenanceDueFilter(admin.SimpleListFilter):
+    title = 'maintenance'
+    parameter_name = 'maintenance_due'
+    
+    def lookups(self, request, model_admin):
+        return [('due', 'Due for service')]
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'due':
+            return with_service_usage(queryset).filter(due_q())
+        return queryset
 
 
 @admin.register(Bicycle)
 class BicycleAdmin(admin.ModelAdmin):
     list_display = ['name', 'serial_number', 'status', 'condition', 'current_station', 'hourly_rate', 'total_rentals']
-    list_filter = ['status', 'condition', 'current_station']
+    list_filter = ['status', 'condition', MaintenanceDueFilter, 'current_station']
     search_fields = ['name', 'model', 'serial_number']
-    readonly_fields = ['slug', 'created_at', 'updated_at', 'total_rentals', 'total_distance_km']
+    readonly_fields = [
+        'slug', 'created_at', 'updated_at', 'total_rentals', 'total_distance_km',
+        'distance_at_last_maintenance', 'rentals_at_last_maintenance'
+    ]
+    change_list_template = 'admin/bicycles/bicycle/change_list.html'
     
     fieldsets = (
         ('Basic Information', {
@@ -26,7 +52,10 @@ class BicycleAdmin(admin.ModelAdmin):
             'fields': ('status', 'condition', 'current_station')
         }),
         ('Tracking', {
-            'fields': ('total_rentals', 'total_distance_km', 'last_maintenance_date', 'next_maintenance_date')
+            'fields': (
+                'total_rentals', 'total_distance_km', 'last_maintenance_date', 'next_maintenance_date',
+                'distance_at_last_maintenance', 'rentals_at_last_maintenance'
+            )
         }),
         ('Metadata', {
             'fields': ('purchase_date', 'purchase_price', 'created_at', 'updated_at'),
@@ -34,20 +63,69 @@ class BicycleAdmin(admin.ModelAdmin):
         }),
     )
     
-    actions = ['mark_available', 'mark_maintenance', 'mark_retired']
+    actions = ['mark_available', 'mark_maintenance', 'mark_retired', 'export_selected_csv']
+    
+    def get_urls(self):
+        urls = [
+            path('export/', self.admin_site.admin_view(self.export_view), name='bicycles_bicycle_export'),
+            path('import/', self.admin_site.admin_view(self.import_view), name='bicycles_bicycle_import'),
+        ]
+        return urls + super().get_urls()
+    
+    def export_response(self, queryset, fmt):
+        """Stream a fleet export as a file download"""
+        filename = f"bicycles-{timezone.now():%Y%m%d-%H%M}.{fmt}"
+        response = StreamingHttpResponse(stream_export(queryset, fmt), content_type=CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+    
+    def export_view(self, request):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        fmt = request.GET.get('format', 'csv')
+        if fmt not in CONTENT_TYPES:
+            fmt = 'csv'
+        return self.export_response(Bicycle.objects.all(), fmt)
+    
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+        
+        form = BicycleImportForm(request.POST or None, request.FILES or None)
+        result = None
+        if request.method == 'POST' and form.is_valid():
+            stream = open_upload(form.cleaned_data['file'])
+            result = import_fleet(stream, fmt=form.cleaned_data['format'])
+            level = messages.SUCCESS if result.ok else messages.WARNING
+            self.message_user(request, f'Import finished: {result.summary()}.', level)
+            if result.ok:
+                return redirect('admin:bicycles_bicycle_changelist')
+        
+        context = {
+            **self.admin_site.each_context(request),
+            'title': 'Import bicycles',
+            'opts': self.model._meta,
+            'form': form,
+            'result': result,
+        }
+        return TemplateResponse(request, 'admin/bicycles/bicycle/import_form.html', context)
+    
+    def export_selected_csv(self, request, queryset):
+        return self.export_response(queryset, 'csv')
+    export_selected_csv.short_description = "Export selected as CSV"
     
     def mark_available(self, request, queryset):
-        updated = queryset.update(status='available')
+        updated = queryset.set_status('available')
         self.message_user(request, f'{updated} bicycles marked as available.')
     mark_available.short_description = "Mark as Available"
     
     def mark_maintenance(self, request, queryset):
-        updated = queryset.update(status='maintenance')
+        updated = queryset.set_status('maintenance')
         self.message_user(request, f'{updated} bicycles marked for maintenance.')
     mark_maintenance.short_description = "Mark for Maintenance"
     
     def mark_retired(self, request, queryset):
-        updated = queryset.update(status='retired')
+        updated = queryset.set_status('retired')
         self.message_user(request, f'{updated} bicycles marked as retired.')
     mark_retired.short_description = "Mark as Retired"
 
@@ -58,6 +136,7 @@ class MaintenanceLogAdmin(admin.ModelAdmin):
     list_filter = ['is_completed', 'performed_at']
     search_fields = ['bicycle__serial_number', 'description']
     readonly_fields = ['performed_at']
+    list_select_related = ['bicycle']
     
     fieldsets = (
         (None, {
@@ -66,4 +145,30 @@ class MaintenanceLogAdmin(admin.ModelAdmin):
         ('Performance', {
             'fields': ('performed_by', 'performed_at', 'is_completed', 'completed_at')
         }),
-    )
\ No newline at end of file
+    )
+    
+    def save_model(self, request, obj, form, change):
+        if obj.is_completed and not obj.completed_at:
+            obj.completed_at = timezone.now()
+            obj.bicycle.record_maintenance(obj.completed_at.date())
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(BicycleStatusEvent)
+class BicycleStatusEventAdmin(admin.ModelAdmin):
+    list_display = ['bicycle', 'status', 'station', 'occurred_at']
+    list_filter = ['status']
+    search_fields = ['bicycle__serial_number']
+    list_select_related = ['bicycle', 'station']
+    date_hierarchy = 'occurred_at'
+    show_full_result_count = False
+    
+    # The log is append-only; events are written by Bicycle.save()
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
\ No newline at end of file
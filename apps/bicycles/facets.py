@@ -0,0 +1,204 @@
+"""
+Faceted counts for the bicycle browser
+
+Every facet is counted against the other active filters (so picking a station
+still shows how many bikes each other station has) using conditional
+aggregation: one COUNT(...) FILTER (WHERE ...) per option, all in a single
+query. Results are cached briefly per filter signature.
+"""
+import hashlib
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+
+from apps.stations.models import Station
+from .models import Bicycle
+
+
+# (key, label, min rate, max rate); bounds are inclusive to match min_rate/max_rate
+RATE_BUCKETS = [
+    ('under-50', 'Under KES 50', None, Decimal('49.99')),
+    ('50-99', 'KES 50 - 99', Decimal('50.00'), Decimal('99.99')),
+    ('100-199', 'KES 100 - 199', Decimal('100.00'), Decimal('199.99')),
+    ('200-plus', 'KES 200 and above', Decimal('200.00'), None),
+]
+
+FACET_PARAMS = {
+    'station': ['station'],
+    'status': ['status'],
+    'condition': ['condition'],
+    'rate': ['min_rate', 'max_rate'],
+}
+
+
+def parse_id(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_rate(value):
+    try:
+        return Decimal(value) if value else None
+    except InvalidOperation:
+        return None
+
+
+def rate_q(min_rate, max_rate):
+    q = Q()
+    if min_rate is not None:
+        q &= Q(hourly_rate__gte=min_rate)
+    if max_rate is not None:
+        q &= Q(hourly_rate__lte=max_rate)
+    return q
+
+
+class BicycleFacets:
+    """
+    Parsed browser filters plus the facet counts that go with them
+
+    params is the request's query dict; default_status is applied when the
+    status parameter is missing (regular users only see available bikes by
+    default), while an empty status= means every status.
+    """
+
+    def __init__(self, params, default_status=None):
+        self.params = params
+        self.default_status = default_status
+        self.search = (params.get('search') or '').strip()
+        self.station = parse_id(params.get('station'))
+        self.status = (params.get('status') or None) if 'status' in params else default_status
+        self.condition = params.get('condition') or None
+        self.min_rate = parse_rate(params.get('min_rate'))
+        self.max_rate = parse_rate(params.get('max_rate'))
+
+    def search_q(self):
+        """The free-text filter, shared by every facet"""
+        if not self.search:
+            return Q()
+        return (
+            Q(name__icontains=self.search) |
+            Q(model__icontains=self.search) |
+            Q(serial_number__icontains=self.search) |
+            Q(description__icontains=self.search)
+        )
+
+    def facet_filters(self):
+        """{facet: Q} for every facet that has an active value"""
+        filters = {}
+        if self.station is not None:
+            filters['station'] = Q(current_station_id=self.station)
+        if self.status:
+            filters['status'] = Q(status=self.status)
+        if self.condition:
+            filters['condition'] = Q(condition=self.condition)
+        if self.min_rate is not None or self.max_rate is not None:
+            filters['rate'] = rate_q(self.min_rate, self.max_rate)
+        return filters
+
+    def filter_q(self, exclude=None):
+        """All active filters, optionally leaving one facet out"""
+        q = self.search_q()
+        for facet, facet_q in self.facet_filters().items():
+            if facet != exclude:
+                q &= facet_q
+        return q
+
+    def apply(self, queryset):
+        """Narrow a bicycle queryset by every active filter"""
+        return queryset.filter(self.filter_q())
+
+    def signature(self):
+        """Stable cache key for the active filters"""
+        raw = '|'.join(str(value) for value in [
+            self.search.lower(), self.station, self.status, self.condition, self.min_rate, self.max_rate,
+        ])
+        return 'bicycle-facets:' + hashlib.md5(raw.encode()).hexdigest()
+
+    def options(self):
+        """(facet, key, label, option Q) for every facet option"""
+        options = [
+            ('station', station_id, name, Q(current_station_id=station_id))
+            for station_id, name in Station.objects.filter(is_active=True).order_by('name').values_list('id', 'name')
+        ]
+        options += [('status', key, label, Q(status=key)) for key, label in Bicycle.STATUS_CHOICES]
+        options += [('condition', key, label, Q(condition=key)) for key, label in Bicycle.CONDITION_CHOICES]
+        options += [
+            ('rate', key, label, rate_q(min_rate, max_rate))
+            for key, label, min_rate, max_rate in RATE_BUCKETS
+        ]
+        return options
+
+    def compute_counts(self):
+        """Count every facet option in one aggregate query"""
+        options = self.options()
+        base_q = self.search_q()
+        aggregates = {}
+        for index, (facet, key, label, option_q) in enumerate(options):
+            aggregates[f'f{index}'] = Count('pk', filter=self.filter_q(exclude=facet) & option_q)
+
+        totals = Bicycle.objects.filter(base_q).aggregate(**aggregates) if aggregates else {}
+        counts = {facet: [] for facet in FACET_PARAMS}
+        for index, (facet, key, label, option_q) in enumerate(options):
+            counts[facet].append((key, label, totals[f'f{index}']))
+        return counts
+
+    def counts(self):
+        """Facet counts, cached for FACET_CACHE_SECONDS per filter signature"""
+        return cache.get_or_set(self.signature(), self.compute_counts, settings.FACET_CACHE_SECONDS)
+
+    def is_selected(self, facet, key):
+        if facet == 'station':
+            return self.station == key
+        if facet == 'status':
+            return self.status == key
+        if facet == 'condition':
+            return self.condition == key
+        bucket = next(bucket for bucket in RATE_BUCKETS if bucket[0] == key)
+        return (self.min_rate, self.max_rate) == bucket[2:]
+
+    def option_query(self, facet, key, selected):
+        """Querystring that toggles one facet option, keeping every other parameter"""
+        params = self.params.copy()
+        params.pop('page', None)
+        for name in FACET_PARAMS[facet]:
+            params.pop(name, None)
+
+        if not selected:
+            if facet == 'rate':
+                bucket = next(bucket for bucket in RATE_BUCKETS if bucket[0] == key)
+                if bucket[2] is not None:
+                    params['min_rate'] = bucket[2]
+                if bucket[3] is not None:
+                    params['max_rate'] = bucket[3]
+            else:
+                params[facet] = key
+        elif facet == 'status' and self.default_status:
+            # Clearing the status must not bring the default back
+            params['status'] = ''
+        return params.urlencode()
+
+    def panel(self):
+        """Facet groups for the template, with counts and toggle links"""
+        labels = {
+            'station': 'Station',
+            'status': 'Status',
+            'condition': 'Condition',
+            'rate': 'Hourly Rate',
+        }
+        groups = []
+        for facet, options in self.counts().items():
+            group = {'label': labels[facet], 'options': []}
+            for key, label, count in options:
+                selected = self.is_selected(facet, key)
+                group['options'].append({
+                    'label': label,
+                    'count': count,
+                    'selected': selected,
+                    'query': self.option_query(facet, key, selected),
+                })
+            groups.append(group)
+        return groups
\ No newline at end of file
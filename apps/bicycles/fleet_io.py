@@ -0,0 +1,364 @@
+"""
+Streaming fleet import and export for bicycles
+
+Exports stream straight from a server-side cursor and imports are validated
+and written in fixed-size batches, so memory use does not grow with the size
+of the fleet file.
+"""
+import csv
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from apps.events.models import DomainEvent
+from apps.events.outbox import BICYCLE_REGISTERED, BICYCLE_STATUS_CHANGED
+from apps.stations.feed import invalidate_station_feed
+from core.db import stream_values
+from apps.stations.models import Station
+from .forms import BicycleImportRowForm
+from .models import Bicycle, BicycleStatusEvent
+
+
+# (column header, ORM lookup) pairs shared by every export format
+EXPORT_COLUMNS = [
+    ('serial_number', 'serial_number'),
+    ('name', 'name'),
+    ('model', 'model'),
+    ('manufacturer', 'manufacturer'),
+    ('description', 'description'),
+    ('frame_size', 'frame_size'),
+    ('color', 'color'),
+    ('gear_count', 'gear_count'),
+    ('hourly_rate', 'hourly_rate'),
+    ('status', 'status'),
+    ('condition', 'condition'),
+    ('station_code', 'current_station__code'),
+    ('total_rentals', 'total_rentals'),
+    ('total_distance_km', 'total_distance_km'),
+    ('last_maintenance_date', 'last_maintenance_date'),
+    ('next_maintenance_date', 'next_maintenance_date'),
+    ('purchase_date', 'purchase_date'),
+    ('purchase_price', 'purchase_price'),
+]
+
+# Columns an import may set, mapped to the model field they write
+IMPORT_FIELDS = {
+    'name': 'name',
+    'model': 'model',
+    'manufacturer': 'manufacturer',
+    'description': 'description',
+    'frame_size': 'frame_size',
+    'color': 'color',
+    'gear_count': 'gear_count',
+    'hourly_rate': 'hourly_rate',
+    'status': 'status',
+    'condition': 'condition',
+    'station_code': 'current_station_id',
+    'last_maintenance_date': 'last_maintenance_date',
+    'next_maintenance_date': 'next_maintenance_date',
+    'purchase_date': 'purchase_date',
+    'purchase_price': 'purchase_price',
+}
+
+EXPORT_CHUNK_SIZE = 2000
+IMPORT_BATCH_SIZE = 1000
+# bulk_update builds one CASE WHEN per field; smaller statements keep it linear
+UPDATE_BATCH_SIZE = 250
+MAX_REPORTED_ERRORS = 100
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+
+
+class Echo:
+    """Pseudo-buffer that hands back whatever is written to it"""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield export tuples for a bicycle queryset in primary key order"""
+    lookups = [lookup for _, lookup in EXPORT_COLUMNS]
+    return stream_values(queryset, lookups, order_by=('pk',), chunk_size=chunk_size)
+
+
+def stream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the fleet as CSV text, one buffered chunk at a time"""
+    writer = csv.writer(Echo())
+    yield writer.writerow([header for header, _ in EXPORT_COLUMNS])
+
+    buffer = []
+    for row in export_rows(queryset, chunk_size):
+        buffer.append(writer.writerow(row))
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_jsonl(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Yield the fleet as JSON Lines text, one buffered chunk at a time"""
+    headers = [header for header, _ in EXPORT_COLUMNS]
+
+    buffer = []
+    for row in export_rows(queryset, chunk_size):
+        buffer.append(json.dumps(dict(zip(headers, row)), default=str) + '\n')
+        if len(buffer) >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_export(queryset, fmt='csv', chunk_size=EXPORT_CHUNK_SIZE):
+    """Stream the fleet in the requested format"""
+    if fmt == 'jsonl':
+        return stream_jsonl(queryset, chunk_size)
+    return stream_csv(queryset, chunk_size)
+
+
+def read_rows(stream, fmt='csv'):
+    """
+    Yield (line number, row dict) pairs from a text stream
+    Rows that cannot be decoded are yielded as None
+    """
+    if fmt == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+
+
+def open_upload(uploaded_file):
+    """Wrap an uploaded file in a text stream without reading it into memory"""
+    return io.TextIOWrapper(uploaded_file.file, encoding='utf-8-sig', newline='')
+
+
+class ImportResult:
+    """Running totals for a fleet import"""
+
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line_number, message):
+        """Record a row error, keeping only the first few messages"""
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_number, message))
+
+    @property
+    def ok(self):
+        return self.error_count == 0
+
+    def summary(self):
+        return (
+            f"{self.rows} rows read: {self.created} created, "
+            f"{self.updated} updated, {self.unchanged} unchanged, {self.error_count} errors"
+        )
+
+
+class FleetImporter:
+    """
+    Validate and write bicycle rows in batches
+
+    Stations are resolved by code from a map loaded once, existing bicycles are
+    looked up with one query per batch, and rows are written with
+    bulk_create/bulk_update instead of Bicycle.save().
+    """
+
+    def __init__(self, batch_size=IMPORT_BATCH_SIZE):
+        self.batch_size = batch_size
+        self.station_ids = dict(Station.objects.values_list('code', 'id'))
+        self.fields = BicycleImportRowForm.base_fields
+        self.result = ImportResult()
+
+    def run(self, rows):
+        """Import an iterable of (line number, row dict) pairs"""
+        batch = []
+        for line_number, row in rows:
+            self.result.rows += 1
+            batch.append((line_number, row))
+            if len(batch) >= self.batch_size:
+                self.write_batch(batch)
+                batch = []
+        if batch:
+            self.write_batch(batch)
+        if self.result.created or self.result.updated:
+            # Bulk writes bypass the post_save hook that refreshes the map feed
+            invalidate_station_feed()
+        return self.result
+
+    def validate_row(self, row):
+        """
+        Clean one row with the import form's fields
+        The fields are reused across rows instead of building a bound form per row.
+        """
+        data = {}
+        errors = []
+        for name, field in self.fields.items():
+            value = row.get(name)
+            if isinstance(value, str):
+                value = value.strip()
+            try:
+                data[name] = field.clean(value)
+            except ValidationError as e:
+                errors.append(f"{name}: {' '.join(e.messages)}")
+        return data, errors
+
+    def clean_batch(self, batch):
+        """Validate rows and return {serial_number: (line number, field values)}"""
+        cleaned = {}
+        for line_number, row in batch:
+            if row is None:
+                self.result.add_error(line_number, 'Row could not be decoded')
+                continue
+
+            row = {key.strip(): value for key, value in row.items() if key}
+            data, errors = self.validate_row(row)
+            if errors:
+                self.result.add_error(line_number, '; '.join(errors))
+                continue
+
+            station_id = self.station_ids.get(data['station_code'])
+            if station_id is None:
+                self.result.add_error(line_number, f"station_code: Unknown station '{data['station_code']}'")
+                continue
+
+            serial_number = data['serial_number']
+            if serial_number in cleaned:
+                self.result.add_error(line_number, f"serial_number: Duplicate serial '{serial_number}' in batch")
+                continue
+
+            # Only columns present (and non-empty) in the file are written
+            values = {
+                IMPORT_FIELDS[column]: data[column] for column in IMPORT_FIELDS
+                if column != 'station_code' and row.get(column) not in ('', None)
+            }
+            values['current_station_id'] = station_id
+            cleaned[serial_number] = (line_number, values)
+        return cleaned
+
+    def assign_slugs(self, bicycles):
+        """Generate slugs for new bicycles, de-duplicating against the database in one query"""
+        for bicycle in bicycles:
+            bicycle.slug = Bicycle.build_slug(bicycle.name, bicycle.serial_number)
+
+        taken = set(
+            Bicycle.objects.filter(
+                slug__in=[bicycle.slug for bicycle in bicycles]
+            ).values_list('slug', flat=True)
+        )
+        for bicycle in bicycles:
+            slug = base_slug = bicycle.slug
+            suffix = 2
+            while slug in taken:
+                slug = f"{base_slug}-{suffix}"
+                suffix += 1
+            bicycle.slug = slug
+            taken.add(slug)
+
+    def write_batch(self, batch):
+        """Validate one batch and write it with bulk operations"""
+        cleaned = self.clean_batch(batch)
+        if not cleaned:
+            return
+
+        update_columns = sorted(set(IMPORT_FIELDS.values()))
+        existing = {
+            row[0]: row[1:]
+            for row in Bicycle.objects.filter(
+                serial_number__in=list(cleaned)
+            ).values_list('serial_number', 'pk', *update_columns)
+        }
+
+        to_create = []
+        # Updates are grouped by the columns they carry so a sparse row never
+        # blanks fields it did not mention; rows that match the database are skipped
+        to_update = {}
+        # Bicycles whose status or station the batch changes: (pk, station_id, status)
+        moved = []
+        now = timezone.now()
+        for serial_number, (line_number, values) in cleaned.items():
+            if serial_number not in existing:
+                to_create.append(Bicycle(serial_number=serial_number, **values))
+                continue
+
+            pk, *current = existing[serial_number]
+            current = dict(zip(update_columns, current))
+            changed = {field for field, value in values.items() if current[field] != value}
+            if not changed:
+                continue
+
+            if changed & {'status', 'current_station_id'}:
+                state = {**current, **values}
+                moved.append((pk, state['current_station_id'], state['status']))
+
+            fields = tuple(sorted(values))
+            bicycle = Bicycle(pk=pk, serial_number=serial_number, updated_at=now, **values)
+            group = to_update.setdefault(fields, ({'updated_at'}, []))
+            group[0].update(changed)
+            group[1].append(bicycle)
+
+        try:
+            with transaction.atomic():
+                if to_create:
+                    self.assign_slugs(to_create)
+                    Bicycle.objects.bulk_create(to_create, batch_size=self.batch_size)
+                for changed, bicycles in to_update.values():
+                    Bicycle.objects.bulk_update(bicycles, sorted(changed), batch_size=UPDATE_BATCH_SIZE)
+                # Bulk writes skip Bicycle.save() and set_status(), which record these
+                states = [
+                    (bicycle.pk, bicycle.current_station_id, bicycle.status) for bicycle in to_create
+                ] + moved
+                BicycleStatusEvent.objects.bulk_create([
+                    BicycleStatusEvent(
+                        bicycle_id=pk, station_id=station_id, status=BicycleStatusEvent.STATUS_CODES[status],
+                        occurred_at=now,
+                    )
+                    for pk, station_id, status in states
+                ], batch_size=self.batch_size)
+                DomainEvent.objects.bulk_create([
+                    BICYCLE_REGISTERED.build(
+                        occurred_at=now, bicycle_id=bicycle.pk, station_id=bicycle.current_station_id,
+                        status=bicycle.status,
+                    )
+                    for bicycle in to_create
+                ] + [
+                    BICYCLE_STATUS_CHANGED.build(occurred_at=now, bicycle_id=pk, station_id=station_id, status=status)
+                    for pk, station_id, status in moved
+                ])
+        except IntegrityError as e:
+            first_line = min(line_number for line_number, _ in cleaned.values())
+            self.result.add_error(first_line, f"Batch starting at line {first_line} was not saved: {e}")
+            return
+
+        updated = sum(len(bicycles) for _, bicycles in to_update.values())
+        self.result.created += len(to_create)
+        self.result.updated += updated
+        self.result.unchanged += len(cleaned) - len(to_create) - updated
+
+
+def import_fleet(stream, fmt='csv', batch_size=IMPORT_BATCH_SIZE):
+    """Import bicycles from a text stream in CSV or JSON Lines format"""
+    importer = FleetImporter(batch_size=batch_size)
+    return importer.run(read_rows(stream, fmt))
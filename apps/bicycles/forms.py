@@ -59,6 +59,12 @@ class BicycleSearchForm(forms.Form):
         widget=forms.Select(attrs={'class': 'form-select'})
     )
     
+    condition = forms.ChoiceField(
+        choices=[('', 'Any Condition')] + Bicycle.CONDITION_CHOICES,
+        required=False,
+        widget=forms.Select(attrs={'class': 'form-select'})
+    )
+    
     min_rate = forms.DecimalField(
         required=False,
         widget=forms.NumberInput(attrs={
@@ -91,4 +97,41 @@ class MaintenanceLogForm(forms.ModelForm):
             'cost': forms.NumberInput(attrs={'class': 'form-control', 'step': '0.01'}),
             'performed_by': forms.TextInput(attrs={'class': 'form-control'}),
             'is_completed': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
-        }
\ No newline at end of file
+        }
+
+
+class BicycleImportForm(forms.Form):
+    """
+    Upload form for bulk fleet imports (Admin only)
+    """
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('jsonl', 'JSON Lines'),
+    ]
+    
+    file = forms.FileField(
+        help_text="One bicycle per row, keyed by serial number. Stations are matched by code."
+    )
+    format = forms.ChoiceField(choices=FORMAT_CHOICES, initial='csv')
+
+
+class BicycleImportRowForm(forms.Form):
+    """
+    Validates a single row of a fleet import without touching the database
+    """
+    serial_number = forms.CharField(max_length=50)
+    name = forms.CharField(max_length=200)
+    model = forms.CharField(max_length=100)
+    manufacturer = forms.CharField(max_length=100, required=False)
+    description = forms.CharField(required=False)
+    frame_size = forms.CharField(max_length=20, required=False)
+    color = forms.CharField(max_length=50, required=False)
+    gear_count = forms.IntegerField(min_value=1, required=False)
+    hourly_rate = forms.DecimalField(max_digits=6, decimal_places=2, min_value=0, required=False)
+    status = forms.ChoiceField(choices=Bicycle.STATUS_CHOICES, required=False)
+    condition = forms.ChoiceField(choices=Bicycle.CONDITION_CHOICES, required=False)
+    station_code = forms.CharField(max_length=10)
+    last_maintenance_date = forms.DateField(required=False)
+    next_maintenance_date = forms.DateField(required=False)
+    purchase_date = forms.DateField(required=False)
+    purchase_price = forms.DecimalField(max_digits=10, decimal_places=2, required=False)
@@ -0,0 +1,122 @@
+"""
+Maintenance planning for the bicycle fleet
+
+Due-ness is expressed as database filters over indexed columns (the
+next_maintenance_date index and the expression indexes on distance and rides
+since the last service) so finding bikes that need service never loads the
+whole fleet.
+"""
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+
+from .models import Bicycle, MaintenanceLog
+
+
+# Bikes that are out on a ride or already retired cannot be worked on
+SERVICEABLE_EXCLUDED_STATUSES = ['in-use', 'retired']
+
+
+def with_service_usage(queryset=None):
+    """Annotate distance and rides since the last service"""
+    if queryset is None:
+        queryset = Bicycle.objects.all()
+    return queryset.annotate(
+        km_since_service=F('total_distance_km') - F('distance_at_last_maintenance'),
+        rides_since_service=F('total_rentals') - F('rentals_at_last_maintenance'),
+    )
+
+
+def due_q(on=None, factor=1):
+    """
+    Filter for bikes whose service is due on the given day
+    A factor above 1 stretches every interval, which is how hard limits are expressed.
+    Must be applied to a queryset annotated by with_service_usage().
+    """
+    on = on or date.today()
+    overdue_days = round(settings.MAINTENANCE_INTERVAL_DAYS * (factor - 1))
+    return (
+        Q(next_maintenance_date__lte=on - timedelta(days=overdue_days)) |
+        Q(km_since_service__gte=settings.MAINTENANCE_INTERVAL_KM * factor) |
+        Q(rides_since_service__gte=settings.MAINTENANCE_INTERVAL_RENTALS * factor)
+    )
+
+
+def bicycles_due(on=None):
+    """Bicycles due for service on the given day, most urgent first"""
+    return with_service_usage(
+        Bicycle.objects.exclude(status__in=SERVICEABLE_EXCLUDED_STATUSES)
+    ).filter(due_q(on)).select_related('current_station').order_by(
+        'current_station__name',
+        F('next_maintenance_date').asc(nulls_last=True),
+        F('km_since_service').desc(),
+    )
+
+
+def bicycles_past_hard_limit(on=None):
+    """Available bicycles that are past a hard limit and must be pulled from service"""
+    return with_service_usage(
+        Bicycle.objects.filter(status='available')
+    ).filter(due_q(on, factor=settings.MAINTENANCE_HARD_LIMIT_FACTOR))
+
+
+def describe_due(bicycle, on=None):
+    """Explain why a bicycle (annotated by with_service_usage) is due"""
+    on = on or date.today()
+    reasons = []
+    if bicycle.next_maintenance_date and bicycle.next_maintenance_date <= on:
+        reasons.append(f"service date {bicycle.next_maintenance_date:%Y-%m-%d}")
+    if bicycle.km_since_service >= settings.MAINTENANCE_INTERVAL_KM:
+        reasons.append(f"{bicycle.km_since_service} km since service")
+    if bicycle.rides_since_service >= settings.MAINTENANCE_INTERVAL_RENTALS:
+        reasons.append(f"{bicycle.rides_since_service} rides since service")
+    return ', '.join(reasons)
+
+
+def daily_work_queue(on=None):
+    """
+    Group the bikes due for service by station
+    Returns a list of (station, [bicycles]) pairs ordered by station name.
+    """
+    bicycles = bicycles_due(on)
+    return [
+        (station, list(group))
+        for station, group in groupby(bicycles, key=lambda bicycle: bicycle.current_station)
+    ]
+
+
+def enforce_hard_limits(on=None, performed_by='Maintenance planner'):
+    """
+    Move every available bike past a hard limit to maintenance
+    Uses one UPDATE for the status change and bulk inserts for the logs.
+    Returns the number of bicycles pulled from service.
+    """
+    on = on or date.today()
+    with transaction.atomic():
+        bicycles = list(
+            bicycles_past_hard_limit(on).select_for_update().only(
+                'pk', 'status', 'current_station', 'next_maintenance_date',
+                'total_distance_km', 'distance_at_last_maintenance',
+                'total_rentals', 'rentals_at_last_maintenance',
+            )
+        )
+        if not bicycles:
+            return 0
+
+        Bicycle.objects.filter(
+            pk__in=[bicycle.pk for bicycle in bicycles],
+            status='available',
+        ).set_status('maintenance')
+
+        MaintenanceLog.objects.bulk_create([
+            MaintenanceLog(
+                bicycle=bicycle,
+                description=f"Pulled from service automatically: {describe_due(bicycle, on)}",
+                performed_by=performed_by,
+            )
+            for bicycle in bicycles
+        ])
+    return len(bicycles)
@@ -0,0 +1,27 @@
+"""
+Management command to export the bicycle fleet
+Usage: python manage.py export_bicycles --format csv --output fleet.csv
+"""
+
+import sys
+
+from django.core.management.base import BaseCommand
+from apps.bicycles.fleet_io import CONTENT_TYPES, stream_export
+from apps.bicycles.models import Bicycle
+
+
+class Command(BaseCommand):
+    help = 'Stream the bicycle fleet to a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='csv')
+        parser.add_argument('--output', help='Output file (defaults to stdout)')
+
+    def handle(self, *args, **options):
+        output = open(options['output'], 'w', newline='', encoding='utf-8') if options['output'] else sys.stdout
+        try:
+            for chunk in stream_export(Bicycle.objects.all(), options['format']):
+                output.write(chunk)
+        finally:
+            if output is not sys.stdout:
+                output.close()
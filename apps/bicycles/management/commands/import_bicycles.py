@@ -0,0 +1,30 @@
+"""
+Management command to bulk import bicycles
+Usage: python manage.py import_bicycles fleet.csv [--format jsonl] [--batch-size 1000]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.bicycles.fleet_io import CONTENT_TYPES, IMPORT_BATCH_SIZE, import_fleet
+
+
+class Command(BaseCommand):
+    help = 'Create or update bicycles from a CSV or JSON Lines file'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path')
+        parser.add_argument('--format', choices=sorted(CONTENT_TYPES), default='csv')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            stream = open(options['path'], encoding='utf-8-sig', newline='')
+        except OSError as e:
+            raise CommandError(f"Cannot open {options['path']}: {e}")
+
+        with stream:
+            result = import_fleet(stream, fmt=options['format'], batch_size=options['batch_size'])
+
+        for line_number, message in result.errors:
+            self.stderr.write(f"line {line_number}: {message}")
+        style = self.style.SUCCESS if result.ok else self.style.WARNING
+        self.stdout.write(style(result.summary()))
@@ -0,0 +1,42 @@
+"""
+Management command to build the daily maintenance work queue
+Usage: python manage.py plan_maintenance [--date 2025-01-31] [--apply]
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.bicycles.maintenance import daily_work_queue, describe_due, enforce_hard_limits
+
+
+class Command(BaseCommand):
+    help = 'List bicycles due for service per station and pull bikes past hard limits from service'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='Plan for this day (YYYY-MM-DD), defaults to today')
+        parser.add_argument(
+            '--apply',
+            action='store_true',
+            help='Move available bikes past a hard limit to maintenance',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            on = date.fromisoformat(options['date']) if options['date'] else date.today()
+        except ValueError:
+            raise CommandError('--date must be in YYYY-MM-DD format')
+
+        if options['apply']:
+            pulled = enforce_hard_limits(on)
+            self.stdout.write(self.style.WARNING(f'{pulled} bicycles moved to maintenance'))
+
+        queue = daily_work_queue(on)
+        total = 0
+        for station, bicycles in queue:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{station} - {len(bicycles)} due'))
+            for bicycle in bicycles:
+                self.stdout.write(
+                    f'  {bicycle.serial_number:<15} {bicycle.get_status_display():<18} {describe_due(bicycle, on)}'
+                )
+            total += len(bicycles)
+        self.stdout.write(self.style.SUCCESS(f'{total} bicycles due for service on {on:%Y-%m-%d}'))
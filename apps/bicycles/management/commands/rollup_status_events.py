@@ -0,0 +1,38 @@
+"""
+Management command to roll up the bicycle status event log into daily durations
+Usage: python manage.py rollup_status_events [--until 2025-01-31] [--prune-days 90]
+"""
+
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from apps.bicycles.status_log import prune_status_events, rollup_status_events
+
+
+class Command(BaseCommand):
+    help = 'Roll up complete days of bicycle status events and optionally prune old raw events'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--until', help='Last day to roll up (YYYY-MM-DD), defaults to yesterday')
+        parser.add_argument(
+            '--prune-days',
+            type=int,
+            help='Delete raw events older than this many days once they are rolled up',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            until = date.fromisoformat(options['until']) if options['until'] else None
+        except ValueError:
+            raise CommandError('--until must be in YYYY-MM-DD format')
+
+        processed = rollup_status_events(until)
+        for day, rows in processed:
+            self.stdout.write(f'  {day:%Y-%m-%d}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS(f'{len(processed)} days rolled up'))
+
+        if options['prune_days'] is not None:
+            before = timezone.localdate() - timedelta(days=options['prune_days'])
+            deleted = prune_status_events(before)
+            self.stdout.write(self.style.SUCCESS(f'{deleted} raw status events pruned'))
\ No newline at end of file
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:56
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bicycles', '0001_initial'),
+        ('stations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bicycle',
+            name='distance_at_last_maintenance',
+            field=models.DecimalField(decimal_places=2, default=0, help_text='Total distance when last serviced', max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='bicycle',
+            name='rentals_at_last_maintenance',
+            field=models.PositiveIntegerField(default=0, help_text='Total rentals when last serviced'),
+        ),
+        migrations.AddIndex(
+            model_name='bicycle',
+            index=models.Index(fields=['next_maintenance_date'], name='bicycles_bi_next_ma_0b9255_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bicycle',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('total_distance_km'), '-', models.F('distance_at_last_maintenance')), name='bicycle_km_since_svc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bicycle',
+            index=models.Index(django.db.models.expressions.CombinedExpression(models.F('total_rentals'), '-', models.F('rentals_at_last_maintenance')), name='bicycle_rides_since_svc_idx'),
+        ),
+    ]
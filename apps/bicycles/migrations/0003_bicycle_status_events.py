@@ -0,0 +1,63 @@
+# Generated by Django 5.0.1 on 2026-10-19 12:59
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+# The event log is append-only, so rows are physically ordered by occurred_at
+# and a BRIN index covers time-range scans at a fraction of a B-tree's size.
+def create_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS bicycle_status_event_at_brin '
+            'ON bicycles_bicyclestatusevent USING brin (occurred_at)'
+        )
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS bicycle_status_event_at_brin')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bicycles', '0002_maintenance_service_counters'),
+        ('stations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BicycleStatusDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Available'), (2, 'In Use'), (3, 'Reserved'), (4, 'Under Maintenance'), (5, 'Retired')])),
+                ('seconds', models.PositiveIntegerField(default=0)),
+                ('is_closing', models.BooleanField(default=False)),
+                ('bicycle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_days', to='bicycles.bicycle')),
+                ('station', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='stations.station')),
+            ],
+            options={
+                'verbose_name_plural': 'bicycle status days',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'status'], name='bicycles_bi_day_036b14_idx'), models.Index(fields=['bicycle', 'day'], name='bicycles_bi_bicycle_1a5173_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='BicycleStatusEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.PositiveSmallIntegerField(choices=[(1, 'Available'), (2, 'In Use'), (3, 'Reserved'), (4, 'Under Maintenance'), (5, 'Retired')])),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('bicycle', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='status_events', to='bicycles.bicycle')),
+                ('station', models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='stations.station')),
+            ],
+            options={
+                'ordering': ['-occurred_at'],
+                'indexes': [models.Index(fields=['bicycle', 'occurred_at'], name='bicycles_bi_bicycle_0af28d_idx')],
+            },
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:10
+
+from django.db import migrations
+from django.db.models import F
+
+
+# 0002 added the service counters at 0, which made every existing bicycle's
+# lifetime distance and rides count as "since service". Start them from the
+# current totals instead, so the distance and ride limits count from when the
+# counters were introduced; the service dates still apply until the next
+# service. Bicycles serviced since then already have their own counters.
+def backfill_service_counters(apps, schema_editor):
+    Bicycle = apps.get_model('bicycles', 'Bicycle')
+    Bicycle.objects.filter(distance_at_last_maintenance=0, rentals_at_last_maintenance=0).update(
+        distance_at_last_maintenance=F('total_distance_km'),
+        rentals_at_last_maintenance=F('total_rentals'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bicycles', '0003_bicycle_status_events'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_service_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 5.0.1 on 2026-10-19 15:30
+
+from django.db import migrations
+from django.db.models import Max
+from django.utils import timezone
+
+
+STATUS_CODES = {'available': 1, 'in-use': 2, 'reserved': 3, 'maintenance': 4, 'retired': 5}
+BATCH_SIZE = 5000
+
+
+# Until now only set_status() wrote to the status log, so bicycles created or
+# edited through forms, the admin, imports or the data generator are missing
+# from it, and the rollup skips them. Each bicycle without events gets one for
+# its current state at the time it was created; each whose last event no
+# longer matches its row gets one for its current state now.
+def seed_status_events(apps, schema_editor):
+    Bicycle = apps.get_model('bicycles', 'Bicycle')
+    BicycleStatusEvent = apps.get_model('bicycles', 'BicycleStatusEvent')
+    last_ids = BicycleStatusEvent.objects.values('bicycle_id').annotate(last_id=Max('id'))
+    logged = {
+        bicycle_id: (status, station_id)
+        for bicycle_id, status, station_id in BicycleStatusEvent.objects.filter(
+            id__in=list(last_ids.values_list('last_id', flat=True))
+        ).values_list('bicycle_id', 'status', 'station_id')
+    }
+    now = timezone.now()
+    events = []
+    for pk, status, station_id, created_at in Bicycle.objects.values_list(
+        'pk', 'status', 'current_station_id', 'created_at',
+    ).iterator():
+        state = (STATUS_CODES[status], station_id)
+        if logged.get(pk) == state:
+            continue
+        events.append(BicycleStatusEvent(
+            bicycle_id=pk, status=state[0], station_id=station_id,
+            occurred_at=now if pk in logged else created_at,
+        ))
+    BicycleStatusEvent.objects.bulk_create(events, batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bicycles', '0004_backfill_service_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_status_events, migrations.RunPython.noop),
+    ]
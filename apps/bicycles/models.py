@@ -1,11 +1,51 @@
-from django.db import models
+from django.conf import settings
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
+from django.utils import timezone
 from django.utils.text import slugify
+from apps.events.models import DomainEvent
+from apps.events.outbox import BICYCLE_REGISTERED, BICYCLE_STATUS_CHANGED
+from apps.stations.feed import invalidate_station_feed
 from apps.stations.models import Station
 from core.validators import validate_file_size
 
 
-class BicycleManager(models.Manager):
+class BicycleQuerySet(models.QuerySet):
+    """Bulk operations on bicycles"""
+    
+    def set_status(self, status):
+        """
+        Change the status of every bicycle in the queryset
+        One status event and one domain event are appended per bicycle in
+        the same transaction.
+        """
+        with transaction.atomic():
+            rows = list(self.select_for_update().values_list('pk', 'current_station_id'))
+            if not rows:
+                return 0
+            now = timezone.now()
+            updated = self.model.objects.filter(
+                pk__in=[pk for pk, _ in rows]
+            ).update(status=status, updated_at=now)
+            BicycleStatusEvent.objects.bulk_create([
+                BicycleStatusEvent(
+                    bicycle_id=pk,
+                    station_id=station_id,
+                    status=BicycleStatusEvent.STATUS_CODES[status],
+                    occurred_at=now,
+                )
+                for pk, station_id in rows
+            ])
+            DomainEvent.objects.bulk_create([
+                BICYCLE_STATUS_CHANGED.build(occurred_at=now, bicycle_id=pk, station_id=station_id, status=status)
+                for pk, station_id in rows
+            ])
+            # update() sends no post_save, so the map feed is told directly
+            invalidate_station_feed()
+        return updated
+
+
+class BicycleManager(models.Manager.from_queryset(BicycleQuerySet)):
     """Custom manager for Bicycle queries"""
     
     def available(self):
@@ -41,6 +81,9 @@ class Bicycle(models.Model):
         ('poor', 'Poor'),
     ]
     
+    # Fields whose changes are appended to the status log
+    STATE_FIELDS = {'status', 'current_station', 'current_station_id'}
+    
     # Basic Info
     name = models.CharField(max_length=200)
     model = models.CharField(max_length=100)
@@ -90,6 +133,16 @@ class Bicycle(models.Model):
     )
     last_maintenance_date = models.DateField(blank=True, null=True)
     next_maintenance_date = models.DateField(blank=True, null=True)
+    distance_at_last_maintenance = models.DecimalField(
+        max_digits=10,
+        decimal_places=2,
+        default=0,
+        help_text="Total distance when last serviced"
+    )
+    rentals_at_last_maintenance = models.PositiveIntegerField(
+        default=0,
+        help_text="Total rentals when last serviced"
+    )
     
     # Metadata
     purchase_date = models.DateField(blank=True, null=True)
@@ -112,17 +165,78 @@ class Bicycle(models.Model):
             models.Index(fields=['status', 'current_station']),
             models.Index(fields=['serial_number']),
             models.Index(fields=['slug']),
+            models.Index(fields=['next_maintenance_date']),
+            models.Index(
+                models.F('total_distance_km') - models.F('distance_at_last_maintenance'),
+                name='bicycle_km_since_svc_idx',
+            ),
+            models.Index(
+                models.F('total_rentals') - models.F('rentals_at_last_maintenance'),
+                name='bicycle_rides_since_svc_idx',
+            ),
         ]
     
     def __str__(self):
         return f"{self.name} - {self.model} ({self.serial_number})"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        bicycle = super().from_db(db, field_names, values)
+        bicycle.remember_state()
+        return bicycle
+    
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self.remember_state()
+    
+    def remember_state(self):
+        """Note the status and station as stored, or None if they were not loaded"""
+        loaded = all(field in self.__dict__ for field in ('status', 'current_station_id'))
+        self._stored_state = (self.status, self.current_station_id) if loaded else None
+    
+    def stored_state(self):
+        """(status, station id) in the database before this save"""
+        if getattr(self, '_stored_state', None) is None:
+            stored = Bicycle.objects.filter(pk=self.pk).values_list('status', 'current_station_id')
+            self._stored_state = stored.first()
+        return self._stored_state
+    
     def save(self, *args, **kwargs):
-        """Auto-generate slug from name and serial number"""
+        """
+        Auto-generate slug from name and serial number
+        Creating a bicycle, or changing its status or station, appends to the
+        status log and records the matching domain event in the same
+        transaction, whichever form or view saved it.
+        """
         if not self.slug:
-            base_slug = slugify(f"{self.name}-{self.serial_number}")
-            self.slug = base_slug
-        super().save(*args, **kwargs)
+            self.slug = self.build_slug(self.name, self.serial_number)
+        adding = self._state.adding
+        update_fields = kwargs.get('update_fields')
+        tracked = update_fields is None or bool(set(update_fields) & self.STATE_FIELDS)
+        with transaction.atomic():
+            previous = None if adding or not tracked else self.stored_state()
+            super().save(*args, **kwargs)
+            if adding:
+                BICYCLE_REGISTERED.record(
+                    bicycle_id=self.pk, station_id=self.current_station_id, status=self.status,
+                )
+            if tracked:
+                state = (self.status, self.current_station_id)
+                if state != previous:
+                    BicycleStatusEvent.objects.create(
+                        bicycle=self, station_id=self.current_station_id,
+                        status=BicycleStatusEvent.STATUS_CODES[self.status],
+                    )
+                    if not adding:
+                        BICYCLE_STATUS_CHANGED.record(
+                            bicycle_id=self.pk, station_id=self.current_station_id, status=self.status,
+                        )
+                self._stored_state = state
+    
+    @staticmethod
+    def build_slug(name, serial_number):
+        """Build the slug used for a bicycle's URLs"""
+        return slugify(f"{name}-{serial_number}")
     
     @property
     def is_available(self):
@@ -131,30 +245,46 @@ class Bicycle(models.Model):
     
     @property
     def needs_maintenance(self):
-        """Check if bicycle needs maintenance"""
+        """Check if bicycle is due for service by date, distance or ride count"""
         from datetime import date
-        if self.next_maintenance_date:
-            return self.next_maintenance_date <= date.today()
-        return False
+        if self.next_maintenance_date and self.next_maintenance_date <= date.today():
+            return True
+        km_since_service = self.total_distance_km - self.distance_at_last_maintenance
+        rides_since_service = self.total_rentals - self.rentals_at_last_maintenance
+        return (
+            km_since_service >= settings.MAINTENANCE_INTERVAL_KM or
+            rides_since_service >= settings.MAINTENANCE_INTERVAL_RENTALS
+        )
+    
+    def set_status(self, status):
+        """Change status; save() records the transition"""
+        self.status = status
+        self.save()
     
     def mark_as_in_use(self):
         """Mark bicycle as in use"""
-        self.status = 'in-use'
-        self.save()
+        self.set_status('in-use')
     
     def mark_as_available(self):
         """Mark bicycle as available"""
-        self.status = 'available'
-        self.save()
+        self.set_status('available')
     
     def mark_as_reserved(self):
         """Mark bicycle as reserved"""
-        self.status = 'reserved'
-        self.save()
+        self.set_status('reserved')
     
     def mark_as_maintenance(self):
         """Mark bicycle for maintenance"""
-        self.status = 'maintenance'
+        self.set_status('maintenance')
+    
+    def record_maintenance(self, serviced_on=None):
+        """Reset the service counters after maintenance is completed"""
+        from datetime import date, timedelta
+        serviced_on = serviced_on or date.today()
+        self.last_maintenance_date = serviced_on
+        self.next_maintenance_date = serviced_on + timedelta(days=settings.MAINTENANCE_INTERVAL_DAYS)
+        self.distance_at_last_maintenance = self.total_distance_km
+        self.rentals_at_last_maintenance = self.total_rentals
         self.save()
     
     def increment_rental_count(self):
@@ -191,4 +321,94 @@ class MaintenanceLog(models.Model):
         ordering = ['-performed_at']
     
     def __str__(self):
-        return f"Maintenance for {self.bicycle.serial_number} on {self.performed_at.date()}"
\ No newline at end of file
+        return f"Maintenance for {self.bicycle.serial_number} on {self.performed_at.date()}"
+
+
+class BicycleStatusEvent(models.Model):
+    """
+    Append-only log of bicycle status transitions
+    Rows are kept narrow (small-int status, station id, timestamp) and arrive
+    in time order, which keeps the BRIN index on occurred_at effective.
+    """
+    
+    STATUS_CODES = {
+        'available': 1,
+        'in-use': 2,
+        'reserved': 3,
+        'maintenance': 4,
+        'retired': 5,
+    }
+    STATUS_CHOICES = [
+        (1, 'Available'),
+        (2, 'In Use'),
+        (3, 'Reserved'),
+        (4, 'Under Maintenance'),
+        (5, 'Retired'),
+    ]
+    
+    bicycle = models.ForeignKey(
+        Bicycle,
+        on_delete=models.CASCADE,
+        related_name='status_events',
+        db_index=False
+    )
+    # No constraint: the log must outlive station edits and stay cheap to append
+    station = models.ForeignKey(
+        Station,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        db_constraint=False,
+        db_index=False,
+        blank=True,
+        null=True
+    )
+    status = models.PositiveSmallIntegerField(choices=STATUS_CHOICES)
+    occurred_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['-occurred_at']
+        indexes = [
+            models.Index(fields=['bicycle', 'occurred_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.bicycle_id} {self.get_status_display()} at {self.occurred_at}"
+
+
+class BicycleStatusDaily(models.Model):
+    """
+    Seconds a bicycle spent in each status at each station per day
+    Maintained by the status rollup job from BicycleStatusEvent rows.
+    """
+    
+    bicycle = models.ForeignKey(
+        Bicycle,
+        on_delete=models.CASCADE,
+        related_name='status_days',
+        db_index=False
+    )
+    day = models.DateField()
+    status = models.PositiveSmallIntegerField(choices=BicycleStatusEvent.STATUS_CHOICES)
+    station = models.ForeignKey(
+        Station,
+        on_delete=models.DO_NOTHING,
+        related_name='+',
+        db_constraint=False,
+        db_index=False,
+        blank=True,
+        null=True
+    )
+    seconds = models.PositiveIntegerField(default=0)
+    # Marks the state the bicycle was left in at midnight, carried into the next day
+    is_closing = models.BooleanField(default=False)
+    
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'bicycle status days'
+        indexes = [
+            models.Index(fields=['day', 'status']),
+            models.Index(fields=['bicycle', 'day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.bicycle_id} {self.day} {self.get_status_display()}: {self.seconds}s"
\ No newline at end of file
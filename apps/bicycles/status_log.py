@@ -0,0 +1,157 @@
+"""
+Rollup of the bicycle status event log
+
+Raw BicycleStatusEvent rows are compacted into per-bike, per-day state
+durations (BicycleStatusDaily). Each day is processed once, in order, using
+the state every bike was left in at the previous midnight, so analytics over
+long ranges read the small rollup table instead of the raw log.
+"""
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import transaction
+from django.db.models import Max, Min, Sum
+from django.utils import timezone
+
+from core.db import stream_values
+from .models import Bicycle, BicycleStatusDaily, BicycleStatusEvent
+
+
+EVENT_CHUNK_SIZE = 5000
+PRUNE_CHUNK_SIZE = 5000
+
+
+def day_bounds(day):
+    """Start and end of a local calendar day as aware datetimes"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    return start, start + timedelta(days=1)
+
+
+def last_rolled_up_day():
+    """The most recent day present in the rollup table, or None"""
+    return BicycleStatusDaily.objects.aggregate(day=Max('day'))['day']
+
+
+def first_event_day():
+    """The local day of the oldest raw status event, or None"""
+    first = BicycleStatusEvent.objects.aggregate(first=Min('occurred_at'))['first']
+    return timezone.localdate(first) if first else None
+
+
+def opening_states(day):
+    """
+    State each bicycle was in at the start of a day: {bicycle_id: (status, station_id)}
+    Read from the previous day's closing rollup rows, falling back to the
+    raw log the first time the rollup runs.
+    """
+    previous = BicycleStatusDaily.objects.filter(day=day - timedelta(days=1), is_closing=True)
+    if previous.exists():
+        return {
+            bicycle_id: (status, station_id)
+            for bicycle_id, status, station_id in previous.values_list('bicycle_id', 'status', 'station_id')
+        }
+
+    start, _ = day_bounds(day)
+    last_ids = BicycleStatusEvent.objects.filter(
+        occurred_at__lt=start
+    ).values('bicycle_id').annotate(last_id=Max('id')).values_list('last_id', flat=True)
+    return {
+        bicycle_id: (status, station_id)
+        for bicycle_id, status, station_id in BicycleStatusEvent.objects.filter(
+            id__in=list(last_ids)
+        ).values_list('bicycle_id', 'status', 'station_id')
+    }
+
+
+def rollup_day(day):
+    """Replace the rollup rows for one day; returns the number of rows written"""
+    start, end = day_bounds(day)
+    states = opening_states(day)
+    live_bicycles = set(Bicycle.objects.values_list('pk', flat=True))
+
+    # {bicycle_id: {(status, station_id): seconds}}
+    durations = defaultdict(lambda: defaultdict(float))
+    cursors = {bicycle_id: start for bicycle_id in states}
+
+    events = stream_values(
+        BicycleStatusEvent.objects.filter(occurred_at__gte=start, occurred_at__lt=end),
+        ['bicycle_id', 'status', 'station_id', 'occurred_at'],
+        order_by=('bicycle_id', 'occurred_at', 'id'),
+        chunk_size=EVENT_CHUNK_SIZE,
+    )
+    for bicycle_id, status, station_id, occurred_at in events:
+        # Time before a bike's very first event is unknown and not counted
+        if bicycle_id in states:
+            elapsed = (occurred_at - cursors[bicycle_id]).total_seconds()
+            durations[bicycle_id][states[bicycle_id]] += elapsed
+        states[bicycle_id] = (status, station_id)
+        cursors[bicycle_id] = occurred_at
+
+    rows = []
+    for bicycle_id, state in states.items():
+        if bicycle_id not in live_bicycles:
+            continue
+        durations[bicycle_id][state] += (end - cursors[bicycle_id]).total_seconds()
+        for (status, station_id), seconds in durations[bicycle_id].items():
+            rows.append(BicycleStatusDaily(
+                bicycle_id=bicycle_id,
+                day=day,
+                status=status,
+                station_id=station_id,
+                seconds=round(seconds),
+                is_closing=(status, station_id) == state,
+            ))
+
+    with transaction.atomic():
+        BicycleStatusDaily.objects.filter(day=day).delete()
+        BicycleStatusDaily.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def rollup_status_events(until=None):
+    """
+    Roll up every complete day not yet in the rollup table
+    Returns a list of (day, rows written) pairs.
+    """
+    until = until or timezone.localdate() - timedelta(days=1)
+    last_day = last_rolled_up_day()
+    day = last_day + timedelta(days=1) if last_day else first_event_day()
+
+    processed = []
+    while day and day <= until:
+        processed.append((day, rollup_day(day)))
+        day += timedelta(days=1)
+    return processed
+
+
+def prune_status_events(before_day):
+    """
+    Delete raw events older than a day that has already been rolled up
+    Deletes in bounded chunks; returns the number of events removed.
+    """
+    last_day = last_rolled_up_day()
+    if last_day is None:
+        return 0
+    before_day = min(before_day, last_day + timedelta(days=1))
+    cutoff, _ = day_bounds(before_day)
+
+    deleted = 0
+    while True:
+        ids = list(
+            BicycleStatusEvent.objects.filter(occurred_at__lt=cutoff).order_by('id').values_list('id', flat=True)[:PRUNE_CHUNK_SIZE]
+        )
+        if not ids:
+            return deleted
+        deleted += BicycleStatusEvent.objects.filter(id__in=ids).delete()[0]
+
+
+def status_seconds(start_day, end_day, **filters):
+    """
+    Total seconds per status between two days (inclusive) from the rollup table
+    Extra filters (e.g. station_id=3, bicycle_id=7) narrow the aggregation.
+    """
+    totals = BicycleStatusDaily.objects.filter(
+        day__gte=start_day, day__lte=end_day, **filters
+    ).values('status').annotate(seconds=Sum('seconds')).order_by('status')
+    labels = dict(BicycleStatusEvent.STATUS_CHOICES)
+    return {labels[row['status']]: row['seconds'] for row in totals}
@@ -1,3 +1,275 @@
-from django.test import TestCase
+import io
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.http import QueryDict
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.events.models import DomainEvent
+from apps.events.outbox import BICYCLE_REGISTERED, BICYCLE_STATUS_CHANGED
+from apps.stations.models import Station
+from core import testing
+from .facets import BicycleFacets
+from .fleet_io import import_fleet, stream_csv
+from .models import Bicycle, BicycleStatusEvent
+
+
+class BicycleViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('bicycle list', 'bicycles:list', 11, 'rider'),
+        testing.ViewBudget(
+            'bicycle list filtered',
+            lambda data: reverse('bicycles:list') + f'?station={data.station.pk}&condition=good&min_rate=20',
+            # Rendering the bound search form validates the chosen station
+            12, 'rider',
+        ),
+        testing.ViewBudget(
+            'bicycle detail', lambda data: reverse('bicycles:detail', args=[data.bicycle.slug]), 8, 'rider',
+        ),
+        testing.ViewBudget(
+            'bicycle detail as admin', lambda data: reverse('bicycles:detail', args=[data.bicycle.slug]), 6, 'admin',
+        ),
+        testing.ViewBudget('bicycle admin', 'admin:bicycles_bicycle_changelist', 6, 'admin'),
+        testing.ViewBudget('maintenance log admin', 'admin:bicycles_maintenancelog_changelist', 5, 'admin'),
+        testing.ViewBudget('status event admin', 'admin:bicycles_bicyclestatusevent_changelist', 6, 'admin'),
+    ]
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage', QUERY_SAMPLE_RATE=0)
+class BicycleFacetTests(TestCase):
+    """Each facet is counted against every other active filter, and status= means every status"""
+
+    def setUp(self):
+        self.home = Station.objects.create(name='Home', code='HOME', address='Home Road')
+        self.away = Station.objects.create(name='Away', code='AWAY', address='Away Road')
+        for serial, station, status, condition, rate in [
+            ('H-1', self.home, 'available', 'good', '40.00'),
+            ('H-2', self.home, 'available', 'excellent', '120.00'),
+            ('H-3', self.home, 'maintenance', 'good', '60.00'),
+            ('A-1', self.away, 'available', 'good', '80.00'),
+            ('A-2', self.away, 'in-use', 'poor', '250.00'),
+        ]:
+            Bicycle.objects.create(
+                name=serial, model='City', serial_number=serial, current_station=station, status=status,
+                condition=condition, hourly_rate=Decimal(rate),
+            )
+
+    def facets(self, query, default_status='available'):
+        return BicycleFacets(QueryDict(query), default_status=default_status)
+
+    def counts(self, facets):
+        return {
+            facet: {key: count for key, label, count in options if count}
+            for facet, options in facets.compute_counts().items()
+        }
+
+    def test_counts_leave_out_their_own_facet(self):
+        facets = self.facets(f'station={self.home.pk}')
+        self.assertEqual(self.counts(facets), {
+            'station': {self.home.pk: 2, self.away.pk: 1},
+            'status': {'available': 2, 'maintenance': 1},
+            'condition': {'excellent': 1, 'good': 1},
+            'rate': {'under-50': 1, '100-199': 1},
+        })
+        self.assertEqual(facets.apply(Bicycle.objects.all()).count(), 2)
+
+    def test_counts_follow_the_rate_range(self):
+        facets = self.facets('min_rate=50&max_rate=99.99', default_status=None)
+        self.assertEqual(self.counts(facets), {
+            'station': {self.home.pk: 1, self.away.pk: 1},
+            'status': {'available': 1, 'maintenance': 1},
+            'condition': {'good': 2},
+            'rate': {'under-50': 1, '50-99': 2, '100-199': 1, '200-plus': 1},
+        })
+        self.assertTrue(facets.is_selected('rate', '50-99'))
+
+    def test_empty_status_means_every_status(self):
+        facets = self.facets(f'station={self.home.pk}&status=')
+        self.assertIsNone(facets.status)
+        self.assertEqual(self.counts(facets)['condition'], {'excellent': 1, 'good': 2})
+        self.assertEqual(facets.apply(Bicycle.objects.all()).count(), 3)
+        self.assertNotEqual(facets.signature(), self.facets(f'station={self.home.pk}').signature())
+
+    def test_clearing_the_default_status_keeps_it_cleared(self):
+        facets = self.facets(f'station={self.home.pk}')
+        self.assertEqual(facets.status, 'available')
+        self.assertEqual(QueryDict(facets.option_query('status', 'available', True)).get('status'), '')
+        self.assertEqual(QueryDict(facets.option_query('status', 'in-use', False)).get('status'), 'in-use')
+        # Without a default, clearing just drops the parameter
+        staff_facets = self.facets('status=available', default_status=None)
+        self.assertNotIn('status', QueryDict(staff_facets.option_query('status', 'available', True)))
+
+    def test_list_shows_every_status_when_cleared(self):
+        rider = get_user_model().objects.create_user(
+            username='facet-rider', password='password123', email='facet@example.com', university_id='FACET/1',
+        )
+        self.client.force_login(rider)
+        url = reverse('bicycles:list')
+        self.assertEqual(len(self.client.get(url).context['bicycles']), 3)
+        self.assertEqual(len(self.client.get(url + '?status=').context['bicycles']), 5)
+
+
+@override_settings(STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage', QUERY_SAMPLE_RATE=0)
+class MaintenanceLogViewTests(TestCase):
+    """Open logs take a bicycle out of service; completed ones put it back"""
+
+    def setUp(self):
+        self.station = Station.objects.create(name='Workshop', code='SHOP', address='Workshop Road')
+        self.bicycle = Bicycle.objects.create(
+            name='Serviced', model='City', serial_number='SERVICE-1', current_station=self.station,
+        )
+        staff = get_user_model().objects.create_user(
+            username='workshop', password='password123', email='workshop@example.com', university_id='SHOP/1',
+            is_staff=True,
+        )
+        self.client.force_login(staff)
+
+    def log(self, is_completed):
+        data = {'bicycle': self.bicycle.pk, 'description': 'Brakes', 'cost': '100.00', 'performed_by': 'Workshop'}
+        if is_completed:
+            data['is_completed'] = 'on'
+        response = self.client.post(reverse('bicycles:maintenance-log'), data)
+        self.assertRedirects(response, reverse('bicycles:list'), fetch_redirect_response=False)
+        self.bicycle.refresh_from_db()
+        return self.bicycle.maintenance_logs.latest('pk')
+
+    def statuses(self):
+        return list(self.bicycle.status_events.order_by('pk').values_list('status', flat=True))
+
+    def test_open_log_takes_the_bicycle_out_of_service(self):
+        log = self.log(is_completed=False)
+        self.assertEqual(self.bicycle.status, 'maintenance')
+        self.assertIsNone(log.completed_at)
+        self.assertIsNone(self.bicycle.last_maintenance_date)
+
+    def test_completed_log_returns_the_bicycle_to_service(self):
+        self.log(is_completed=False)
+        log = self.log(is_completed=True)
+        self.assertEqual(self.bicycle.status, 'available')
+        self.assertIsNotNone(log.completed_at)
+        self.assertEqual(self.bicycle.last_maintenance_date, timezone.localdate())
+        self.assertEqual(self.statuses(), [
+            BicycleStatusEvent.STATUS_CODES[status] for status in ('available', 'maintenance', 'available')
+        ])
+
+    def test_completed_log_for_an_available_bicycle_keeps_it_available(self):
+        self.log(is_completed=True)
+        self.assertEqual(self.bicycle.status, 'available')
+        self.assertEqual(len(self.statuses()), 1)
+
+    def test_completed_log_leaves_a_rented_bicycle_in_use(self):
+        self.bicycle.mark_as_in_use()
+        self.log(is_completed=True)
+        self.assertEqual(self.bicycle.status, 'in-use')
+
+
+class FleetImportTests(TestCase):
+    """import_fleet() against a small file: created, updated, unchanged and rejected rows, and the events written"""
+
+    def setUp(self):
+        self.home = Station.objects.create(name='Home', code='HOME', address='Home Road')
+        self.away = Station.objects.create(name='Away', code='AWAY', address='Away Road')
+        self.moved = Bicycle.objects.create(
+            name='Moved', model='City', serial_number='EX-1', current_station=self.home, hourly_rate=Decimal('40.00'),
+        )
+        self.kept = Bicycle.objects.create(name='Kept', model='City', serial_number='EX-2', current_station=self.home)
+        self.last_status_event = BicycleStatusEvent.objects.order_by('pk').last().pk
+        self.last_domain_event = DomainEvent.objects.order_by('pk').last().pk
+
+    def import_csv(self, text, **kwargs):
+        return import_fleet(io.StringIO(text), 'csv', **kwargs)
+
+    def new_status_events(self):
+        return set(
+            BicycleStatusEvent.objects.filter(pk__gt=self.last_status_event)
+            .values_list('bicycle__serial_number', 'station__code', 'status')
+        )
+
+    def new_domain_events(self):
+        return {
+            (event.type, event.payload['bicycle_id'], event.payload['station_id'], event.payload['status'])
+            for event in DomainEvent.objects.filter(pk__gt=self.last_domain_event)
+        }
+
+    def test_rows_are_created_updated_or_rejected(self):
+        result = self.import_csv(
+            'serial_number,name,model,station_code,status,hourly_rate\n'
+            'NEW-1,New One,City, HOME ,,60\n'
+            'EX-1,Moved,City,AWAY,maintenance,\n'
+            'EX-2,Kept,City,HOME,,\n'
+            'BAD-1,Bad,City,NOPE,,\n'
+            'BAD-2,,City,HOME,,\n'
+            'NEW-1,New Again,City,HOME,,\n'
+            'BAD-3,Bad,City,HOME,lost,\n'
+        )
+        self.assertEqual(
+            (result.rows, result.created, result.updated, result.unchanged, result.error_count), (7, 1, 1, 1, 4),
+        )
+        self.assertEqual([line for line, _ in result.errors], [5, 6, 7, 8])
+        errors = dict(result.errors)
+        self.assertIn("Unknown station 'NOPE'", errors[5])
+        self.assertIn('name:', errors[6])
+        self.assertIn("Duplicate serial 'NEW-1'", errors[7])
+        self.assertIn('status:', errors[8])
+        self.assertFalse(Bicycle.objects.filter(serial_number__startswith='BAD').exists())
+        created = Bicycle.objects.get(serial_number='NEW-1')
+        # The first row of a duplicated serial wins; station codes are stripped
+        self.assertEqual((created.name, created.current_station), ('New One', self.home))
+
+        self.moved.refresh_from_db()
+        self.assertEqual((self.moved.current_station, self.moved.status), (self.away, 'maintenance'))
+        # Columns left empty in the file are not written
+        self.assertEqual(self.moved.hourly_rate, Decimal('40.00'))
+        self.assertEqual(self.new_status_events(), {
+            ('NEW-1', 'HOME', BicycleStatusEvent.STATUS_CODES['available']),
+            ('EX-1', 'AWAY', BicycleStatusEvent.STATUS_CODES['maintenance']),
+        })
+        self.assertEqual(self.new_domain_events(), {
+            (BICYCLE_REGISTERED.name, created.pk, self.home.pk, 'available'),
+            (BICYCLE_STATUS_CHANGED.name, self.moved.pk, self.away.pk, 'maintenance'),
+        })
+
+    def test_new_bicycles_get_a_slug_and_a_registration(self):
+        result = self.import_csv(
+            'serial_number,name,model,station_code,hourly_rate\n'
+            'NEW-1,Moved,City,HOME,60\n'
+            'NEW-2,Moved,City,AWAY,\n',
+            batch_size=1,
+        )
+        self.assertTrue(result.ok)
+        self.assertEqual(result.created, 2)
+        created = Bicycle.objects.filter(serial_number__startswith='NEW').in_bulk(field_name='serial_number')
+        self.assertEqual(created['NEW-1'].hourly_rate, Decimal('60.00'))
+        self.assertEqual(created['NEW-2'].current_station, self.away)
+        self.assertEqual(len({bicycle.slug for bicycle in created.values()}), 2)
+        available = BicycleStatusEvent.STATUS_CODES['available']
+        self.assertEqual(self.new_status_events(), {('NEW-1', 'HOME', available), ('NEW-2', 'AWAY', available)})
+        self.assertEqual(self.new_domain_events(), {
+            (BICYCLE_REGISTERED.name, created['NEW-1'].pk, self.home.pk, 'available'),
+            (BICYCLE_REGISTERED.name, created['NEW-2'].pk, self.away.pk, 'available'),
+        })
+
+    def test_unchanged_rows_write_nothing(self):
+        result = self.import_csv('serial_number,name,model,station_code\nEX-1,Moved,City,HOME\n')
+        self.assertEqual((result.unchanged, result.updated), (1, 0))
+        self.assertEqual(self.new_status_events(), set())
+        self.assertEqual(self.new_domain_events(), set())
+
+    def test_undecodable_json_lines_are_reported(self):
+        result = import_fleet(io.StringIO(
+            '{"serial_number": "NEW-1", "name": "New", "model": "City", "station_code": "HOME"}\n'
+            'not json\n'
+            '\n'
+            '["a list"]\n'
+        ), 'jsonl')
+        self.assertEqual((result.rows, result.created, result.error_count), (3, 1, 2))
+        self.assertEqual(result.errors, [(2, 'Row could not be decoded'), (4, 'Row could not be decoded')])
+
+    def test_export_round_trips_through_import(self):
+        exported = ''.join(stream_csv(Bicycle.objects.all()))
+        self.assertIn('EX-1,Moved,City', exported)
+        result = self.import_csv(exported)
+        self.assertTrue(result.ok)
+        self.assertEqual(result.unchanged, 2)
\ No newline at end of file
@@ -2,62 +2,54 @@ from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
 from django.contrib import messages
-from django.db.models import Q
+from django.utils import timezone
+from core.mixins import HtmxPartialMixin
+from .facets import BicycleFacets
 from .models import Bicycle, MaintenanceLog
 from .forms import BicycleForm, BicycleSearchForm, MaintenanceLogForm
 
 
-class BicycleListView(LoginRequiredMixin, ListView):
+class BicycleListView(LoginRequiredMixin, HtmxPartialMixin, ListView):
     """
     List all available bicycles with search and filter
+    Filter changes and page flips made through htmx get only the results.
     """
     model = Bicycle
     template_name = 'bicycles/bicycle_list.html'
+    partial_template_name = 'bicycles/_bicycle_results.html'
+    htmx_target = 'bicycle-results'
     context_object_name = 'bicycles'
     paginate_by = 12
     
+    def get_facets(self):
+        """Parse the search filters once per request"""
+        if not hasattr(self, 'facets'):
+            # Default to showing only available bikes for regular users
+            default_status = None if self.request.user.is_staff else 'available'
+            self.facets = BicycleFacets(self.request.GET, default_status=default_status)
+        return self.facets
+    
     def get_queryset(self):
         queryset = Bicycle.objects.select_related('current_station').all()
-        
-        # Get search parameters
-        search = self.request.GET.get('search')
-        station = self.request.GET.get('station')
-        status = self.request.GET.get('status')
-        min_rate = self.request.GET.get('min_rate')
-        max_rate = self.request.GET.get('max_rate')
-        
-        # Apply filters
-        if search:
-            queryset = queryset.filter(
-                Q(name__icontains=search) |
-                Q(model__icontains=search) |
-                Q(serial_number__icontains=search) |
-                Q(description__icontains=search)
-            )
-        
-        if station:
-            queryset = queryset.filter(current_station_id=station)
-        
-        if status:
-            queryset = queryset.filter(status=status)
-        else:
-            # Default to showing only available bikes for regular users
-            if not self.request.user.is_staff:
-                queryset = queryset.filter(status='available')
-        
-        if min_rate:
-            queryset = queryset.filter(hourly_rate__gte=min_rate)
-        
-        if max_rate:
-            queryset = queryset.filter(hourly_rate__lte=max_rate)
-        
-        return queryset.order_by('-created_at')
+        return self.get_facets().apply(queryset).order_by('-created_at')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['title'] = 'Available Bicycles'
-        context['search_form'] = BicycleSearchForm(self.request.GET)
-        context['total_available'] = Bicycle.objects.filter(status='available').count()
+        if not self.is_partial:
+            context['title'] = 'Available Bicycles'
+            context['search_form'] = BicycleSearchForm(self.request.GET)
+            context['total_available'] = Bicycle.objects.filter(status='available').count()
+        context['facets'] = self.get_facets().panel()
+        # Evaluated once here instead of twice per bicycle card
+        context['user_can_reserve'] = (
+            self.request.user.can_rent and
+            not self.request.user.has_active_reservation
+        )
+        
+        # Pagination links keep the active filters
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['filter_query'] = params.urlencode()
         return context
 
 
@@ -66,6 +58,7 @@ class BicycleDetailView(LoginRequiredMixin, DetailView):
     Detail view for a single bicycle
     """
     model = Bicycle
+    queryset = Bicycle.objects.select_related('current_station')
     template_name = 'bicycles/bicycle_detail.html'
     context_object_name = 'bicycle'
     slug_field = 'slug'
@@ -166,9 +159,16 @@ class MaintenanceLogCreateView(LoginRequiredMixin, UserPassesTestMixin, CreateVi
         return self.request.user.is_staff
     
     def form_valid(self, form):
-        # Mark bicycle as under maintenance
         bicycle = form.cleaned_data['bicycle']
-        bicycle.mark_as_maintenance()
+        if form.cleaned_data['is_completed']:
+            # Finished work puts a bike in the workshop back into service; rented or reserved bikes keep their status
+            form.instance.completed_at = timezone.now()
+            if bicycle.status == 'maintenance':
+                bicycle.status = 'available'
+            bicycle.record_maintenance(timezone.localdate(form.instance.completed_at))
+        else:
+            # Open work takes the bicycle out of service until it is completed
+            bicycle.mark_as_maintenance()
         
         messages.success(self.request, 'Maintenance log created successfully!')
         return super().form_valid(form)
\ No newline at end of file
@@ -0,0 +1,52 @@
+from django.contrib import admin
+from .models import DailyActivity, DomainEvent, ProjectionCheckpoint, RiderStats, StationAvailability
+
+
+class ReadOnlyAdmin(admin.ModelAdmin):
+    """The outbox is append-only and projections are only written by the runner"""
+    
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
+    
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(DomainEvent)
+class DomainEventAdmin(ReadOnlyAdmin):
+    list_display = ['id', 'type', 'occurred_at', 'payload']
+    list_filter = ['type']
+    date_hierarchy = 'occurred_at'
+    # Counting the whole outbox for the paginator gets slow as it grows
+    show_full_result_count = False
+
+
+@admin.register(ProjectionCheckpoint)
+class ProjectionCheckpointAdmin(ReadOnlyAdmin):
+    list_display = ['name', 'position', 'updated_at']
+
+
+@admin.register(StationAvailability)
+class StationAvailabilityAdmin(ReadOnlyAdmin):
+    list_display = ['station_id', 'available', 'reserved', 'in_use', 'maintenance', 'retired', 'total']
+
+
+@admin.register(RiderStats)
+class RiderStatsAdmin(ReadOnlyAdmin):
+    list_display = [
+        'user_id', 'rentals_completed', 'ride_minutes', 'distance_km', 'amount_charged',
+        'reservations', 'reservations_expired', 'last_ride_at',
+    ]
+    search_fields = ['user_id']
+
+
+@admin.register(DailyActivity)
+class DailyActivityAdmin(ReadOnlyAdmin):
+    list_display = [
+        'day', 'rentals_started', 'rentals_completed', 'rentals_cancelled', 'ride_minutes', 'revenue',
+        'reservations_created', 'reservations_expired',
+    ]
+    date_hierarchy = 'day'
\ No newline at end of file
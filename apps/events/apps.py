@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class EventsConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.events'
+    
+    def ready(self):
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,21 @@
+from datetime import timedelta
+
+from django import forms
+from django.utils import timezone
+
+
+class KpiRangeForm(forms.Form):
+    """Date range of the KPI dashboard, the last 30 days by default"""
+    start = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    end = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    
+    DEFAULT_DAYS = 30
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        end = cleaned_data.get('end') or timezone.localdate()
+        start = cleaned_data.get('start') or end - timedelta(days=self.DEFAULT_DAYS - 1)
+        if start > end:
+            raise forms.ValidationError('The start date must not be after the end date.')
+        cleaned_data.update(start=start, end=end)
+        return cleaned_data
\ No newline at end of file
@@ -0,0 +1,156 @@
+"""
+KPI queries for the admin dashboard
+
+Everything is read from the daily rollup tables kept by
+RentalRollupProjection, so a date range costs a handful of indexed queries
+over at most one row per day per station (or bicycle), however many
+rentals it covers. Bicycles are ranked from a monthly rollup over long
+ranges, as there are many more of them than stations. Long ranges are
+charted by week or month.
+"""
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.db.models import F, Sum
+
+from apps.bicycles.models import Bicycle
+from apps.stations.models import Station
+from .models import BicycleDailyStats, BicycleMonthlyStats, StationAvailability, StationDailyStats
+
+
+TOTAL_FIELDS = ['rides', 'minutes', 'distance_km', 'revenue', 'late_fees', 'damage_fees']
+SERIES = [('rides', 'Rides'), ('revenue', 'Revenue (KES)'), ('minutes', 'Ride minutes')]
+TOP_BICYCLES = 10
+WEEKLY_AFTER_DAYS = 92
+MONTHLY_AFTER_DAYS = 730
+
+
+def sums(fields):
+    return {field: Sum(field) for field in fields}
+
+
+def bucket_size(start, end):
+    days = (end - start).days + 1
+    if days > MONTHLY_AFTER_DAYS:
+        return 'month'
+    if days > WEEKLY_AFTER_DAYS:
+        return 'week'
+    return 'day'
+
+
+def bucket_start(day, size):
+    if size == 'month':
+        return day.replace(day=1)
+    if size == 'week':
+        return day - timedelta(days=day.weekday())
+    return day
+
+
+def fleet_size():
+    """Bicycles in service, from the availability projection"""
+    counts = StationAvailability.objects.aggregate(
+        total=Sum(F('available') + F('reserved') + F('in_use') + F('maintenance'))
+    )
+    return counts['total'] or 0
+
+
+def totals(start, end):
+    """Range totals, plus utilization: share of the fleet's time spent riding"""
+    row = StationDailyStats.objects.filter(day__range=(start, end)).aggregate(**sums(TOTAL_FIELDS))
+    row = {field: value or 0 for field, value in row.items()}
+    available_minutes = fleet_size() * ((end - start).days + 1) * 24 * 60
+    row['utilization'] = 100 * row['minutes'] / available_minutes if available_minutes else 0
+    return row
+
+
+def series(start, end):
+    """
+    Chart data: (bucket size, {field: [(bucket, value, bar top, bar height)]})
+    Bars are in percent of the busiest bucket.
+    Days without rides are included with zeros.
+    """
+    size = bucket_size(start, end)
+    buckets = OrderedDict()
+    day = start
+    while day <= end:
+        buckets.setdefault(bucket_start(day, size), {field: 0 for field, _ in SERIES})
+        day += timedelta(days=1)
+
+    fields = [field for field, _ in SERIES]
+    rows = StationDailyStats.objects.filter(day__range=(start, end)).values('day').annotate(**sums(fields))
+    for row in rows.order_by():
+        bucket = buckets[bucket_start(row['day'], size)]
+        for field in fields:
+            bucket[field] += row[field] or 0
+
+    charts = {}
+    for field in fields:
+        peak = max((values[field] for values in buckets.values()), default=0)
+        heights = [float(100 * values[field] / peak) if peak else 0 for values in buckets.values()]
+        charts[field] = [
+            (bucket, values[field], 100 - height, height)
+            for (bucket, values), height in zip(buckets.items(), heights)
+        ]
+    return size, charts
+
+
+def station_totals(start, end):
+    """One row per station with rides in the range, busiest first"""
+    rows = list(
+        StationDailyStats.objects.filter(day__range=(start, end))
+        .values('station_id')
+        .annotate(returns=Sum('returns'), **sums(TOTAL_FIELDS))
+        .order_by('-rides', 'station_id')
+    )
+    stations = Station.objects.in_bulk([row['station_id'] for row in rows])
+    for row in rows:
+        row['station'] = stations.get(row['station_id'])
+    return rows
+
+
+def month_split(start, end):
+    """
+    (whole months, leftover day ranges) covering start..end
+    Whole months are given by their first day; the leftovers are the partial
+    months at either end, as (first day, last day) pairs.
+    """
+    first_month = start if start.day == 1 else (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    after_end = end + timedelta(days=1)
+    end_month = after_end.replace(day=1)
+    if first_month >= end_month:
+        return [], [(start, end)]
+    months = []
+    month = first_month
+    while month < end_month:
+        months.append(month)
+        month = (month + timedelta(days=32)).replace(day=1)
+    leftovers = [(start, first_month - timedelta(days=1)), (end_month, end)]
+    return months, [(first, last) for first, last in leftovers if first <= last]
+
+
+def top_bicycles(start, end, limit=TOP_BICYCLES):
+    """
+    The most ridden bicycles in the range
+    Whole months are read from the monthly rollup and only the partial
+    months at the ends from the daily one.
+    """
+    months, leftovers = month_split(start, end)
+    querysets = [BicycleMonthlyStats.objects.filter(day__range=(months[0], months[-1]))] if months else []
+    querysets += [BicycleDailyStats.objects.filter(day__range=leftover) for leftover in leftovers]
+
+    rows = {}
+    for queryset in querysets:
+        for row in queryset.values('bicycle_id').annotate(**sums(TOTAL_FIELDS)).order_by():
+            if row['bicycle_id'] in rows:
+                for field in TOTAL_FIELDS:
+                    rows[row['bicycle_id']][field] += row[field]
+            else:
+                rows[row['bicycle_id']] = row
+    rows = sorted(rows.values(), key=lambda row: (-row['rides'], row['bicycle_id']))[:limit]
+
+    bicycles = Bicycle.objects.only('name', 'serial_number').in_bulk([row['bicycle_id'] for row in rows])
+    range_minutes = ((end - start).days + 1) * 24 * 60
+    for row in rows:
+        row['bicycle'] = bicycles.get(row['bicycle_id'])
+        row['utilization'] = 100 * row['minutes'] / range_minutes
+    return rows
\ No newline at end of file
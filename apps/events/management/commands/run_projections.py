@@ -0,0 +1,45 @@
+"""
+Management command to bring the domain event projections up to date
+Usage: python manage.py run_projections [--replay station-availability] [--follow]
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.events.projections import PROJECTIONS
+from apps.events.projector import replay, run_projection
+
+
+class Command(BaseCommand):
+    help = 'Apply new domain events to every projection, or rebuild projections from the first event'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--replay',
+            action='append',
+            default=[],
+            metavar='NAME',
+            help=f"Rebuild a projection from scratch ({', '.join(PROJECTIONS)} or 'all'); may be repeated",
+        )
+        parser.add_argument('--follow', action='store_true', help='Keep running and poll for new events')
+        parser.add_argument('--interval', type=float, default=2, help='Seconds between polls with --follow')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        replays = set(PROJECTIONS) if 'all' in options['replay'] else set(options['replay'])
+        unknown = replays - set(PROJECTIONS)
+        if unknown:
+            raise CommandError(f"Unknown projection: {', '.join(sorted(unknown))}")
+
+        for name in sorted(replays):
+            read = replay(PROJECTIONS[name], options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'{name}: rebuilt from {read} events'))
+
+        while True:
+            for name, projection in PROJECTIONS.items():
+                read = run_projection(projection, options['batch_size'])
+                if read or not options['follow']:
+                    self.stdout.write(f'{name}: {read} new events')
+            if not options['follow']:
+                return
+            time.sleep(options['interval'])
\ No newline at end of file
@@ -0,0 +1,95 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:52
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BicycleState',
+            fields=[
+                ('bicycle_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('station_id', models.BigIntegerField(blank=True, null=True)),
+                ('status', models.CharField(max_length=20)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyActivity',
+            fields=[
+                ('day', models.DateField(primary_key=True, serialize=False)),
+                ('rentals_started', models.PositiveIntegerField(default=0)),
+                ('rentals_completed', models.PositiveIntegerField(default=0)),
+                ('rentals_cancelled', models.PositiveIntegerField(default=0)),
+                ('ride_minutes', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reservations_created', models.PositiveIntegerField(default=0)),
+                ('reservations_expired', models.PositiveIntegerField(default=0)),
+                ('reservations_cancelled', models.PositiveIntegerField(default=0)),
+                ('reservations_converted', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'daily activity',
+                'ordering': ['-day'],
+            },
+        ),
+        migrations.CreateModel(
+            name='DomainEvent',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('type', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('occurred_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ProjectionCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('position', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='RiderStats',
+            fields=[
+                ('user_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('rentals_completed', models.PositiveIntegerField(default=0)),
+                ('rentals_cancelled', models.PositiveIntegerField(default=0)),
+                ('ride_minutes', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('amount_charged', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('reservations', models.PositiveIntegerField(default=0)),
+                ('reservations_expired', models.PositiveIntegerField(default=0)),
+                ('reservations_cancelled', models.PositiveIntegerField(default=0)),
+                ('last_ride_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name_plural': 'rider stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='StationAvailability',
+            fields=[
+                ('station_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('available', models.IntegerField(default=0)),
+                ('reserved', models.IntegerField(default=0)),
+                ('in_use', models.IntegerField(default=0)),
+                ('maintenance', models.IntegerField(default=0)),
+                ('retired', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'station availability',
+            },
+        ),
+    ]
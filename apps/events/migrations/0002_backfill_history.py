@@ -0,0 +1,80 @@
+from django.db import migrations
+
+
+BATCH_SIZE = 1000
+RESERVATION_ENDINGS = {
+    'expired': ('reservation.expired', 'expires_at'),
+    'cancelled': ('reservation.cancelled', 'cancelled_at'),
+    'picked-up': ('reservation.converted', 'picked_up_at'),
+}
+
+
+def history_events(apps):
+    """
+    Events for the state and history that predate the outbox
+    Bicycles are registered in their current state. Reservations and rentals
+    are replayed with their own timestamps. The projections only add up
+    rider and daily totals, so these events do not need to be in time order.
+    """
+    Bicycle = apps.get_model('bicycles', 'Bicycle')
+    Reservation = apps.get_model('rentals', 'Reservation')
+    Rental = apps.get_model('rentals', 'Rental')
+
+    for bicycle in Bicycle.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        yield 'bicycle.registered', bicycle.created_at, {
+            'bicycle_id': bicycle.pk, 'station_id': bicycle.current_station_id, 'status': bicycle.status,
+        }
+
+    for reservation in Reservation.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        payload = {
+            'reservation_id': reservation.pk, 'user_id': reservation.user_id,
+            'bicycle_id': reservation.bicycle_id, 'station_id': reservation.station_id,
+        }
+        yield 'reservation.created', reservation.created_at, payload
+        if reservation.status in RESERVATION_ENDINGS:
+            event_type, field = RESERVATION_ENDINGS[reservation.status]
+            yield event_type, getattr(reservation, field) or reservation.expires_at, payload
+
+    for rental in Rental.objects.order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        yield 'rental.started', rental.start_time, {
+            'rental_id': rental.pk, 'user_id': rental.user_id, 'bicycle_id': rental.bicycle_id,
+            'station_id': rental.pickup_station_id,
+        }
+        if rental.status == 'completed' and rental.end_time:
+            yield 'rental.completed', rental.end_time, {
+                'rental_id': rental.pk, 'user_id': rental.user_id, 'bicycle_id': rental.bicycle_id,
+                'pickup_station_id': rental.pickup_station_id, 'return_station_id': rental.return_station_id,
+                'started_at': rental.start_time.isoformat(),
+                'minutes': round((rental.end_time - rental.start_time).total_seconds() / 60),
+                'distance_km': str(rental.distance_km), 'total_cost': str(rental.total_cost),
+                'late_fee': str(rental.late_fee), 'damage_fee': str(rental.damage_fee),
+            }
+        elif rental.status == 'cancelled':
+            yield 'rental.cancelled', rental.end_time or rental.start_time, {
+                'rental_id': rental.pk, 'user_id': rental.user_id, 'bicycle_id': rental.bicycle_id,
+                'station_id': rental.pickup_station_id,
+            }
+
+
+def backfill(apps, schema_editor):
+    DomainEvent = apps.get_model('events', 'DomainEvent')
+    batch = []
+    for event_type, occurred_at, payload in history_events(apps):
+        batch.append(DomainEvent(type=event_type, occurred_at=occurred_at, payload=payload))
+        if len(batch) >= BATCH_SIZE:
+            DomainEvent.objects.bulk_create(batch)
+            batch = []
+    DomainEvent.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0001_initial'),
+        ('bicycles', '0003_bicycle_status_events'),
+        ('rentals', '0002_station_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
\ No newline at end of file
@@ -0,0 +1,80 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0002_backfill_history'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BicycleDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rides', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('late_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('damage_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bicycle_id', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'bicycle daily stats',
+                'ordering': ['-day', 'bicycle_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='BicycleMonthlyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rides', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('late_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('damage_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('bicycle_id', models.BigIntegerField()),
+            ],
+            options={
+                'verbose_name_plural': 'bicycle monthly stats',
+                'ordering': ['-day', 'bicycle_id'],
+            },
+        ),
+        migrations.CreateModel(
+            name='StationDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('rides', models.PositiveIntegerField(default=0)),
+                ('minutes', models.PositiveIntegerField(default=0)),
+                ('distance_km', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('late_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('damage_fees', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('station_id', models.BigIntegerField()),
+                ('returns', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'station daily stats',
+                'ordering': ['-day', 'station_id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='bicycledailystats',
+            constraint=models.UniqueConstraint(fields=('day', 'bicycle_id'), name='bicycle_daily_stats_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='bicyclemonthlystats',
+            constraint=models.UniqueConstraint(fields=('day', 'bicycle_id'), name='bicycle_monthly_stats_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='stationdailystats',
+            constraint=models.UniqueConstraint(fields=('day', 'station_id'), name='station_daily_stats_unique'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_daily_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('request_id', models.CharField(max_length=64, unique=True)),
+                ('started_at', models.DateTimeField()),
+                ('summary', models.JSONField()),
+                ('profile', models.JSONField()),
+            ],
+            options={
+                'ordering': ['-started_at'],
+                'indexes': [models.Index(fields=['started_at'], name='events_requ_started_c04427_idx')],
+            },
+        ),
+    ]
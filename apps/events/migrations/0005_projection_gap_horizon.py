@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_request_profiles'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='projectioncheckpoint',
+            name='horizon',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='projectioncheckpoint',
+            name='horizon_seen_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,199 @@
+from django.db import models
+from django.utils import timezone
+
+
+class DomainEvent(models.Model):
+    """
+    Transactional outbox of domain events
+    Rows are written in the same transaction as the state change they
+    describe (see apps.events.outbox) and read in id order by the
+    projections (see apps.events.projector). Never updated or deleted.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    occurred_at = models.DateTimeField(default=timezone.now)
+    
+    class Meta:
+        ordering = ['id']
+    
+    def __str__(self):
+        return f"#{self.id} {self.type} at {self.occurred_at}"
+
+
+class ProjectionCheckpoint(models.Model):
+    """Id of the last event a projection has applied"""
+    
+    name = models.CharField(max_length=50, primary_key=True)
+    position = models.BigIntegerField(default=0)
+    # Highest event id visible at horizon_seen_at; missing ids below it are waited for, then given up on
+    horizon = models.BigIntegerField(default=0)
+    horizon_seen_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f"{self.name} at event #{self.position}"
+
+
+class BicycleState(models.Model):
+    """Last known status and station of each bicycle, as seen by the availability projection"""
+    
+    # Plain ids: projections are rebuilt from events and must not depend on live rows
+    bicycle_id = models.BigIntegerField(primary_key=True)
+    station_id = models.BigIntegerField(blank=True, null=True)
+    status = models.CharField(max_length=20)
+
+
+class StationAvailability(models.Model):
+    """Bicycles per status at each station, kept current by the availability projection"""
+    
+    station_id = models.BigIntegerField(primary_key=True)
+    available = models.IntegerField(default=0)
+    reserved = models.IntegerField(default=0)
+    in_use = models.IntegerField(default=0)
+    maintenance = models.IntegerField(default=0)
+    retired = models.IntegerField(default=0)
+    
+    class Meta:
+        verbose_name_plural = 'station availability'
+    
+    def __str__(self):
+        return f"Station {self.station_id}: {self.available} available"
+    
+    @property
+    def total(self):
+        return self.available + self.reserved + self.in_use + self.maintenance + self.retired
+
+
+class RiderStats(models.Model):
+    """Lifetime ride and reservation totals of each rider"""
+    
+    user_id = models.BigIntegerField(primary_key=True)
+    rentals_completed = models.PositiveIntegerField(default=0)
+    rentals_cancelled = models.PositiveIntegerField(default=0)
+    ride_minutes = models.PositiveIntegerField(default=0)
+    distance_km = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    amount_charged = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reservations = models.PositiveIntegerField(default=0)
+    reservations_expired = models.PositiveIntegerField(default=0)
+    reservations_cancelled = models.PositiveIntegerField(default=0)
+    last_ride_at = models.DateTimeField(blank=True, null=True)
+    
+    class Meta:
+        verbose_name_plural = 'rider stats'
+    
+    def __str__(self):
+        return f"Rider {self.user_id}: {self.rentals_completed} rides"
+
+
+class DailyActivity(models.Model):
+    """System-wide rental and reservation counts per local day"""
+    
+    day = models.DateField(primary_key=True)
+    rentals_started = models.PositiveIntegerField(default=0)
+    rentals_completed = models.PositiveIntegerField(default=0)
+    rentals_cancelled = models.PositiveIntegerField(default=0)
+    ride_minutes = models.PositiveIntegerField(default=0)
+    distance_km = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    reservations_created = models.PositiveIntegerField(default=0)
+    reservations_expired = models.PositiveIntegerField(default=0)
+    reservations_cancelled = models.PositiveIntegerField(default=0)
+    reservations_converted = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'daily activity'
+    
+    def __str__(self):
+        return f"{self.day}: {self.rentals_completed} rides"
+
+
+class RideTotals(models.Model):
+    """Ride counts and amounts shared by the daily rollup tables"""
+    
+    day = models.DateField()
+    rides = models.PositiveIntegerField(default=0)
+    minutes = models.PositiveIntegerField(default=0)
+    distance_km = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    late_fees = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    damage_fees = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    
+    class Meta:
+        abstract = True
+
+
+class StationDailyStats(RideTotals):
+    """Rides starting at a station per day, kept by the rental rollup projection"""
+    
+    station_id = models.BigIntegerField()
+    returns = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['-day', 'station_id']
+        verbose_name_plural = 'station daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'station_id'], name='station_daily_stats_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Station {self.station_id} on {self.day}: {self.rides} rides"
+
+
+class BicycleDailyStats(RideTotals):
+    """Rides of a bicycle per day, kept by the rental rollup projection"""
+    
+    bicycle_id = models.BigIntegerField()
+    
+    class Meta:
+        ordering = ['-day', 'bicycle_id']
+        verbose_name_plural = 'bicycle daily stats'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'bicycle_id'], name='bicycle_daily_stats_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Bicycle {self.bicycle_id} on {self.day}: {self.rides} rides"
+
+
+class BicycleMonthlyStats(RideTotals):
+    """
+    Rides of a bicycle per calendar month; day is the first of the month
+    Ranking bicycles over long ranges reads months instead of days.
+    """
+    
+    bicycle_id = models.BigIntegerField()
+    
+    class Meta:
+        ordering = ['-day', 'bicycle_id']
+        verbose_name_plural = 'bicycle monthly stats'
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'bicycle_id'], name='bicycle_monthly_stats_unique'),
+        ]
+    
+    def __str__(self):
+        return f"Bicycle {self.bicycle_id} in {self.day:%B %Y}: {self.rides} rides"
+
+
+class RequestProfile(models.Model):
+    """
+    A sampled request profile (see core.profiling)
+    Kept in the database so every worker process sees the same profiles.
+    """
+    
+    request_id = models.CharField(max_length=64, unique=True)
+    started_at = models.DateTimeField()
+    # The admin list columns; profile holds the whole result, frames and stacks included
+    summary = models.JSONField()
+    profile = models.JSONField()
+    
+    class Meta:
+        ordering = ['-started_at']
+        indexes = [
+            models.Index(fields=['started_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.summary['method']} {self.summary['path']} ({self.request_id})"
\ No newline at end of file
@@ -0,0 +1,138 @@
+"""
+Domain events
+
+Each EventType names an event and the payload fields it carries. record()
+writes the event to the DomainEvent outbox on the current connection, so it
+commits or rolls back with the state change that caused it; callers make
+the change and the record() call inside one transaction.atomic() block.
+Payloads hold plain ids, numbers (decimals as strings) and ISO timestamps.
+"""
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .models import DomainEvent
+
+
+class EventType:
+    """A kind of domain event and its payload fields"""
+
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = tuple(fields)
+
+    def __repr__(self):
+        return f'EventType({self.name!r})'
+
+    def build(self, occurred_at=None, **payload):
+        """An unsaved DomainEvent, for bulk_create()"""
+        missing = set(self.fields) - set(payload)
+        unknown = set(payload) - set(self.fields)
+        if missing or unknown:
+            raise ValueError(
+                f'{self.name} payload: missing {sorted(missing) or "nothing"}, unknown {sorted(unknown) or "nothing"}'
+            )
+        return DomainEvent(
+            type=self.name,
+            payload={name: encode(value) for name, value in payload.items()},
+            occurred_at=occurred_at or timezone.now(),
+        )
+
+    def record(self, occurred_at=None, **payload):
+        """Write the event to the outbox in the current transaction"""
+        event = self.build(occurred_at, **payload)
+        event.save()
+        return event
+
+
+def encode(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+BICYCLE_FIELDS = ['bicycle_id', 'station_id', 'status']
+RESERVATION_FIELDS = ['reservation_id', 'user_id', 'bicycle_id', 'station_id']
+
+# A bicycle entered the fleet, or existed before the outbox (see migration 0002)
+BICYCLE_REGISTERED = EventType('bicycle.registered', BICYCLE_FIELDS)
+BICYCLE_STATUS_CHANGED = EventType('bicycle.status_changed', BICYCLE_FIELDS)
+BICYCLE_REMOVED = EventType('bicycle.removed', ['bicycle_id'])
+
+RESERVATION_CREATED = EventType('reservation.created', RESERVATION_FIELDS)
+RESERVATION_EXPIRED = EventType('reservation.expired', RESERVATION_FIELDS)
+RESERVATION_CANCELLED = EventType('reservation.cancelled', RESERVATION_FIELDS)
+RESERVATION_CONVERTED = EventType('reservation.converted', RESERVATION_FIELDS)
+
+RENTAL_STARTED = EventType('rental.started', ['rental_id', 'user_id', 'bicycle_id', 'station_id'])
+RENTAL_COMPLETED = EventType('rental.completed', [
+    'rental_id', 'user_id', 'bicycle_id', 'pickup_station_id', 'return_station_id',
+    'started_at', 'minutes', 'distance_km', 'total_cost', 'late_fee', 'damage_fee',
+])
+RENTAL_CANCELLED = EventType('rental.cancelled', ['rental_id', 'user_id', 'bicycle_id', 'station_id'])
+# A completed rental's charges or distance were edited; amounts are differences
+RENTAL_ADJUSTED = EventType('rental.adjusted', [
+    'rental_id', 'user_id', 'bicycle_id', 'pickup_station_id', 'completed_at',
+    'distance_km', 'total_cost', 'late_fee', 'damage_fee',
+])
+
+EVENT_TYPES = {
+    event_type.name: event_type
+    for event_type in (
+        BICYCLE_REGISTERED, BICYCLE_STATUS_CHANGED, BICYCLE_REMOVED,
+        RESERVATION_CREATED, RESERVATION_EXPIRED, RESERVATION_CANCELLED, RESERVATION_CONVERTED,
+        RENTAL_STARTED, RENTAL_COMPLETED, RENTAL_CANCELLED, RENTAL_ADJUSTED,
+    )
+}
+
+
+def reservation_payload(reservation):
+    return {
+        'reservation_id': reservation.pk,
+        'user_id': reservation.user_id,
+        'bicycle_id': reservation.bicycle_id,
+        'station_id': reservation.station_id,
+    }
+
+
+def rental_completed_payload(rental):
+    return {
+        'rental_id': rental.pk,
+        'user_id': rental.user_id,
+        'bicycle_id': rental.bicycle_id,
+        'pickup_station_id': rental.pickup_station_id,
+        'return_station_id': rental.return_station_id,
+        'started_at': rental.start_time,
+        'minutes': round((rental.end_time - rental.start_time).total_seconds() / 60),
+        'distance_km': str(rental.distance_km),
+        'total_cost': str(rental.total_cost),
+        'late_fee': str(rental.late_fee),
+        'damage_fee': str(rental.damage_fee),
+    }
+
+
+ADJUSTABLE_FIELDS = ['distance_km', 'total_cost', 'late_fee', 'damage_fee']
+CENT = Decimal('0.01')
+
+
+def rental_adjusted_payload(rental, previous):
+    """
+    The change to a completed rental's amounts since previous (a values() dict), or None
+    Compared at the precision the columns store.
+    """
+    changes = {
+        field: Decimal(str(getattr(rental, field))).quantize(CENT) - Decimal(previous[field]).quantize(CENT)
+        for field in ADJUSTABLE_FIELDS
+    }
+    if not any(changes.values()):
+        return None
+    return {
+        'rental_id': rental.pk,
+        'user_id': rental.user_id,
+        'bicycle_id': rental.bicycle_id,
+        'pickup_station_id': rental.pickup_station_id,
+        'completed_at': previous['end_time'],
+        **{field: str(change) for field, change in changes.items()},
+    }
\ No newline at end of file
@@ -0,0 +1,252 @@
+"""
+Read models kept up to date from the domain event outbox
+
+StationAvailabilityProjection counts bicycles per status at each station.
+RiderStatsProjection keeps lifetime totals per rider. DailyActivityProjection
+keeps system-wide counts per local day. RentalRollupProjection keeps ride
+totals per day and station and per day and bicycle for the KPI dashboard.
+Each one folds a batch of events into
+in-memory deltas and writes one row per station, rider or day touched, so a
+batch costs a few queries however many events it holds.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import outbox
+from .models import (
+    BicycleDailyStats, BicycleMonthlyStats, BicycleState, DailyActivity, RiderStats, StationAvailability,
+    StationDailyStats,
+)
+from .projector import Projection
+
+
+CENT = Decimal('0.01')
+# bulk_update builds one CASE WHEN per field; smaller statements keep it linear
+UPDATE_BATCH_SIZE = 250
+
+# Bicycle status -> StationAvailability column
+STATUS_COLUMNS = {
+    'available': 'available',
+    'reserved': 'reserved',
+    'in-use': 'in_use',
+    'maintenance': 'maintenance',
+    'retired': 'retired',
+}
+
+
+def apply_deltas(model, key_fields, deltas, latest=None):
+    """
+    Add {key: {field: delta}} to the model's rows, creating missing rows
+    Keys are tuples of key_fields values. latest is {key: {field: value}}
+    for fields that are set rather than added. Rows are read, changed in
+    memory and written back with one bulk_create() and one bulk_update();
+    the projector's checkpoint lock keeps other runners out meanwhile.
+    """
+    latest = latest or {}
+    lookups = {f'{field}__in': {key[index] for key in deltas} for index, field in enumerate(key_fields)}
+    # The lookups may match a few rows of other keys, which are left alone
+    rows = {
+        tuple(getattr(row, field) for field in key_fields): row
+        for row in model.objects.filter(**lookups)
+    }
+    created, updated, changed_fields = [], [], set()
+    for key, fields in deltas.items():
+        row = rows.get(key)
+        if row is None:
+            row = model(**dict(zip(key_fields, key)))
+            created.append(row)
+        else:
+            updated.append(row)
+        for field, delta in fields.items():
+            setattr(row, field, getattr(row, field) + delta)
+        for field, value in latest.get(key, {}).items():
+            setattr(row, field, value)
+        changed_fields.update(fields, latest.get(key, {}))
+    model.objects.bulk_create(created, batch_size=UPDATE_BATCH_SIZE)
+    if updated and changed_fields:
+        model.objects.bulk_update(updated, sorted(changed_fields), batch_size=UPDATE_BATCH_SIZE)
+
+
+def money(value):
+    return Decimal(value).quantize(CENT)
+
+
+def completion_day(event):
+    """Local day a rental.adjusted event's rental was completed on"""
+    return timezone.localdate(parse_datetime(event.payload['completed_at']))
+
+
+class StationAvailabilityProjection(Projection):
+    """Bicycles per status at each station"""
+    name = 'station-availability'
+    event_types = {
+        outbox.BICYCLE_REGISTERED.name, outbox.BICYCLE_STATUS_CHANGED.name, outbox.BICYCLE_REMOVED.name,
+    }
+    models = (BicycleState, StationAvailability)
+
+    def apply(self, events):
+        bicycle_ids = {event.payload['bicycle_id'] for event in events}
+        states = {
+            state.bicycle_id: state
+            for state in BicycleState.objects.filter(bicycle_id__in=bicycle_ids)
+        }
+        before = {bicycle_id: (state.station_id, state.status) for bicycle_id, state in states.items()}
+        after = dict(before)
+        for event in events:
+            bicycle_id = event.payload['bicycle_id']
+            if event.type == outbox.BICYCLE_REMOVED.name:
+                after.pop(bicycle_id, None)
+            else:
+                after[bicycle_id] = (event.payload['station_id'], event.payload['status'])
+
+        # Only each bicycle's state before and after the batch moves the counts
+        deltas = defaultdict(lambda: defaultdict(int))
+        for bicycle_id in bicycle_ids:
+            old, new = before.get(bicycle_id), after.get(bicycle_id)
+            if old == new:
+                continue
+            for state, change in ((old, -1), (new, 1)):
+                if state is None:
+                    continue
+                station_id, status = state
+                if station_id is not None and status in STATUS_COLUMNS:
+                    deltas[(station_id,)][STATUS_COLUMNS[status]] += change
+        apply_deltas(StationAvailability, ('station_id',), deltas)
+
+        removed = [bicycle_id for bicycle_id in before if bicycle_id not in after]
+        BicycleState.objects.filter(bicycle_id__in=removed).delete()
+        changed = [
+            BicycleState(bicycle_id=bicycle_id, station_id=station_id, status=status)
+            for bicycle_id, (station_id, status) in after.items()
+            if before.get(bicycle_id) != (station_id, status)
+        ]
+        BicycleState.objects.bulk_create(
+            changed, update_conflicts=True, unique_fields=['bicycle_id'], update_fields=['station_id', 'status'],
+        )
+
+
+class RiderStatsProjection(Projection):
+    """Lifetime ride and reservation totals per rider"""
+    name = 'rider-stats'
+    event_types = {
+        outbox.RENTAL_COMPLETED.name, outbox.RENTAL_CANCELLED.name, outbox.RENTAL_ADJUSTED.name,
+        outbox.RESERVATION_CREATED.name, outbox.RESERVATION_EXPIRED.name, outbox.RESERVATION_CANCELLED.name,
+    }
+    models = (RiderStats,)
+    counters = {
+        outbox.RENTAL_CANCELLED.name: 'rentals_cancelled',
+        outbox.RESERVATION_CREATED.name: 'reservations',
+        outbox.RESERVATION_EXPIRED.name: 'reservations_expired',
+        outbox.RESERVATION_CANCELLED.name: 'reservations_cancelled',
+    }
+
+    def apply(self, events):
+        deltas = defaultdict(lambda: defaultdict(int))
+        latest = defaultdict(dict)
+        for event in events:
+            key = (event.payload['user_id'],)
+            totals = deltas[key]
+            if event.type == outbox.RENTAL_COMPLETED.name:
+                totals['rentals_completed'] += 1
+                totals['ride_minutes'] += event.payload['minutes']
+                totals['distance_km'] += money(event.payload['distance_km'])
+                totals['amount_charged'] += money(event.payload['total_cost'])
+                latest[key]['last_ride_at'] = event.occurred_at
+            elif event.type == outbox.RENTAL_ADJUSTED.name:
+                totals['distance_km'] += money(event.payload['distance_km'])
+                totals['amount_charged'] += money(event.payload['total_cost'])
+            else:
+                totals[self.counters[event.type]] += 1
+        apply_deltas(RiderStats, ('user_id',), deltas, latest)
+
+
+class DailyActivityProjection(Projection):
+    """System-wide rental and reservation counts per local day"""
+    name = 'daily-activity'
+    event_types = {
+        outbox.RENTAL_STARTED.name, outbox.RENTAL_COMPLETED.name, outbox.RENTAL_CANCELLED.name,
+        outbox.RENTAL_ADJUSTED.name, outbox.RESERVATION_CREATED.name, outbox.RESERVATION_EXPIRED.name,
+        outbox.RESERVATION_CANCELLED.name, outbox.RESERVATION_CONVERTED.name,
+    }
+    models = (DailyActivity,)
+    counters = {
+        outbox.RENTAL_STARTED.name: 'rentals_started',
+        outbox.RENTAL_CANCELLED.name: 'rentals_cancelled',
+        outbox.RESERVATION_CREATED.name: 'reservations_created',
+        outbox.RESERVATION_EXPIRED.name: 'reservations_expired',
+        outbox.RESERVATION_CANCELLED.name: 'reservations_cancelled',
+        outbox.RESERVATION_CONVERTED.name: 'reservations_converted',
+    }
+
+    def apply(self, events):
+        deltas = defaultdict(lambda: defaultdict(int))
+        for event in events:
+            if event.type == outbox.RENTAL_ADJUSTED.name:
+                # Adjustments belong to the day the rental was completed
+                totals = deltas[(completion_day(event),)]
+                totals['distance_km'] += money(event.payload['distance_km'])
+                totals['revenue'] += money(event.payload['total_cost'])
+                continue
+            totals = deltas[(timezone.localdate(event.occurred_at),)]
+            if event.type == outbox.RENTAL_COMPLETED.name:
+                totals['rentals_completed'] += 1
+                totals['ride_minutes'] += event.payload['minutes']
+                totals['distance_km'] += money(event.payload['distance_km'])
+                totals['revenue'] += money(event.payload['total_cost'])
+            else:
+                totals[self.counters[event.type]] += 1
+        apply_deltas(DailyActivity, ('day',), deltas)
+
+
+class RentalRollupProjection(Projection):
+    """
+    Ride totals per day and station, and per day and month for each bicycle
+    A ride counts on the local day it ended, at its pickup station; returns
+    are also counted at the return station. Adjustments land on the ride's
+    own day, so past days change when a completed rental is edited.
+    """
+    name = 'rental-rollups'
+    event_types = {outbox.RENTAL_COMPLETED.name, outbox.RENTAL_ADJUSTED.name}
+    models = (StationDailyStats, BicycleDailyStats, BicycleMonthlyStats)
+
+    def apply(self, events):
+        stations = defaultdict(lambda: defaultdict(int))
+        bicycles = defaultdict(lambda: defaultdict(int))
+        bicycle_months = defaultdict(lambda: defaultdict(int))
+        for event in events:
+            payload = event.payload
+            amounts = {
+                'distance_km': money(payload['distance_km']),
+                'revenue': money(payload['total_cost']),
+                'late_fees': money(payload['late_fee']),
+                'damage_fees': money(payload['damage_fee']),
+            }
+            if event.type == outbox.RENTAL_COMPLETED.name:
+                day = timezone.localdate(event.occurred_at)
+                amounts.update(rides=1, minutes=payload['minutes'])
+                if payload['return_station_id'] is not None:
+                    stations[(day, payload['return_station_id'])]['returns'] += 1
+            else:
+                day = completion_day(event)
+            rows = (
+                stations[(day, payload['pickup_station_id'])],
+                bicycles[(day, payload['bicycle_id'])],
+                bicycle_months[(day.replace(day=1), payload['bicycle_id'])],
+            )
+            for totals in rows:
+                for field, amount in amounts.items():
+                    totals[field] += amount
+        apply_deltas(StationDailyStats, ('day', 'station_id'), stations)
+        apply_deltas(BicycleDailyStats, ('day', 'bicycle_id'), bicycles)
+        apply_deltas(BicycleMonthlyStats, ('day', 'bicycle_id'), bicycle_months)
+
+
+PROJECTIONS = {
+    projection.name: projection
+    for projection in (
+        StationAvailabilityProjection(), RiderStatsProjection(), DailyActivityProjection(), RentalRollupProjection(),
+    )
+}
\ No newline at end of file
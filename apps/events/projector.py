@@ -0,0 +1,108 @@
+"""
+Projection runner
+
+A projection reads the DomainEvent outbox in id order and keeps its own
+tables up to date. run_projection() applies events in batches. Each batch
+goes through apply() and then advances the projection's checkpoint, in one
+transaction, so an event is applied exactly once even if the runner is
+killed. The checkpoint row is locked for the batch, which makes a second
+runner of the same projection wait rather than apply events twice.
+
+An id is allocated when a row is inserted, but rows become visible when
+their transaction commits, and a slow transaction can commit after a
+faster one with a higher id. So the runner stops at a missing id and waits
+for it, however old the events on either side are. A rolled-back
+transaction leaves a gap that is never filled, so the checkpoint also keeps
+a horizon: the highest id visible when it was taken. Ids below the horizon
+that are still missing PROJECTION_GAP_SECONDS later are given up on. That is
+longer than any transaction that records events takes to commit.
+
+replay() empties a projection's tables and rewinds its checkpoint to zero,
+then rebuilds it from the whole outbox.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import DomainEvent, ProjectionCheckpoint
+
+
+BATCH_SIZE = 1000
+
+
+class Projection:
+    """Base class: name, the event types handled, the tables owned and apply()"""
+    name = None
+    event_types = ()
+    models = ()
+
+    def apply(self, events):
+        """Fold a batch of DomainEvents, in id order, into the projection's tables"""
+        raise NotImplementedError
+
+    def reset(self):
+        for model in self.models:
+            model.objects.all().delete()
+
+
+def skippable_position(checkpoint, now):
+    """
+    Missing ids up to the returned one are given up on
+    Takes a new horizon once the runner has passed the last one, so each gap
+    is waited for PROJECTION_GAP_SECONDS from the first run that could see it.
+    """
+    if checkpoint.horizon_seen_at is None or checkpoint.position >= checkpoint.horizon:
+        horizon = DomainEvent.objects.aggregate(Max('id'))['id__max'] or 0
+        if checkpoint.horizon_seen_at is None or horizon != checkpoint.horizon:
+            checkpoint.horizon, checkpoint.horizon_seen_at = horizon, now
+    if now - checkpoint.horizon_seen_at >= timedelta(seconds=settings.PROJECTION_GAP_SECONDS):
+        return checkpoint.horizon
+    return checkpoint.position
+
+
+def apply_batch(projection, batch_size=BATCH_SIZE):
+    """Apply the next batch of events; returns (events read, new position)"""
+    with transaction.atomic():
+        checkpoint, _ = ProjectionCheckpoint.objects.get_or_create(name=projection.name)
+        checkpoint = ProjectionCheckpoint.objects.select_for_update().get(pk=checkpoint.pk)
+        horizon_seen_at = checkpoint.horizon_seen_at
+        skippable = skippable_position(checkpoint, timezone.now())
+        events = list(DomainEvent.objects.filter(id__gt=checkpoint.position).order_by('id')[:batch_size])
+        position = checkpoint.position
+        for index, event in enumerate(events):
+            # The ids between position and this event are missing; wait for them unless given up on
+            if event.id - 1 > max(position, skippable):
+                del events[index:]
+                break
+            position = event.id
+        if not events:
+            if checkpoint.horizon_seen_at != horizon_seen_at:
+                checkpoint.save(update_fields=['horizon', 'horizon_seen_at'])
+            return 0, checkpoint.position
+        handled = [event for event in events if event.type in projection.event_types]
+        if handled:
+            projection.apply(handled)
+        checkpoint.position = events[-1].id
+        checkpoint.save()
+    return len(events), checkpoint.position
+
+
+def run_projection(projection, batch_size=BATCH_SIZE):
+    """Apply every event the projection has not seen, up to the first awaited gap; returns the number read"""
+    total = 0
+    while True:
+        read, _ = apply_batch(projection, batch_size)
+        if not read:
+            return total
+        total += read
+
+
+def replay(projection, batch_size=BATCH_SIZE):
+    """Rebuild a projection from the first event"""
+    with transaction.atomic():
+        ProjectionCheckpoint.objects.update_or_create(name=projection.name, defaults={'position': 0})
+        projection.reset()
+    return run_projection(projection, batch_size)
\ No newline at end of file
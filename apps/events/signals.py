@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .outbox import BICYCLE_REMOVED
+
+
+@receiver(post_delete, sender='bicycles.Bicycle')
+def bicycle_deleted(sender, instance, **kwargs):
+    """Deletes run in a transaction, which the event joins"""
+    BICYCLE_REMOVED.record(bicycle_id=instance.pk)
\ No newline at end of file
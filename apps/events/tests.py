@@ -0,0 +1,179 @@
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from apps.bicycles.models import Bicycle
+from apps.rentals.models import Rental, Reservation
+from apps.stations.models import Station
+from core import testing
+from .models import DailyActivity, DomainEvent, ProjectionCheckpoint, RiderStats, StationAvailability, StationDailyStats
+from .projections import PROJECTIONS, STATUS_COLUMNS
+from .projector import Projection, replay, run_projection
+
+
+class EventViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('kpi dashboard', 'kpi-dashboard', 10, 'admin'),
+        testing.ViewBudget('domain event admin', 'admin:events_domainevent_changelist', 7, 'admin'),
+    ]
+
+
+@override_settings(PROJECTION_GAP_SECONDS=0)
+class ProjectionReplayTests(TestCase):
+    """Projections applied as events arrive match a full replay and the tables the events describe"""
+
+    def setUp(self):
+        self.home = Station.objects.create(name='Home', code='HOME', address='Home Road', capacity=20)
+        self.away = Station.objects.create(name='Away', code='AWAY', address='Away Road', capacity=20)
+        self.rider = get_user_model().objects.create_user(
+            username='replay-rider', password='password123', email='replay@example.com', university_id='REPLAY/1',
+        )
+        self.bicycles = [
+            Bicycle.objects.create(
+                name=f'Replay {index}', model='City', serial_number=f'REPLAY-{index}', current_station=self.home,
+            )
+            for index in range(4)
+        ]
+
+    def run_projections(self):
+        for projection in PROJECTIONS.values():
+            # Small batches, so events of one transition span several of them
+            run_projection(projection, batch_size=2)
+
+    def snapshot(self):
+        """Every projection row, without the surrogate ids a replay renumbers"""
+        return {
+            name: [
+                [
+                    {field: value for field, value in row.items() if field != 'id'}
+                    for row in model.objects.order_by(*model._meta.ordering or ['pk']).values()
+                ]
+                for model in projection.models
+            ]
+            for name, projection in PROJECTIONS.items()
+        }
+
+    def test_incremental_projections_match_replay_and_source_tables(self):
+        self.run_projections()
+        reserved, ridden, moved, retired = self.bicycles
+
+        reserved.mark_as_reserved()
+        Reservation.objects.create(user=self.rider, bicycle=reserved, station=self.home).cancel()
+        ridden.mark_as_in_use()
+        rental = Rental.objects.create(user=self.rider, bicycle=ridden, pickup_station=self.home)
+        self.run_projections()
+        rental = Rental.objects.get(pk=rental.pk)
+        rental.complete_rental(self.away, distance_km=Decimal('3.5'))
+
+        # Edited the way the admin and the bulk actions edit bicycles
+        moved.status = 'maintenance'
+        moved.current_station = self.away
+        moved.save()
+        Bicycle.objects.filter(pk=retired.pk).set_status('retired')
+        rental.damage_fee = Decimal('10.00')
+        rental.total_cost += rental.damage_fee
+        rental.save()
+        self.run_projections()
+
+        incremental = self.snapshot()
+        for projection in PROJECTIONS.values():
+            replay(projection)
+        self.assertEqual(self.snapshot(), incremental)
+
+        counts = defaultdict(dict)
+        for row in Bicycle.objects.values('current_station', 'status').annotate(bicycles=Count('pk')):
+            counts[row['current_station']][STATUS_COLUMNS[row['status']]] = row['bicycles']
+        self.assertEqual(
+            {
+                row['station_id']: {column: count for column, count in row.items() if column != 'station_id' and count}
+                for row in StationAvailability.objects.values()
+            },
+            counts,
+        )
+
+        completed = Rental.objects.filter(status='completed').aggregate(
+            rides=Count('pk'), distance=Sum('distance_km'), revenue=Sum('total_cost'),
+        )
+        stats = RiderStats.objects.get(user_id=self.rider.pk)
+        self.assertEqual(
+            (stats.rentals_completed, stats.distance_km, stats.amount_charged, stats.reservations_cancelled),
+            (completed['rides'], completed['distance'], completed['revenue'], 1),
+        )
+        for model, rides in ((DailyActivity, 'rentals_completed'), (StationDailyStats, 'rides')):
+            self.assertEqual(
+                model.objects.aggregate(rides=Sum(rides), distance=Sum('distance_km'), revenue=Sum('revenue')),
+                {'rides': completed['rides'], 'distance': completed['distance'], 'revenue': completed['revenue']},
+            )
+
+
+class RecordingProjection(Projection):
+    name = 'gap-test'
+    event_types = ('test.recorded',)
+
+    def __init__(self):
+        self.applied = []
+
+    def apply(self, events):
+        self.applied += [event.id for event in events]
+
+
+@override_settings(PROJECTION_GAP_SECONDS=30)
+class ProjectionGapTests(TestCase):
+    """A lower id that commits after a higher one is waited for, whatever its occurred_at says"""
+
+    def setUp(self):
+        self.base = DomainEvent.objects.order_by('id').values_list('id', flat=True).last() or 0
+        ProjectionCheckpoint.objects.create(name=RecordingProjection.name, position=self.base)
+        self.projection = RecordingProjection()
+
+    def record(self, offset, occurred_at=None):
+        DomainEvent.objects.create(
+            id=self.base + offset, type='test.recorded', payload={}, occurred_at=occurred_at or timezone.now(),
+        )
+
+    def applied(self):
+        run_projection(self.projection, batch_size=2)
+        return [event_id - self.base for event_id in self.projection.applied]
+
+    def checkpoint(self):
+        return ProjectionCheckpoint.objects.get(name=RecordingProjection.name)
+
+    def test_waits_for_an_id_committed_out_of_order(self):
+        self.record(2)
+        self.record(3)
+        self.assertEqual(self.applied(), [])
+        seen_at = self.checkpoint().horizon_seen_at
+        self.assertEqual(self.applied(), [])
+        # Polling does not restart the wait
+        self.assertEqual(self.checkpoint().horizon_seen_at, seen_at)
+
+        # The slower transaction commits, its event stamped well before the others
+        self.record(1, occurred_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(self.applied(), [1, 2, 3])
+        self.assertEqual(self.checkpoint().position, self.base + 3)
+
+    def test_gives_up_on_a_rolled_back_id_after_the_wait(self):
+        self.record(2)
+        self.assertEqual(self.applied(), [])
+        ProjectionCheckpoint.objects.update(horizon_seen_at=F('horizon_seen_at') - timedelta(seconds=31))
+        self.assertEqual(self.applied(), [2])
+
+        # A gap above the old horizon gets a wait of its own
+        self.record(4)
+        self.assertEqual(self.applied(), [2])
+        self.record(3)
+        self.assertEqual(self.applied(), [2, 3, 4])
+
+    def test_replay_skips_gaps_already_given_up_on(self):
+        self.record(2)
+        self.applied()
+        ProjectionCheckpoint.objects.update(horizon_seen_at=F('horizon_seen_at') - timedelta(seconds=31))
+        self.applied()
+        self.projection.applied = []
+        replay(self.projection)
+        self.assertEqual([event_id - self.base for event_id in self.projection.applied], [2])
\ No newline at end of file
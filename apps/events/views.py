@@ -0,0 +1,46 @@
+from datetime import timedelta
+
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.template.response import TemplateResponse
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from . import kpis
+from .forms import KpiRangeForm
+from .models import ProjectionCheckpoint
+from .projections import RentalRollupProjection
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class KpiDashboardView(View):
+    """
+    Revenue, utilization and ride counts for a date range
+    Read from the daily rollups only (see apps.events.kpis).
+    """
+    def get(self, request):
+        form = KpiRangeForm(request.GET)
+        context = {
+            **admin.site.each_context(request),
+            'title': 'KPI dashboard',
+            'form': form,
+        }
+        if form.is_valid():
+            start, end = form.cleaned_data['start'], form.cleaned_data['end']
+            size, charts = kpis.series(start, end)
+            context.update({
+                'start': start,
+                'end': end,
+                'days': (end - start).days + 1,
+                'bucket_size': size,
+                'totals': kpis.totals(start, end),
+                'charts': [(label, charts[field]) for field, label in kpis.SERIES],
+                'stations': kpis.station_totals(start, end),
+                'bicycles': kpis.top_bicycles(start, end),
+                'checkpoint': ProjectionCheckpoint.objects.filter(name=RentalRollupProjection.name).first(),
+                'last_7_days': timezone.localdate() - timedelta(days=6),
+                'last_90_days': timezone.localdate() - timedelta(days=89),
+                'last_365_days': timezone.localdate() - timedelta(days=364),
+            })
+        return TemplateResponse(request, 'admin/events/kpi_dashboard.html', context)
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0001_initial'),
+        ('rentals', '0002_station_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='rental',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='payments', to='rentals.rental'),
+        ),
+    ]
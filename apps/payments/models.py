@@ -27,7 +27,9 @@ class Payment(models.Model):
     
     # Relationships
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='payments')
-    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='payments')
+    # No database constraint: rentals are partitioned by start_time, so their id
+    # alone is not unique in the database (see apps.rentals migration 0003)
+    rental = models.ForeignKey(Rental, on_delete=models.CASCADE, related_name='payments', db_constraint=False)
     
     # Payment details
     method = models.CharField(max_length=20, choices=METHOD_CHOICES)
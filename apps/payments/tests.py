@@ -1,3 +1,8 @@
-from django.test import TestCase
+from core import testing
 
-# Create your tests here.
+
+class PaymentViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('payment admin', 'admin:payments_payment_changelist', 5, 'admin'),
+        testing.ViewBudget('refund admin', 'admin:payments_refund_changelist', 5, 'admin'),
+    ]
\ No newline at end of file
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Reservation, Rental
+from .models import Reservation, Rental, StationDemandForecast
 
 
 @admin.register(Reservation)
@@ -80,4 +80,19 @@ class RentalAdmin(admin.ModelAdmin):
             rental.calculate_cost()
             rental.save()
         self.message_user(request, f'Costs recalculated for {queryset.count()} rentals.')
-    calculate_costs.short_description = "Recalculate costs"
\ No newline at end of file
+    calculate_costs.short_description = "Recalculate costs"
+
+
+@admin.register(StationDemandForecast)
+class StationDemandForecastAdmin(admin.ModelAdmin):
+    list_display = ['station', 'observed_until', 'updated_at']
+    list_select_related = ['station']
+    fields = ['station', 'observed_until', 'updated_at']
+    readonly_fields = fields
+    
+    # Forecasts are maintained by manage.py update_forecasts
+    def has_add_permission(self, request):
+        return False
+    
+    def has_change_permission(self, request, obj=None):
+        return False
\ No newline at end of file
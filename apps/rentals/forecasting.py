@@ -0,0 +1,289 @@
+"""
+Hour-of-week demand forecasting per station
+
+Rental history is streamed with core.db.stream_values() and binned into a
+stations x 168 (hour-of-week) NumPy matrix with np.add.at, once for pickups
+(start_time at pickup_station) and once for returns (end_time at
+return_station). Each count is weighted by an exponential decay on its age,
+so recent weeks count more, and divided by the equally decayed number of
+times that hour-of-week was observed. The result is the expected number of
+pickups/returns in each hour of a typical week.
+
+Only decayed sums are stored (StationDemandForecast), so an update rescales
+the stored arrays and folds in the rentals since the last watermark instead
+of re-reading the whole history.
+"""
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Min
+from django.db.models.functions import ExtractHour, ExtractIsoWeekDay
+from django.utils import timezone
+
+from apps.stations.models import Station
+from core.db import stream_values
+from .models import Rental, StationDemandForecast
+
+
+HOURS_PER_WEEK = 168
+SECONDS_PER_WEEK = 7 * 24 * 3600
+STREAM_CHUNK_SIZE = 20000
+
+
+def to_array(blob):
+    return np.frombuffer(bytes(blob), dtype=np.float64).copy()
+
+
+def to_blob(array):
+    return np.asarray(array, dtype=np.float64).tobytes()
+
+
+def decay(age_seconds):
+    """Weight of an observation age_seconds old (1 now, 0.5 after one half-life)"""
+    half_life = settings.FORECAST_HALF_LIFE_WEEKS * SECONDS_PER_WEEK
+    return np.power(0.5, np.asarray(age_seconds, dtype=np.float64) / half_life)
+
+
+def floor_hour(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def hour_slot(moment):
+    """Hour-of-week slot (0-167, Monday 00:00 first) of a datetime in local time"""
+    local = timezone.localtime(moment)
+    return local.weekday() * 24 + local.hour
+
+
+def exposure_between(start, end):
+    """Decayed number of times each hour-of-week occurs in [start, end)"""
+    exposure = np.zeros(HOURS_PER_WEEK)
+    hours = int((end - start).total_seconds() // 3600)
+    if hours <= 0:
+        return exposure
+    slots = np.fromiter(
+        (hour_slot(start + timedelta(hours=offset)) for offset in range(hours)),
+        dtype=np.int64, count=hours,
+    )
+    ages = (end - start).total_seconds() - np.arange(hours) * 3600.0
+    np.add.at(exposure, slots, decay(ages))
+    return exposure
+
+
+def stream_events(queryset, station_field, time_field, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield (station ids, hour-of-week slots, unix times) arrays in chunks
+    The weekday and hour are extracted in the database in the local time zone.
+    """
+    rows = stream_values(
+        queryset.annotate(
+            event_weekday=ExtractIsoWeekDay(time_field),
+            event_hour=ExtractHour(time_field),
+        ),
+        [station_field, 'event_weekday', 'event_hour', time_field],
+        chunk_size=chunk_size,
+    )
+
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk_size:
+            yield events_to_arrays(batch)
+            batch = []
+    if batch:
+        yield events_to_arrays(batch)
+
+
+def events_to_arrays(batch):
+    station_ids, weekdays, hours, moments = zip(*batch)
+    return (
+        np.array(station_ids, dtype=np.int64),
+        (np.array(weekdays, dtype=np.int64) - 1) * 24 + np.array(hours, dtype=np.int64),
+        np.array([moment.timestamp() for moment in moments]),
+    )
+
+
+def bin_events(chunks, station_ids, starts, until):
+    """
+    Accumulate decayed event weights into a len(station_ids) x 168 matrix
+    station_ids must be sorted; starts holds each station's window start as a
+    unix time so events a station has already counted are skipped.
+    """
+    matrix = np.zeros((len(station_ids), HOURS_PER_WEEK))
+    until_ts = until.timestamp()
+    for ids, slots, times in chunks:
+        rows = np.searchsorted(station_ids, ids)
+        rows = np.minimum(rows, len(station_ids) - 1)
+        keep = (station_ids[rows] == ids) & (times >= starts[rows])
+        np.add.at(matrix, (rows[keep], slots[keep]), decay(until_ts - times[keep]))
+    return matrix
+
+
+def first_rental_time():
+    first = Rental.objects.aggregate(first=Min('start_time'))['first']
+    return floor_hour(first) if first else None
+
+
+def update_forecasts(until=None):
+    """
+    Fold every rental up to `until` (default: the start of this hour) into the
+    stored forecasts; returns the number of stations updated
+    """
+    until = floor_hour(until or timezone.now())
+    existing = {forecast.station_id: forecast for forecast in StationDemandForecast.objects.all()}
+    history_start = first_rental_time()
+
+    stations = list(Station.objects.order_by('pk').values_list('pk', 'created_at'))
+    if not stations:
+        return 0
+
+    # Each station's window starts at its watermark, or for a new forecast at
+    # the later of its creation and the first rental on record
+    starts = {}
+    for station_id, created_at in stations:
+        if station_id in existing:
+            starts[station_id] = existing[station_id].observed_until
+        else:
+            starts[station_id] = max(floor_hour(created_at), history_start or until)
+    starts = {station_id: start for station_id, start in starts.items() if start < until}
+    if not starts:
+        return 0
+
+    station_ids = np.array(sorted(starts), dtype=np.int64)
+    start_times = np.array([starts[station_id].timestamp() for station_id in station_ids])
+    window_start = min(starts.values())
+
+    pickups = bin_events(
+        stream_events(
+            Rental.objects.filter(start_time__gte=window_start, start_time__lt=until),
+            'pickup_station_id', 'start_time',
+        ),
+        station_ids, start_times, until,
+    )
+    returns = bin_events(
+        stream_events(
+            Rental.objects.filter(
+                end_time__gte=window_start, end_time__lt=until, return_station__isnull=False,
+            ),
+            'return_station_id', 'end_time',
+        ),
+        station_ids, start_times, until,
+    )
+
+    # Stations sharing a window start share the exposure vector
+    exposures = {}
+    to_create, to_update = [], []
+    for row, station_id in enumerate(station_ids.tolist()):
+        start = starts[station_id]
+        if start not in exposures:
+            exposures[start] = exposure_between(start, until)
+
+        forecast = existing.get(station_id)
+        if forecast is None:
+            forecast = StationDemandForecast(station_id=station_id)
+            previous = (np.zeros(HOURS_PER_WEEK),) * 3
+            to_create.append(forecast)
+        else:
+            carried = decay((until - forecast.observed_until).total_seconds())
+            previous = tuple(
+                to_array(blob) * carried
+                for blob in (forecast.pickup_weights, forecast.return_weights, forecast.exposure)
+            )
+            to_update.append(forecast)
+
+        forecast.pickup_weights = to_blob(previous[0] + pickups[row])
+        forecast.return_weights = to_blob(previous[1] + returns[row])
+        forecast.exposure = to_blob(previous[2] + exposures[start])
+        forecast.observed_until = until
+        forecast.updated_at = timezone.now()
+
+    with transaction.atomic():
+        StationDemandForecast.objects.bulk_create(to_create, batch_size=500)
+        StationDemandForecast.objects.bulk_update(
+            to_update,
+            ['pickup_weights', 'return_weights', 'exposure', 'observed_until', 'updated_at'],
+            batch_size=200,
+        )
+    return len(to_create) + len(to_update)
+
+
+def hourly_rates(weights, exposure):
+    """Expected events per hour from decayed counts and exposure"""
+    return np.divide(weights, exposure, out=np.zeros_like(weights), where=exposure > 0)
+
+
+def load_forecasts(station_ids=None):
+    """
+    (station ids, pickups, returns) with S x 168 matrices of expected events per hour
+    """
+    forecasts = StationDemandForecast.objects.order_by('station_id')
+    if station_ids is not None:
+        forecasts = forecasts.filter(station_id__in=station_ids)
+    rows = list(forecasts.values_list('station_id', 'pickup_weights', 'return_weights', 'exposure'))
+    if not rows:
+        empty = np.zeros((0, HOURS_PER_WEEK))
+        return np.zeros(0, dtype=np.int64), empty, empty
+
+    ids = np.array([row[0] for row in rows], dtype=np.int64)
+    exposure = np.vstack([to_array(row[3]) for row in rows])
+    pickups = hourly_rates(np.vstack([to_array(row[1]) for row in rows]), exposure)
+    returns = hourly_rates(np.vstack([to_array(row[2]) for row in rows]), exposure)
+    return ids, pickups, returns
+
+
+def station_profile(station):
+    """Expected pickups and returns for each hour of the week at one station"""
+    ids, pickups, returns = load_forecasts([station.pk])
+    if not len(ids):
+        return {'pickups': np.zeros(HOURS_PER_WEEK), 'returns': np.zeros(HOURS_PER_WEEK)}
+    return {'pickups': pickups[0], 'returns': returns[0]}
+
+
+def horizon_slots(start, hours):
+    """Hour-of-week slots covered by the hours following start"""
+    start = floor_hour(start)
+    return np.array([hour_slot(start + timedelta(hours=offset)) for offset in range(hours)], dtype=np.int64)
+
+
+def expected_demand(start=None, hours=None, station_ids=None):
+    """
+    {station_id: (expected pickups, expected returns)} over the coming hours
+    """
+    start = start or timezone.now()
+    hours = hours or settings.FORECAST_HORIZON_HOURS
+    ids, pickups, returns = load_forecasts(station_ids)
+    slots = horizon_slots(start, hours)
+    # A horizon longer than a week repeats slots, which fancy indexing sums correctly
+    totals_out = pickups[:, slots].sum(axis=1)
+    totals_in = returns[:, slots].sum(axis=1)
+    return {
+        station_id: (float(out), float(back))
+        for station_id, out, back in zip(ids.tolist(), totals_out, totals_in)
+    }
+
+
+def forecast_targets(inventory, start=None, hours=None, fill=None):
+    """
+    Rebalancing targets shifted by the expected net outflow over the horizon
+    A station expected to lose 5 more bikes than it gets back aims for 5 more
+    available bikes than its baseline, capped by its capacity.
+    """
+    from apps.stations.rebalancing import default_targets
+
+    baseline = default_targets(inventory, fill)
+    demand = expected_demand(start, hours, [station.id for station in inventory])
+    targets = {}
+    for station in inventory:
+        out, back = demand.get(station.id, (0.0, 0.0))
+        target = baseline[station.id] + round(out - back)
+        targets[station.id] = min(max(target, 0), station.capacity)
+    return targets
+
+
+def staffing_profile(day):
+    """Expected pickups plus returns across all stations for each hour of a local day"""
+    start = timezone.make_aware(datetime.combine(day, time.min))
+    _, pickups, returns = load_forecasts()
+    slots = horizon_slots(start, 24)
+    return (pickups[:, slots] + returns[:, slots]).sum(axis=0)
\ No newline at end of file
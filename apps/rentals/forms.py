@@ -10,7 +10,8 @@ class RentalReturnForm(forms.Form):
     return_station = forms.ModelChoiceField(
         queryset=Station.objects.filter(is_active=True),
         widget=forms.Select(attrs={'class': 'form-select'}),
-        label="Return Station"
+        label="Return Station",
+        help_text="Only stations that are open right now are listed"
     )
     
     return_notes = forms.CharField(
@@ -44,6 +45,11 @@ class RentalReturnForm(forms.Form):
         }),
         label="Damage Fee (KES)"
     )
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Bikes can only be returned to stations that are open right now
+        self.fields['return_station'].queryset = Station.objects.filter(is_active=True).open_at()
 
 
 class AdminRentalOverrideForm(forms.ModelForm):
@@ -0,0 +1,100 @@
+"""
+Management command to create upcoming monthly partitions and retire old ones
+Usage: python manage.py maintain_partitions [--dry-run] [--table rentals_reservation] [--chunk-size 10000]
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.rentals.models import Rental, Reservation
+from core import partitioning
+
+
+# table: (partition column, rows still in use, [(referencing table, column)] set to NULL on retiring)
+PARTITIONED_TABLES = {
+    Reservation._meta.db_table: (
+        'created_at', "status = 'active'", [(Rental._meta.db_table, Rental._meta.get_field('reservation').column)],
+    ),
+    Rental._meta.db_table: ('start_time', "status = 'active'", []),
+}
+MODES = ('drop', 'detach', 'archive')
+
+
+class Command(BaseCommand):
+    help = 'Create the coming months of rental and reservation partitions and retire months past their retention'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=list(PARTITIONED_TABLES),
+            help='Only maintain this table; may be repeated',
+        )
+        parser.add_argument('--months-ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=partitioning.ARCHIVE_CHUNK_SIZE,
+            help='Rows moved or updated per transaction',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Show what would change without changing it')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(f'Monthly partitions need PostgreSQL, not {connection.vendor}')
+        for table in options['table'] or PARTITIONED_TABLES:
+            if not partitioning.is_partitioned(connection, table):
+                raise CommandError(f'{table} is not partitioned; run partition_tables --apply first')
+            keep_months, mode = settings.PARTITION_RETENTION.get(table, (0, 'drop'))
+            if mode not in MODES:
+                raise CommandError(f"{table}: retention mode must be one of {', '.join(MODES)}, not {mode!r}")
+            self.create(table, options)
+            if keep_months:
+                self.retire(table, keep_months, mode, options)
+
+    def create(self, table, options):
+        column = PARTITIONED_TABLES[table][0]
+        if options['dry_run']:
+            for month in partitioning.months_to_create(connection, table, column, options['months_ahead']):
+                self.stdout.write(f'{table}: would create {partitioning.partition_name(table, month)}')
+            return
+        created = partitioning.ensure_partitions(connection, table, column, options['months_ahead'])
+        for month, moved in created.items():
+            self.stdout.write(
+                f'{table}: created {partitioning.partition_name(table, month)}, {moved} rows moved from the default'
+            )
+
+    def retire(self, table, keep_months, mode, options):
+        column, open_rows, references = PARTITIONED_TABLES[table]
+        retiring = []
+        for month, name, has_open_rows in partitioning.retirable_partitions(connection, table, keep_months, open_rows):
+            if has_open_rows:
+                self.stdout.write(self.style.WARNING(f'{table}: kept {name}, which still has rows in use'))
+            else:
+                retiring.append((name, True))
+        if mode == 'archive':
+            # Left detached by an interrupted archive run or by mode 'detach'
+            detached = partitioning.detached_partitions(connection, table)
+            retiring += [(name, False) for _, name in sorted(detached.items())]
+
+        for name, attached in retiring:
+            if options['dry_run']:
+                self.stdout.write(f'{table}: would {mode} {name}')
+                continue
+            for referencing_table, referencing_column in references:
+                cleared = partitioning.null_references(
+                    connection, name, referencing_table, referencing_column, options['chunk_size'],
+                )
+                self.stdout.write(f'{table}: cleared {cleared} {referencing_table}.{referencing_column} references')
+            if mode == 'drop':
+                partitioning.drop_partition(connection, table, name)
+                self.stdout.write(self.style.SUCCESS(f'{table}: dropped {name}'))
+            elif mode == 'detach':
+                partitioning.detach_partition(connection, table, name)
+                self.stdout.write(self.style.SUCCESS(f'{table}: detached {name}'))
+            else:
+                moved = partitioning.archive_partition(
+                    connection, table, column, name, options['chunk_size'], attached=attached,
+                )
+                archive = partitioning.archive_table(table)
+                self.stdout.write(self.style.SUCCESS(f'{table}: archived {name}, {moved} rows moved to {archive}'))
\ No newline at end of file
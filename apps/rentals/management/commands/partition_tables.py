@@ -0,0 +1,75 @@
+"""
+Management command to partition the rental and reservation tables by month
+Usage: python manage.py partition_tables [--apply | --revert] [--lock-timeout 5s]
+
+Without --apply or --revert it only reports what would change. Either one
+copies every row of each table into a new one while holding a lock that
+makes writes to that table wait (see core.partitioning), so run it in a
+maintenance window with the site read-only or stopped: a table of a few
+million rows takes minutes. Each table is rebuilt in its own transaction,
+and one that cannot get its lock within --lock-timeout is left unchanged.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from apps.rentals.models import Rental
+from core import partitioning
+from .maintain_partitions import PARTITIONED_TABLES
+
+
+# Rental.reservation's unique constraint, which cannot span partitions
+UNIQUE_CONSTRAINTS = {
+    Rental._meta.db_table: [f"{Rental._meta.db_table}_{Rental._meta.get_field('reservation').column}_key"],
+}
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the rental and reservation tables as monthly partitioned tables, or back (locks them)'
+
+    def add_arguments(self, parser):
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--apply', action='store_true', help='Partition the tables')
+        mode.add_argument('--revert', action='store_true', help='Turn partitioned tables back into plain ones')
+        parser.add_argument(
+            '--table',
+            action='append',
+            choices=list(PARTITIONED_TABLES),
+            help='Only this table; may be repeated',
+        )
+        parser.add_argument('--months-ahead', type=int, default=settings.PARTITION_MONTHS_AHEAD)
+        parser.add_argument(
+            '--lock-timeout',
+            default=partitioning.LOCK_TIMEOUT,
+            help='How long to wait for each table lock before giving up, e.g. 5s',
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError(f'Monthly partitions need PostgreSQL, not {connection.vendor}')
+        for table in options['table'] or PARTITIONED_TABLES:
+            partitioned = partitioning.is_partitioned(connection, table)
+            if partitioned != options['revert']:
+                self.stdout.write(f"{table}: already {'partitioned' if partitioned else 'a plain table'}")
+                continue
+            if not (options['apply'] or options['revert']):
+                with connection.cursor() as cursor:
+                    cursor.execute(f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}')
+                    rows = cursor.fetchone()[0]
+                self.stdout.write(f'{table}: would copy {rows} rows; writes wait until it is done (use --apply)')
+                continue
+            try:
+                if options['revert']:
+                    partitioning.unpartition_table(
+                        connection, table, UNIQUE_CONSTRAINTS.get(table, ()), lock_timeout=options['lock_timeout'],
+                    )
+                else:
+                    partitioning.partition_table(
+                        connection, table, PARTITIONED_TABLES[table][0], options['months_ahead'],
+                        lock_timeout=options['lock_timeout'],
+                    )
+            except DatabaseError as error:
+                raise CommandError(f'{table} left unchanged: {error}') from error
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: {'reverted to a plain table' if options['revert'] else 'partitioned by month'}"
+            ))
\ No newline at end of file
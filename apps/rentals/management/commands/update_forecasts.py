@@ -0,0 +1,39 @@
+"""
+Management command to fold new rentals into the per-station demand forecasts
+Usage: python manage.py update_forecasts [--rebuild] [--staffing 2025-01-31]
+"""
+
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.rentals.forecasting import staffing_profile, update_forecasts
+from apps.rentals.models import StationDemandForecast
+
+
+class Command(BaseCommand):
+    help = 'Update hour-of-week demand forecasts from rentals since the last run'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Discard stored forecasts and recompute from the full rental history',
+        )
+        parser.add_argument('--staffing', help='Print expected rentals per hour for this day (YYYY-MM-DD)')
+
+    def handle(self, *args, **options):
+        try:
+            day = date.fromisoformat(options['staffing']) if options['staffing'] else None
+        except ValueError:
+            raise CommandError('--staffing must be in YYYY-MM-DD format')
+
+        if options['rebuild']:
+            StationDemandForecast.objects.all().delete()
+
+        updated = update_forecasts()
+        self.stdout.write(self.style.SUCCESS(f'{updated} station forecasts updated'))
+
+        if day:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'Expected pickups and returns on {day:%A %Y-%m-%d}'))
+            for hour, expected in enumerate(staffing_profile(day)):
+                self.stdout.write(f'  {hour:02d}:00  {expected:6.1f}')
\ No newline at end of file
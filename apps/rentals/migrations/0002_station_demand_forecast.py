@@ -0,0 +1,45 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:06
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bicycles', '0003_bicycle_status_events'),
+        ('rentals', '0001_initial'),
+        ('stations', '0002_station_coordinates_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StationDemandForecast',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pickup_weights', models.BinaryField()),
+                ('return_weights', models.BinaryField()),
+                ('exposure', models.BinaryField()),
+                ('observed_until', models.DateTimeField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['station__name'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['start_time'], name='rentals_ren_start_t_7813ea_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rental',
+            index=models.Index(fields=['end_time'], name='rentals_ren_end_tim_2cf175_idx'),
+        ),
+        migrations.AddField(
+            model_name='stationdemandforecast',
+            name='station',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='demand_forecast', to='stations.station'),
+        ),
+    ]
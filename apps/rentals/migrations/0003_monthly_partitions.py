@@ -0,0 +1,25 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:06
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# Drops the database constraint of Rental.reservation, which cannot point at a
+# partitioned table. The partitioning itself rewrites both tables under a
+# lock, so it is not run on deploy; see the partition_tables command.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0002_payment_rental_without_constraint'),
+        ('rentals', '0002_station_demand_forecast'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='rental',
+            name='reservation',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='rental', to='rentals.reservation'),
+        ),
+    ]
@@ -1,10 +1,13 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from datetime import timedelta
+from decimal import Decimal
 from apps.accounts.models import User
 from apps.bicycles.models import Bicycle
+from apps.events import outbox
 from apps.stations.models import Station
+from core.metrics import RENTAL_EVENTS, RESERVATION_EVENTS
 
 
 class ReservationManager(models.Manager):
@@ -74,7 +77,13 @@ class Reservation(models.Model):
         """Auto-set expiry time if not set"""
         if not self.expires_at:
             self.expires_at = timezone.now() + timedelta(minutes=30)
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                outbox.RESERVATION_CREATED.record(**outbox.reservation_payload(self))
+        if adding:
+            RESERVATION_EVENTS.labels(event='created').inc()
     
     @property
     def is_active(self):
@@ -97,25 +106,34 @@ class Reservation(models.Model):
     def expire(self):
         """Mark reservation as expired"""
         self.status = 'expired'
-        self.save()
-        
-        # Make bicycle available again
-        self.bicycle.mark_as_available()
+        with transaction.atomic():
+            self.save()
+            outbox.RESERVATION_EXPIRED.record(**outbox.reservation_payload(self))
+            
+            # Make bicycle available again
+            self.bicycle.mark_as_available()
+        RESERVATION_EVENTS.labels(event='expired').inc()
     
     def cancel(self):
         """Cancel the reservation"""
         self.status = 'cancelled'
         self.cancelled_at = timezone.now()
-        self.save()
-        
-        # Make bicycle available again
-        self.bicycle.mark_as_available()
+        with transaction.atomic():
+            self.save()
+            outbox.RESERVATION_CANCELLED.record(**outbox.reservation_payload(self))
+            
+            # Make bicycle available again
+            self.bicycle.mark_as_available()
+        RESERVATION_EVENTS.labels(event='cancelled').inc()
     
     def convert_to_rental(self):
         """Convert reservation to rental"""
         self.status = 'picked-up'
         self.picked_up_at = timezone.now()
-        self.save()
+        with transaction.atomic():
+            self.save()
+            outbox.RESERVATION_CONVERTED.record(**outbox.reservation_payload(self))
+        RESERVATION_EVENTS.labels(event='converted').inc()
 
 
 class RentalManager(models.Manager):
@@ -153,12 +171,15 @@ class Rental(models.Model):
     # Relationships
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='rentals')
     bicycle = models.ForeignKey(Bicycle, on_delete=models.CASCADE, related_name='rentals')
+    # Reservations are partitioned by created_at, so their id alone cannot be
+    # referenced by a database constraint (see migration 0003)
     reservation = models.OneToOneField(
         Reservation,
         on_delete=models.SET_NULL,
         blank=True,
         null=True,
-        related_name='rental'
+        related_name='rental',
+        db_constraint=False,
     )
     
     # Stations
@@ -230,16 +251,37 @@ class Rental(models.Model):
             models.Index(fields=['user', 'status']),
             models.Index(fields=['bicycle', 'status']),
             models.Index(fields=['status', 'start_time']),
+            models.Index(fields=['start_time']),
+            models.Index(fields=['end_time']),
         ]
     
     def __str__(self):
         return f"Rental #{self.id} - {self.user.username} - {self.bicycle.serial_number}"
     
     def save(self, *args, **kwargs):
-        """Set hourly rate from bicycle if not set"""
+        """Set hourly rate from bicycle if not set, and record the transition"""
         if not self.hourly_rate:
             self.hourly_rate = self.bicycle.hourly_rate
-        super().save(*args, **kwargs)
+        adding = self._state.adding
+        with transaction.atomic():
+            # Edits to a rental that was already completed are recorded as adjustments
+            previous = None
+            if not adding and self.status == 'completed':
+                previous = Rental.objects.filter(pk=self.pk, status='completed').values(
+                    'end_time', *outbox.ADJUSTABLE_FIELDS
+                ).first()
+            super().save(*args, **kwargs)
+            if adding:
+                outbox.RENTAL_STARTED.record(
+                    rental_id=self.pk, user_id=self.user_id, bicycle_id=self.bicycle_id,
+                    station_id=self.pickup_station_id,
+                )
+            elif previous:
+                adjustment = outbox.rental_adjusted_payload(self, previous)
+                if adjustment:
+                    outbox.RENTAL_ADJUSTED.record(**adjustment)
+        if adding:
+            RENTAL_EVENTS.labels(event='started').inc()
     
     @property
     def duration(self):
@@ -263,7 +305,8 @@ class Rental(models.Model):
     
     def calculate_cost(self):
         """Calculate total rental cost"""
-        hours = self.duration_hours
+        # DecimalFields load as Decimal, which does not mix with float
+        hours = Decimal(str(self.duration_hours))
         
         # Base cost
         base_cost = self.hourly_rate * hours
@@ -271,7 +314,7 @@ class Rental(models.Model):
         # Late fee (after 24 hours, 50% extra per hour)
         if hours > 24:
             overtime_hours = hours - 24
-            self.late_fee = self.hourly_rate * overtime_hours * 0.5
+            self.late_fee = self.hourly_rate * overtime_hours * Decimal('0.5')
         
         # Total cost
         self.total_cost = base_cost + self.late_fee + self.damage_fee
@@ -280,22 +323,25 @@ class Rental(models.Model):
     
     def complete_rental(self, return_station, return_notes="", distance_km=0):
         """Complete the rental"""
+        distance_km = distance_km or 0
         self.end_time = timezone.now()
         self.return_station = return_station
         self.return_notes = return_notes
         self.distance_km = distance_km
         self.status = 'completed'
         
-        # Calculate final cost
-        self.calculate_cost()
-        self.save()
-        
-        # Update bicycle
-        self.bicycle.mark_as_available()
-        self.bicycle.current_station = return_station
-        self.bicycle.increment_rental_count()
-        self.bicycle.total_distance_km += distance_km
-        self.bicycle.save()
+        with transaction.atomic():
+            # Calculate final cost
+            self.calculate_cost()
+            self.save()
+            outbox.RENTAL_COMPLETED.record(**outbox.rental_completed_payload(self))
+            
+            # Update bicycle; the status change is logged at the return station
+            self.bicycle.current_station = return_station
+            self.bicycle.total_rentals += 1
+            self.bicycle.total_distance_km += distance_km
+            self.bicycle.mark_as_available()
+        RENTAL_EVENTS.labels(event='completed').inc()
         
         # Check for late penalty
         if self.is_overdue:
@@ -305,7 +351,37 @@ class Rental(models.Model):
         """Cancel the rental"""
         self.status = 'cancelled'
         self.end_time = timezone.now()
-        self.save()
-        
-        # Make bicycle available
-        self.bicycle.mark_as_available()
\ No newline at end of file
+        with transaction.atomic():
+            self.save()
+            outbox.RENTAL_CANCELLED.record(
+                rental_id=self.pk, user_id=self.user_id, bicycle_id=self.bicycle_id,
+                station_id=self.pickup_station_id,
+            )
+            
+            # Make bicycle available
+            self.bicycle.mark_as_available()
+        RENTAL_EVENTS.labels(event='cancelled').inc()
+
+
+class StationDemandForecast(models.Model):
+    """
+    Hour-of-week demand baseline for one station
+    The arrays are 168 float64 values (Monday 00:00 first) holding
+    exponentially decayed rental counts and the matching decayed number of
+    observed hours; see apps.rentals.forecasting.
+    """
+    station = models.OneToOneField(Station, on_delete=models.CASCADE, related_name='demand_forecast')
+    
+    pickup_weights = models.BinaryField()
+    return_weights = models.BinaryField()
+    exposure = models.BinaryField()
+    
+    # Rentals before this moment are already folded into the arrays
+    observed_until = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['station__name']
+    
+    def __str__(self):
+        return f"Demand forecast - {self.station.code}"
\ No newline at end of file
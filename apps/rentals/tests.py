@@ -1,3 +1,131 @@
-from django.test import TestCase
+from datetime import datetime, timezone as dt_timezone
+from io import StringIO
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.bicycles.models import Bicycle
+from apps.stations.models import Station
+from core import partitioning, testing
+from .models import Rental, Reservation
+
+
+class RentalViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('rental history', 'rentals:history', 7, 'rider'),
+        testing.ViewBudget('active rental', 'rentals:active', 5, 'rider'),
+        testing.ViewBudget('rental return', 'rentals:return', 7, 'rider'),
+        testing.ViewBudget('rental detail', lambda data: reverse('rentals:detail', args=[data.rental.pk]), 7, 'rider'),
+        testing.ViewBudget(
+            'reservation detail', lambda data: reverse('rentals:reservation-detail', args=[data.reservation.pk]),
+            7, 'rider',
+        ),
+        testing.ViewBudget('active reservation', 'rentals:reservation-active', 7, 'rider'),
+        testing.ViewBudget(
+            'reservation status', lambda data: reverse('rentals:reservation-status', args=[data.reservation.pk]),
+            3, 'rider',
+        ),
+        testing.ViewBudget('rental admin', 'admin:rentals_rental_changelist', 7, 'admin'),
+        testing.ViewBudget('reservation admin', 'admin:rentals_reservation_changelist', 6, 'admin'),
+    ]
+
+
+MONTHS = range(6)
+
+
+@skipUnless(connection.vendor == 'postgresql', 'Monthly partitions need PostgreSQL')
+class PartitionTablesTests(TestCase):
+    """partition_tables and maintain_partitions against a rental and reservation in each of the last MONTHS months"""
+
+    def setUp(self):
+        station = Station.objects.create(name='Partition Home', code='PART', address='Home Road')
+        rider = get_user_model().objects.create_user(
+            username='partition-rider', password='password123', email='partition@example.com',
+            university_id='PART/1',
+        )
+        bicycle = Bicycle.objects.create(
+            name='Partition', model='City', serial_number='PART-1', current_station=station,
+        )
+        this_month = partitioning.month_start(timezone.now())
+        self.months = [partitioning.add_months(this_month, -age) for age in MONTHS]
+        for month in self.months:
+            moment = datetime(month.year, month.month, 2, 12, tzinfo=dt_timezone.utc)
+            reservation = Reservation.objects.create(user=rider, bicycle=bicycle, station=station, status='picked-up')
+            Reservation.objects.filter(pk=reservation.pk).update(created_at=moment)
+            rental = Rental.objects.create(
+                user=rider, bicycle=bicycle, pickup_station=station, reservation=reservation, hourly_rate=50,
+            )
+            Rental.objects.filter(pk=rental.pk).update(start_time=moment)
+        # Deferred foreign key checks pending in the test's transaction would block the table rebuilds
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+    def rows(self):
+        return (
+            list(Rental.objects.order_by('pk').values_list('pk', 'start_time', 'reservation_id')),
+            list(Reservation.objects.order_by('pk').values_list('pk', 'created_at', 'status')),
+        )
+
+    def partition(self):
+        call_command('partition_tables', apply=True, stdout=StringIO())
+
+    def maintain(self, mode, keep_months=2):
+        retention = {Reservation._meta.db_table: (keep_months, mode), Rental._meta.db_table: (0, 'drop')}
+        with override_settings(PARTITION_RETENTION=retention):
+            call_command('maintain_partitions', chunk_size=1, stdout=StringIO())
+
+    def reservation_months(self):
+        created = Reservation.objects.values_list('created_at', flat=True)
+        return {partitioning.month_start(created_at) for created_at in created}
+
+    def test_apply_and_revert_keep_rows_and_ids(self):
+        before = self.rows()
+        self.partition()
+        for table in (Rental._meta.db_table, Reservation._meta.db_table):
+            self.assertTrue(partitioning.is_partitioned(connection, table))
+            self.assertLessEqual(set(self.months), set(partitioning.attached_partitions(connection, table)))
+        self.assertEqual(self.rows(), before)
+        rental = Rental.objects.first()
+        copy = Rental.objects.create(user=rental.user, bicycle=rental.bicycle, pickup_station=rental.pickup_station)
+        self.assertGreater(copy.pk, max(pk for pk, _, _ in before[0]))
+        copy.delete()
+
+        call_command('partition_tables', revert=True, stdout=StringIO())
+        for table in (Rental._meta.db_table, Reservation._meta.db_table):
+            self.assertFalse(partitioning.is_partitioned(connection, table))
+        self.assertEqual(self.rows(), before)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Rental.objects.create(
+                user=rental.user, bicycle=rental.bicycle, pickup_station=rental.pickup_station,
+                reservation_id=rental.reservation_id,
+            )
+
+    def test_drop_keeps_months_with_rows_in_use(self):
+        Reservation.objects.filter(created_at__month=self.months[4].month).update(status='active')
+        self.partition()
+        self.maintain('drop')
+        self.assertEqual(self.reservation_months(), {*self.months[:3], self.months[4]})
+        unlinked = Rental.objects.filter(reservation__isnull=True).values_list('start_time', flat=True)
+        self.assertEqual({partitioning.month_start(start) for start in unlinked}, {self.months[3], self.months[5]})
+
+    def test_detach_then_archive_resumes_detached_months(self):
+        self.partition()
+        self.maintain('detach')
+        self.assertEqual(self.reservation_months(), set(self.months[:3]))
+        detached = partitioning.detached_partitions(connection, Reservation._meta.db_table)
+        self.assertEqual(set(detached), set(self.months[3:]))
+
+        self.maintain('archive', keep_months=1)
+        self.assertEqual(self.reservation_months(), set(self.months[:2]))
+        self.assertEqual(partitioning.detached_partitions(connection, Reservation._meta.db_table), {})
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT created_at FROM {partitioning.archive_table(Reservation._meta.db_table)} ORDER BY created_at'
+            )
+            archived = [partitioning.month_start(created_at) for created_at, in cursor.fetchall()]
+        self.assertEqual(archived, sorted(self.months[2:]))
\ No newline at end of file
@@ -1,7 +1,8 @@
+from asgiref.sync import sync_to_async
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, View
 from django.views.generic.edit import FormView
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import aget_object_or_404, get_object_or_404, redirect
 from django.urls import reverse_lazy, reverse
 from django.contrib import messages
 from django.utils import timezone
@@ -10,6 +11,7 @@ from .models import Reservation, Rental
 from .forms import RentalReturnForm, RentalFilterForm
 from apps.bicycles.models import Bicycle
 from core.email import send_reservation_email, send_rental_start_email, send_rental_end_email
+from core.mixins import AsyncLoginRequiredMixin, HtmxPartialMixin
 
 
 class ReserveBicycleView(LoginRequiredMixin, View):
@@ -34,6 +36,14 @@ class ReserveBicycleView(LoginRequiredMixin, View):
             messages.error(request, 'This bicycle is not available.')
             return redirect('bicycles:detail', slug=slug)
         
+        # Check if the pickup station is open
+        station = bicycle.current_station
+        if not station.is_open_at():
+            next_opening = station.next_opening()
+            opens = f" It opens {timezone.localtime(next_opening):%a %H:%M}." if next_opening else ""
+            messages.error(request, f'{station.name} is closed right now.{opens}')
+            return redirect('bicycles:detail', slug=slug)
+        
         # Create reservation
         reservation = Reservation.objects.create(
             user=request.user,
@@ -89,6 +99,7 @@ class ActiveReservationView(LoginRequiredMixin, DetailView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['title'] = 'Active Reservation'
+        context['can_pick_up'] = bool(self.object and self.object.is_active)
         return context
 
 
@@ -224,12 +235,15 @@ class RentalReturnView(LoginRequiredMixin, FormView):
         return super().form_valid(form)
 
 
-class RentalHistoryView(LoginRequiredMixin, ListView):
+class RentalHistoryView(LoginRequiredMixin, HtmxPartialMixin, ListView):
     """
     View rental history
+    Filter changes and page flips made through htmx get only the list.
     """
     model = Rental
     template_name = 'rentals/rental_history.html'
+    partial_template_name = 'rentals/_rental_list.html'
+    htmx_target = 'rental-list'
     context_object_name = 'rentals'
     paginate_by = 10
     
@@ -256,9 +270,15 @@ class RentalHistoryView(LoginRequiredMixin, ListView):
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['title'] = 'Rental History'
-        context['filter_form'] = RentalFilterForm(self.request.GET)
-        context['total_rentals'] = self.request.user.get_total_rentals()
+        if not self.is_partial:
+            context['title'] = 'Rental History'
+            context['filter_form'] = RentalFilterForm(self.request.GET)
+            context['total_rentals'] = self.request.user.get_total_rentals()
+        
+        # Pagination links keep the active filters
+        params = self.request.GET.copy()
+        params.pop('page', None)
+        context['filter_query'] = params.urlencode()
         return context
 
 
@@ -279,20 +299,21 @@ class RentalDetailView(LoginRequiredMixin, DetailView):
         return context
 
 
-class CheckReservationStatusView(LoginRequiredMixin, View):
+class CheckReservationStatusView(AsyncLoginRequiredMixin, View):
     """
     AJAX endpoint to check reservation status
+    Async, so clients polling it do not hold a worker under ASGI.
     """
-    def get(self, request, pk):
-        reservation = get_object_or_404(
+    async def get(self, request, pk):
+        reservation = await aget_object_or_404(
             Reservation,
             pk=pk,
-            user=request.user
+            user=await request.auser()
         )
         
         # Check and expire if needed
         if reservation.is_expired and reservation.status == 'active':
-            reservation.expire()
+            await sync_to_async(reservation.expire)()
         
         return JsonResponse({
             'status': reservation.status,
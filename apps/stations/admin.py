@@ -28,6 +28,9 @@ class StationAdmin(admin.ModelAdmin):
         }),
     )
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_bike_counts()
+    
     def available_bikes_count(self, obj):
         return obj.available_bikes_count
     available_bikes_count.short_description = 'Available Bikes'
\ No newline at end of file
@@ -0,0 +1,144 @@
+"""
+Precomputed station map feed
+
+The feed lists every active station with coordinates, its capacity and live
+bicycle counts, as GeoJSON or as a compact array format. Each format is built
+in one query, serialized, gzipped and hashed once, then kept in the shared
+cache together with the feed version it was built for. A request reads the
+version and the entry in a single get_many() round trip, so polling map
+clients usually cost one cache read and, with If-None-Match, a 304.
+
+Any station save/delete or bicycle status/location change bumps the version
+(see signals.py and BicycleQuerySet.set_status); the next request rebuilds.
+"""
+import gzip
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from .geo import new_version
+from .models import Station
+
+
+FEED_VERSION_KEY = 'stations:feed-version'
+FEED_FORMATS = {
+    'geojson': 'application/geo+json',
+    'compact': 'application/json',
+}
+# Column order of each row in the compact format
+COMPACT_FIELDS = ['id', 'code', 'name', 'latitude', 'longitude', 'capacity', 'available', 'total']
+# A rebuild holds this lock so a burst of clients after a change builds the feed once
+REBUILD_LOCK_SECONDS = 30
+
+
+def entry_key(fmt):
+    return f'stations:feed:{fmt}'
+
+
+def invalidate_station_feed():
+    """Mark the feed stale once the current transaction commits"""
+    transaction.on_commit(lambda: cache.set(FEED_VERSION_KEY, new_version(), None))
+
+
+def feed_rows():
+    """Active stations with coordinates and live counts, in one query"""
+    return Station.objects.filter(
+        is_active=True, latitude__isnull=False, longitude__isnull=False,
+    ).with_bike_counts().order_by('pk').values_list(
+        'id', 'code', 'name', 'address', 'latitude', 'longitude',
+        'capacity', 'operating_hours', 'available_count', 'total_count',
+    )
+
+
+def build_geojson(rows):
+    features = []
+    for pk, code, name, address, lat, lng, capacity, hours, available, total in rows:
+        features.append({
+            'type': 'Feature',
+            'id': pk,
+            # GeoJSON positions are [longitude, latitude]
+            'geometry': {'type': 'Point', 'coordinates': [float(lng), float(lat)]},
+            'properties': {
+                'code': code,
+                'name': name,
+                'address': address,
+                'capacity': capacity,
+                'available': available,
+                'total': total,
+                'free_docks': max(capacity - total, 0),
+                'operating_hours': hours,
+                'url': reverse('stations:detail', args=[pk]),
+            },
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def build_compact(rows):
+    return {
+        'fields': COMPACT_FIELDS,
+        'stations': [
+            [pk, code, name, float(lat), float(lng), capacity, available, total]
+            for pk, code, name, _, lat, lng, capacity, _, available, total in rows
+        ],
+    }
+
+
+BUILDERS = {
+    'geojson': build_geojson,
+    'compact': build_compact,
+}
+
+
+def build_entry(fmt, version):
+    """Serialize, compress and fingerprint one feed format"""
+    data = BUILDERS[fmt](list(feed_rows()))
+    body = json.dumps(data, separators=(',', ':')).encode()
+    return {
+        'version': version,
+        # Content hash, so a rebuild that changed nothing still answers 304;
+        # weak because the gzip and identity bodies share it
+        'etag': f'W/"{hashlib.sha1(body).hexdigest()[:20]}"',
+        'body': body,
+        'gzip': gzip.compress(body, compresslevel=6, mtime=0),
+    }
+
+
+def get_feed(fmt):
+    """
+    The cached entry for a feed format, rebuilt if the feed changed
+    While another process is rebuilding, the previous entry is served.
+    """
+    key = entry_key(fmt)
+    cached = cache.get_many([FEED_VERSION_KEY, key])
+    version = cached.get(FEED_VERSION_KEY)
+    entry = cached.get(key)
+    if version is None:
+        version = new_version()
+        cache.add(FEED_VERSION_KEY, version, None)
+        version = cache.get(FEED_VERSION_KEY, version)
+    if entry is not None and entry['version'] == version:
+        return entry
+
+    lock_key = f'{key}:lock'
+    if entry is not None and not cache.add(lock_key, 1, REBUILD_LOCK_SECONDS):
+        return entry
+    try:
+        entry = build_entry(fmt, version)
+        cache.set(key, entry, None)
+    finally:
+        cache.delete(lock_key)
+    return entry
+
+
+async def aget_feed(fmt):
+    """Async get_feed(); only a rebuild leaves the event loop for a thread"""
+    key = entry_key(fmt)
+    cached = await cache.aget_many([FEED_VERSION_KEY, key])
+    entry = cached.get(key)
+    if entry is not None and entry['version'] == cached.get(FEED_VERSION_KEY):
+        return entry
+    return await sync_to_async(get_feed)(fmt)
\ No newline at end of file
@@ -0,0 +1,237 @@
+"""
+Nearest-station lookups over station coordinates
+
+Two paths share the same haversine distance:
+
+* nearest_stations() asks the database: a bounding box on the indexed
+  latitude/longitude columns cuts the candidates down, then a haversine
+  expression ranks them and the live available count is joined in.
+* StationGrid keeps active station coordinates in memory, bucketed into
+  fixed-size lat/lng cells, and searches outward ring by ring. Only the
+  available counts for the few closest stations then come from the database.
+
+The grid is rebuilt lazily whenever a station is saved or deleted (see
+signals.py), using a version number kept in the shared cache so every worker
+notices the change.
+"""
+import math
+import threading
+import time
+from collections import defaultdict
+
+from django.core.cache import cache
+from django.db.models import Count, F, FloatField, Q
+from django.db.models.functions import ASin, Cast, Cos, Power, Radians, Sin, Sqrt
+
+from .models import Station
+
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE = 111.32
+
+DEFAULT_RADIUS_KM = 5
+DEFAULT_LIMIT = 5
+
+# Roughly 1.1 km cells; a campus fits in a handful of them
+GRID_CELL_DEGREES = 0.01
+GRID_VERSION_KEY = 'stations:grid-version'
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2 +
+        math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """
+    (min_lat, max_lat, min_lng, max_lng) enclosing a circle around a point
+    Longitude bounds are None when the box would wrap a pole or the antimeridian.
+    """
+    lat_delta = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, lat - lat_delta), min(90.0, lat + lat_delta)
+
+    cos_lat = math.cos(math.radians(lat))
+    if cos_lat < 1e-6:
+        return min_lat, max_lat, None, None
+    lng_delta = radius_km / (KM_PER_DEGREE * cos_lat)
+    if lng - lng_delta < -180 or lng + lng_delta > 180:
+        return min_lat, max_lat, None, None
+    return min_lat, max_lat, lng - lng_delta, lng + lng_delta
+
+
+def bounding_box_q(lat, lng, radius_km):
+    """Filter on the indexed coordinate columns for a bounding box"""
+    min_lat, max_lat, min_lng, max_lng = bounding_box(lat, lng, radius_km)
+    q = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lng is not None:
+        q &= Q(longitude__gte=min_lng, longitude__lte=max_lng)
+    return q
+
+
+def distance_expression(lat, lng):
+    """Haversine distance in kilometres from a point, evaluated in SQL"""
+    station_lat = Radians(Cast(F('latitude'), FloatField()))
+    station_lng = Radians(Cast(F('longitude'), FloatField()))
+    origin_lat = math.radians(lat)
+    origin_lng = math.radians(lng)
+
+    a = (
+        Power(Sin((station_lat - origin_lat) / 2), 2) +
+        math.cos(origin_lat) * Cos(station_lat) * Power(Sin((station_lng - origin_lng) / 2), 2)
+    )
+    return 2 * EARTH_RADIUS_KM * ASin(Sqrt(a))
+
+
+def with_available_count(queryset):
+    """Annotate the live number of available bicycles at each station"""
+    return queryset.annotate(
+        available_count=Count('bicycles', filter=Q(bicycles__status='available'))
+    )
+
+
+def nearest_stations(lat, lng, radius_km=DEFAULT_RADIUS_KM, limit=DEFAULT_LIMIT, min_available=1):
+    """
+    Active stations within radius_km of a point, closest first
+    Each station is annotated with distance_km and available_count.
+    """
+    queryset = Station.objects.filter(is_active=True).filter(bounding_box_q(lat, lng, radius_km))
+    queryset = with_available_count(queryset).annotate(
+        distance_km=distance_expression(lat, lng)
+    ).filter(distance_km__lte=radius_km)
+    if min_available:
+        queryset = queryset.filter(available_count__gte=min_available)
+    return queryset.order_by('distance_km')[:limit]
+
+
+class StationGrid:
+    """In-memory grid index over active station coordinates"""
+
+    def __init__(self, points, cell_degrees=GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.cells = defaultdict(list)
+        self.size = 0
+        for station_id, lat, lng in points:
+            self.cells[self.cell(lat, lng)].append((station_id, lat, lng))
+            self.size += 1
+
+    @classmethod
+    def build(cls, cell_degrees=GRID_CELL_DEGREES):
+        """Build a grid from the database in one query"""
+        points = Station.objects.filter(
+            is_active=True, latitude__isnull=False, longitude__isnull=False,
+        ).values_list('id', 'latitude', 'longitude')
+        return cls(
+            ((station_id, float(lat), float(lng)) for station_id, lat, lng in points),
+            cell_degrees,
+        )
+
+    def cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def ring(self, center, radius):
+        """Cells on the square ring at a given cell distance from the center"""
+        row, col = center
+        if radius == 0:
+            yield center
+            return
+        for offset in range(-radius, radius + 1):
+            yield row - radius, col + offset
+            yield row + radius, col + offset
+        for offset in range(-radius + 1, radius):
+            yield row + offset, col - radius
+            yield row + offset, col + radius
+
+    def nearest(self, lat, lng, radius_km=DEFAULT_RADIUS_KM, limit=None):
+        """
+        [(distance_km, station_id)] within radius_km, closest first
+        Rings are searched outward until the ring's minimum possible distance
+        exceeds the radius or the limit-th match is already closer than it.
+        """
+        center = self.cell(lat, lng)
+        # Smallest cell edge in km anywhere within the search radius, used to bound each ring
+        widest_lat = min(89.9, abs(lat) + radius_km / KM_PER_DEGREE)
+        cell_km = self.cell_degrees * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+
+        found = []
+        radius = 0
+        while True:
+            for key in self.ring(center, radius):
+                for station_id, station_lat, station_lng in self.cells.get(key, ()):
+                    distance = haversine_km(lat, lng, station_lat, station_lng)
+                    if distance <= radius_km:
+                        found.append((distance, station_id))
+
+            # Anything in ring r+1 is at least r cell edges away
+            reach = radius * cell_km
+            if reach > radius_km:
+                break
+            if limit and len(found) >= limit:
+                found.sort()
+                if found[limit - 1][0] <= reach:
+                    break
+            radius += 1
+        found.sort()
+        return found[:limit] if limit else found
+
+
+_grid_lock = threading.Lock()
+_grid = None
+_grid_version = None
+
+
+def new_version():
+    # Time-based so a version lost from the cache never repeats an old one
+    return time.time_ns()
+
+
+def grid_version():
+    return cache.get_or_set(GRID_VERSION_KEY, new_version, None)
+
+
+def invalidate_station_grid():
+    """Tell every process to rebuild its grid on next use"""
+    cache.set(GRID_VERSION_KEY, new_version(), None)
+
+
+def get_station_grid():
+    """The process-wide grid, rebuilt when the station version has moved"""
+    global _grid, _grid_version
+    version = grid_version()
+    if _grid is None or _grid_version != version:
+        with _grid_lock:
+            if _grid is None or _grid_version != version:
+                _grid = StationGrid.build()
+                _grid_version = version
+    return _grid
+
+
+def nearest_available(lat, lng, radius_km=DEFAULT_RADIUS_KM, limit=DEFAULT_LIMIT, min_available=1):
+    """
+    Nearest active stations with bikes available, using the in-memory grid
+    Returns a list of stations annotated with distance_km and available_count.
+    Counts are fetched for a growing window of the closest candidates so one
+    query usually suffices even when nearby stations are empty.
+    """
+    candidates = get_station_grid().nearest(lat, lng, radius_km=radius_km)
+    distances = {station_id: distance for distance, station_id in candidates}
+
+    results = []
+    window = limit * 4
+    start = 0
+    while start < len(candidates) and len(results) < limit:
+        ids = [station_id for _, station_id in candidates[start:start + window]]
+        stations = with_available_count(Station.objects.filter(pk__in=ids, is_active=True))
+        if min_available:
+            stations = stations.filter(available_count__gte=min_available)
+        for station in stations:
+            station.distance_km = distances[station.pk]
+            results.append(station)
+        start += window
+        window *= 4
+    results.sort(key=lambda station: station.distance_km)
+    return results[:limit]
\ No newline at end of file
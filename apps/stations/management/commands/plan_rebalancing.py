@@ -0,0 +1,46 @@
+"""
+Management command to print a rebalancing move list for the operations team
+Usage: python manage.py plan_rebalancing [--fill 0.5] [--truck-capacity 12] [--forecast-hours 3]
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from apps.rentals.forecasting import forecast_targets
+from apps.stations.rebalancing import plan_rebalancing, station_inventory
+
+
+class Command(BaseCommand):
+    help = 'Plan truck trips that move available bicycles from overfull to empty stations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fill', type=float, help='Target share of each station\'s capacity (0-1)')
+        parser.add_argument('--truck-capacity', type=int, help='Bicycles per truck load')
+        parser.add_argument('--min-imbalance', type=int, help='Ignore stations this close to their target')
+        parser.add_argument(
+            '--forecast-hours',
+            type=int,
+            help='Shift targets by the demand forecast for this many hours ahead',
+        )
+
+    def handle(self, *args, **options):
+        if options['fill'] is not None and not 0 <= options['fill'] <= 1:
+            raise CommandError('--fill must be between 0 and 1')
+
+        inventory = station_inventory()
+        targets = None
+        if options['forecast_hours']:
+            targets = forecast_targets(inventory, hours=options['forecast_hours'], fill=options['fill'])
+
+        plan = plan_rebalancing(
+            inventory=inventory,
+            targets=targets,
+            fill=options['fill'],
+            min_imbalance=options['min_imbalance'],
+            truck_capacity=options['truck_capacity'],
+        )
+        for number, trip in enumerate(plan.trips, start=1):
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f'Trip {number}: load {trip.bicycles} at {trip.source.name} ({trip.source.code}), {trip.distance_km:.2f} km'
+            ))
+            for target, bicycles in trip.drops:
+                self.stdout.write(f'  drop {bicycles:>3} at {target.name} ({target.code})')
+        self.stdout.write(self.style.SUCCESS(plan.summary()))
\ No newline at end of file
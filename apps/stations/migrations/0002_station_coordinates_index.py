@@ -0,0 +1,17 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='station',
+            index=models.Index(fields=['latitude', 'longitude'], name='stations_st_latitud_ba98b4_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.0.1 on 2026-10-19 13:09
+
+import core.validators
+import django.db.models.deletion
+from django.db import migrations, models
+
+from core.operating_hours import ALWAYS_OPEN, parse_operating_hours
+
+
+def populate_opening_intervals(apps, schema_editor):
+    Station = apps.get_model('stations', 'Station')
+    StationOpeningInterval = apps.get_model('stations', 'StationOpeningInterval')
+    intervals = []
+    for station_id, operating_hours in Station.objects.values_list('id', 'operating_hours'):
+        try:
+            parsed = parse_operating_hours(operating_hours)
+        except ValueError:
+            parsed = ALWAYS_OPEN
+        intervals.extend(
+            StationOpeningInterval(station_id=station_id, weekday=weekday, opens_minute=start, closes_minute=end)
+            for weekday, start, end in parsed
+        )
+    StationOpeningInterval.objects.bulk_create(intervals, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0002_station_coordinates_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='station',
+            name='operating_hours',
+            field=models.CharField(default='24/7', help_text="e.g., '6:00 AM - 10:00 PM', '24/7' or 'Mon-Fri 6:00 AM - 10:00 PM; Sun closed'", max_length=100, validators=[core.validators.validate_operating_hours]),
+        ),
+        migrations.CreateModel(
+            name='StationOpeningInterval',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(help_text='0 = Monday')),
+                ('opens_minute', models.PositiveSmallIntegerField()),
+                ('closes_minute', models.PositiveSmallIntegerField()),
+                ('station', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opening_periods', to='stations.station')),
+            ],
+            options={
+                'ordering': ['station', 'weekday', 'opens_minute'],
+                'indexes': [models.Index(fields=['station', 'weekday', 'opens_minute', 'closes_minute'], name='stations_st_station_2fed8f_idx')],
+            },
+        ),
+        migrations.RunPython(populate_opening_intervals, migrations.RunPython.noop),
+    ]
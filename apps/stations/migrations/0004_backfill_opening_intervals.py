@@ -0,0 +1,32 @@
+from django.db import migrations
+
+from core.operating_hours import ALWAYS_OPEN, parse_operating_hours
+
+
+def backfill_opening_intervals(apps, schema_editor):
+    """Stations written by bulk_create(), update() or loaddata before those paths kept the intervals in step"""
+    Station = apps.get_model('stations', 'Station')
+    StationOpeningInterval = apps.get_model('stations', 'StationOpeningInterval')
+    intervals = []
+    stations = Station.objects.filter(opening_periods__isnull=True).values_list('id', 'operating_hours')
+    for station_id, operating_hours in stations:
+        try:
+            parsed = parse_operating_hours(operating_hours)
+        except ValueError:
+            parsed = ALWAYS_OPEN
+        intervals.extend(
+            StationOpeningInterval(station_id=station_id, weekday=weekday, opens_minute=start, closes_minute=end)
+            for weekday, start, end in parsed
+        )
+    StationOpeningInterval.objects.bulk_create(intervals, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('stations', '0003_station_opening_intervals'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_opening_intervals, migrations.RunPython.noop),
+    ]
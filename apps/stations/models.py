@@ -1,5 +1,80 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, OuterRef, Q
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+from core.operating_hours import ALWAYS_OPEN, next_change, parse_operating_hours
+from core.validators import validate_operating_hours
+
+
+class StationQuerySet(models.QuerySet):
+    """Custom queryset for Station queries"""
+    
+    def open_q(self, moment=None):
+        """Exists() expression: the station has an opening interval covering the moment"""
+        local = timezone.localtime(moment or timezone.now())
+        minute = local.hour * 60 + local.minute
+        return Exists(StationOpeningInterval.objects.filter(
+            station=OuterRef('pk'),
+            weekday=local.weekday(),
+            opens_minute__lte=minute,
+            closes_minute__gt=minute,
+        ))
+    
+    def open_at(self, moment=None):
+        """Stations open at a moment (default: now)"""
+        return self.filter(self.open_q(moment))
+    
+    def with_open_flag(self, moment=None):
+        """Annotate is_open_now for a moment (default: now)"""
+        return self.annotate(is_open_now=self.open_q(moment))
+    
+    def with_bike_counts(self):
+        """Annotate available_count and total_count in the same query"""
+        return self.annotate(
+            available_count=Count('bicycles', filter=Q(bicycles__status='available')),
+            total_count=Count('bicycles'),
+        )
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        """bulk_create() skips Station.save(), so write the opening intervals here"""
+        with transaction.atomic(using=self.db):
+            stations = super().bulk_create(objs, *args, **kwargs)
+            # Codes are unique and known even when the backend returns no primary keys
+            self.model.objects.filter(code__in=[station.code for station in stations]).sync_opening_intervals()
+        return stations
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        """Resync the opening intervals when operating_hours is among the fields"""
+        if 'operating_hours' not in fields:
+            return super().bulk_update(objs, fields, *args, **kwargs)
+        with transaction.atomic(using=self.db):
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+            self.model.objects.filter(pk__in=[station.pk for station in objs]).sync_opening_intervals()
+        return rows
+    
+    def update(self, **kwargs):
+        """Resync the opening intervals when operating_hours is updated"""
+        if 'operating_hours' not in kwargs:
+            return super().update(**kwargs)
+        with transaction.atomic(using=self.db):
+            station_ids = list(self.values_list('pk', flat=True))
+            rows = super().update(**kwargs)
+            self.model.objects.filter(pk__in=station_ids).sync_opening_intervals()
+        return rows
+    
+    def sync_opening_intervals(self):
+        """Replace the stored opening intervals of these stations with their parsed operating hours"""
+        stations = list(self.only('pk', 'operating_hours'))
+        StationOpeningInterval.objects.filter(station__in=[station.pk for station in stations]).delete()
+        StationOpeningInterval.objects.bulk_create([
+            StationOpeningInterval(station=station, weekday=weekday, opens_minute=start, closes_minute=end)
+            for station in stations
+            for weekday, start, end in station.opening_intervals
+        ], batch_size=1000)
+
+
+class StationManager(models.Manager.from_queryset(StationQuerySet)):
+    """Custom manager for Station queries"""
 
 
 class Station(models.Model):
@@ -39,31 +114,72 @@ class Station(models.Model):
     operating_hours = models.CharField(
         max_length=100,
         default="24/7",
-        help_text="e.g., '6:00 AM - 10:00 PM' or '24/7'"
+        validators=[validate_operating_hours],
+        help_text="e.g., '6:00 AM - 10:00 PM', '24/7' or 'Mon-Fri 6:00 AM - 10:00 PM; Sun closed'"
     )
     
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = StationManager()
+    
     class Meta:
         ordering = ['name']
         indexes = [
             models.Index(fields=['code']),
             models.Index(fields=['is_active']),
+            models.Index(fields=['latitude', 'longitude']),
         ]
     
     def __str__(self):
         return f"{self.name} ({self.code})"
     
+    def save(self, *args, **kwargs):
+        """Keep the opening interval table in step with operating_hours"""
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is None or 'operating_hours' in update_fields:
+                self.sync_opening_intervals()
+    
+    @property
+    def opening_intervals(self):
+        """Parsed (weekday, opens_minute, closes_minute) intervals; unparseable hours count as 24/7"""
+        try:
+            return parse_operating_hours(self.operating_hours)
+        except ValueError:
+            return ALWAYS_OPEN
+    
+    def sync_opening_intervals(self):
+        """Replace the stored opening intervals with the parsed operating hours"""
+        self.opening_periods.all().delete()
+        StationOpeningInterval.objects.bulk_create([
+            StationOpeningInterval(station=self, weekday=weekday, opens_minute=start, closes_minute=end)
+            for weekday, start, end in self.opening_intervals
+        ])
+    
+    def is_open_at(self, moment=None):
+        """Check if the station is open at a moment (default: now)"""
+        return next_change(self.opening_intervals, moment)[0]
+    
+    def next_opening(self, moment=None):
+        """When a closed station next opens, or None if it is open or never opens"""
+        is_open, change_at = next_change(self.opening_intervals, moment)
+        return None if is_open else change_at
+    
     @property
     def available_bikes_count(self):
-        """Count of available bicycles at this station"""
+        """Count of available bicycles at this station (annotated as available_count by list queries)"""
+        if hasattr(self, 'available_count'):
+            return self.available_count
         return self.bicycles.filter(status='available').count()
     
     @property
     def total_bikes_count(self):
-        """Total bicycles at this station"""
+        """Total bicycles at this station (annotated as total_count by list queries)"""
+        if hasattr(self, 'total_count'):
+            return self.total_count
         return self.bicycles.count()
     
     @property
@@ -82,4 +198,28 @@ class Station(models.Model):
         """Get Google Maps URL if coordinates available"""
         if self.latitude and self.longitude:
             return f"https://www.google.com/maps?q={self.latitude},{self.longitude}"
-        return None
\ No newline at end of file
+        return None
+
+
+class StationOpeningInterval(models.Model):
+    """
+    One opening interval of a station, parsed from Station.operating_hours
+    Minutes count from local midnight; closes_minute is exclusive.
+    """
+    station = models.ForeignKey(Station, on_delete=models.CASCADE, related_name='opening_periods')
+    weekday = models.PositiveSmallIntegerField(help_text="0 = Monday")
+    opens_minute = models.PositiveSmallIntegerField()
+    closes_minute = models.PositiveSmallIntegerField()
+    
+    class Meta:
+        ordering = ['station', 'weekday', 'opens_minute']
+        indexes = [
+            models.Index(fields=['station', 'weekday', 'opens_minute', 'closes_minute']),
+        ]
+    
+    def __str__(self):
+        return (
+            f"{self.station.code} day {self.weekday} "
+            f"{self.opens_minute // 60:02d}:{self.opens_minute % 60:02d}-"
+            f"{self.closes_minute // 60:02d}:{self.closes_minute % 60:02d}"
+        )
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+Fleet rebalancing planner
+
+Reads every active station's available and total bicycle counts in one query,
+works out how far each station is from its target level, and solves the
+resulting transportation problem (move surplus bikes to stations short of
+bikes at the least total distance) as a linear program with HiGHS. The
+transport constraint matrix is totally unimodular, so the optimal vertex is
+integral and the solution is a whole number of bikes per move.
+
+The resulting moves are packed into truck trips for the operations staff.
+"""
+from collections import namedtuple
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count, Q
+from scipy.optimize import linprog
+from scipy.sparse import coo_matrix
+
+from .geo import EARTH_RADIUS_KM
+from .models import Station
+
+
+StationLevel = namedtuple('StationLevel', 'id code name latitude longitude capacity available total')
+Move = namedtuple('Move', 'source target bicycles distance_km')
+Trip = namedtuple('Trip', 'source drops bicycles distance_km')
+
+# Partners per station in the first pass of the solver
+CANDIDATE_PAIRS = 10
+
+
+def station_inventory():
+    """Current level of every active station, read in one query"""
+    rows = Station.objects.filter(is_active=True).annotate(
+        available=Count('bicycles', filter=Q(bicycles__status='available')),
+        total=Count('bicycles'),
+    ).values_list('id', 'code', 'name', 'latitude', 'longitude', 'capacity', 'available', 'total')
+    return [StationLevel(*row) for row in rows]
+
+
+def default_targets(inventory, fill=None):
+    """Target available bikes per station as a share of its capacity"""
+    fill = settings.REBALANCE_TARGET_FILL if fill is None else fill
+    return {station.id: round(station.capacity * fill) for station in inventory}
+
+
+def imbalances(inventory, targets, min_imbalance=None):
+    """
+    Split stations into surplus and deficit lists of (station, bikes)
+    Only available bikes can be moved, and a station can only take as many
+    bikes as it has free docks. Imbalances below min_imbalance are ignored.
+    """
+    min_imbalance = settings.REBALANCE_MIN_IMBALANCE if min_imbalance is None else min_imbalance
+    surplus, deficit = [], []
+    for station in inventory:
+        if station.latitude is None or station.longitude is None:
+            continue
+        target = targets.get(station.id)
+        if target is None:
+            continue
+        difference = station.available - target
+        if difference >= min_imbalance:
+            surplus.append((station, difference))
+        elif -difference >= min_imbalance:
+            room = max(station.capacity - station.total, 0)
+            if min(-difference, room) > 0:
+                deficit.append((station, min(-difference, room)))
+    return surplus, deficit
+
+
+def distance_matrix(sources, targets):
+    """Haversine distances in km between two lists of stations"""
+    lat1 = np.radians(np.array([float(station.latitude) for station in sources]))[:, None]
+    lng1 = np.radians(np.array([float(station.longitude) for station in sources]))[:, None]
+    lat2 = np.radians(np.array([float(station.latitude) for station in targets]))[None, :]
+    lng2 = np.radians(np.array([float(station.longitude) for station in targets]))[None, :]
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def nearest_pairs(distances, k):
+    """Mask of the k cheapest pairs for every row of a cost matrix"""
+    rows, cols = distances.shape
+    mask = np.zeros(distances.shape, dtype=bool)
+    k = min(k, cols)
+    nearest = np.argpartition(distances, k - 1, axis=1)[:, :k]
+    mask[np.arange(rows)[:, None], nearest] = True
+    return mask
+
+
+def solve_transport(supply, demand, costs, candidates=CANDIDATE_PAIRS):
+    """
+    Minimum-cost shipment matrix moving min(total supply, total demand) units
+    supply and demand are integer vectors, costs a len(supply) x len(demand) matrix.
+
+    Solved by column generation: the LP starts with each station's nearest
+    partners only, and the duals of each solve price the remaining pairs;
+    pairs that would lower the cost are added until none are left, which
+    proves the restricted solution optimal for the full problem. Every unit
+    shipped earns a reward larger than any distance, so the restricted LP is
+    always feasible and the optimum ships as much as possible.
+    """
+    rows, cols = costs.shape
+    if min(supply.sum(), demand.sum()) == 0:
+        return np.zeros((rows, cols), dtype=int)
+
+    priced = costs - (costs.max() + 1)
+    limits = np.concatenate([supply, demand])
+    active = nearest_pairs(costs, candidates) | nearest_pairs(costs.T, candidates).T
+    while True:
+        # One column per active pair, appearing in its supply row and its demand row
+        source, target = np.nonzero(active)
+        columns = np.arange(source.size)
+        constraints = coo_matrix(
+            (np.ones(2 * columns.size), (np.concatenate([source, rows + target]), np.tile(columns, 2))),
+            shape=(rows + cols, columns.size),
+        ).tocsr()
+        result = linprog(priced[source, target], A_ub=constraints, b_ub=limits, bounds=(0, None), method='highs')
+        if not result.success:
+            raise RuntimeError(f'Rebalancing solver failed: {result.message}')
+
+        supply_duals = result.ineqlin.marginals[:rows]
+        demand_duals = result.ineqlin.marginals[rows:]
+        reduced = priced - supply_duals[:, None] - demand_duals[None, :]
+        reduced[active] = 0
+        improving = reduced < -1e-7
+        if not improving.any():
+            break
+        active |= improving & nearest_pairs(reduced, candidates)
+
+    shipments = np.zeros((rows, cols))
+    shipments[source, target] = result.x
+    return np.rint(shipments).astype(int)
+
+
+def pack_trips(moves, truck_capacity):
+    """
+    Group moves into truck trips
+    Each trip loads at one station and drops off at its destinations in
+    nearest-first order; moves larger than a truck are split.
+    """
+    by_source = {}
+    for move in moves:
+        by_source.setdefault(move.source.id, []).append(move)
+
+    trips = []
+    for source_moves in by_source.values():
+        source = source_moves[0].source
+        pending = [[move.target, move.bicycles] for move in sorted(source_moves, key=lambda move: move.distance_km)]
+        while pending:
+            load, drops = 0, []
+            for item in pending:
+                if load == truck_capacity:
+                    break
+                take = min(item[1], truck_capacity - load)
+                drops.append((item[0], take))
+                item[1] -= take
+                load += take
+            pending = [item for item in pending if item[1] > 0]
+            trips.append(Trip(source, drops, load, route_length(source, [target for target, _ in drops])))
+    return sorted(trips, key=lambda trip: (trip.source.code, -trip.bicycles))
+
+
+def route_length(source, stops):
+    """Length in km of a route visiting stops in order"""
+    points = [source] + stops
+    lat = np.radians([float(station.latitude) for station in points])
+    lng = np.radians([float(station.longitude) for station in points])
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lng) / 2) ** 2
+    return float(2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1))).sum())
+
+
+class RebalancingPlan:
+    """Moves and truck trips that bring stations to their targets"""
+
+    def __init__(self, moves, trips, unmet, leftover):
+        self.moves = moves
+        self.trips = trips
+        # Bikes still missing at deficit stations / still spare at surplus stations
+        self.unmet = unmet
+        self.leftover = leftover
+
+    @property
+    def bicycles_moved(self):
+        return sum(move.bicycles for move in self.moves)
+
+    @property
+    def distance_km(self):
+        return sum(trip.distance_km for trip in self.trips)
+
+    def summary(self):
+        return (
+            f"{self.bicycles_moved} bikes in {len(self.moves)} moves / {len(self.trips)} trips, "
+            f"{self.distance_km:.1f} km driven, {self.unmet} bikes short, {self.leftover} bikes spare"
+        )
+
+
+def plan_rebalancing(inventory=None, targets=None, fill=None, min_imbalance=None, truck_capacity=None):
+    """
+    Plan the moves that bring every station as close to its target as possible
+    inventory defaults to the live station levels and targets to a fixed share
+    of each station's capacity.
+    """
+    inventory = station_inventory() if inventory is None else inventory
+    targets = default_targets(inventory, fill) if targets is None else targets
+    truck_capacity = truck_capacity or settings.REBALANCE_TRUCK_CAPACITY
+
+    surplus, deficit = imbalances(inventory, targets, min_imbalance)
+    if not surplus or not deficit:
+        return RebalancingPlan(
+            [], [],
+            unmet=sum(bikes for _, bikes in deficit),
+            leftover=sum(bikes for _, bikes in surplus),
+        )
+
+    sources = [station for station, _ in surplus]
+    sinks = [station for station, _ in deficit]
+    supply = np.array([bikes for _, bikes in surplus])
+    demand = np.array([bikes for _, bikes in deficit])
+    distances = distance_matrix(sources, sinks)
+
+    shipments = solve_transport(supply, demand, distances)
+    moves = [
+        Move(sources[i], sinks[j], int(shipments[i, j]), float(distances[i, j]))
+        for i, j in zip(*np.nonzero(shipments))
+    ]
+    moved = int(shipments.sum())
+    return RebalancingPlan(
+        moves,
+        pack_trips(moves, truck_capacity),
+        unmet=int(demand.sum()) - moved,
+        leftover=int(supply.sum()) - moved,
+    )
\ No newline at end of file
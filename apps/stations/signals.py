@@ -0,0 +1,28 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .feed import invalidate_station_feed
+from .geo import invalidate_station_grid
+from .models import Station
+
+
+@receiver(post_save, sender=Station)
+@receiver(post_delete, sender=Station)
+def station_changed(sender, **kwargs):
+    """Rebuild the nearest-station grid and the map feed after any station edit"""
+    invalidate_station_grid()
+    invalidate_station_feed()
+
+
+@receiver(post_save, sender=Station)
+def fixture_station_loaded(sender, instance, raw, **kwargs):
+    """loaddata saves stations without Station.save(), which writes the opening intervals"""
+    if raw:
+        instance.sync_opening_intervals()
+
+
+@receiver(post_save, sender='bicycles.Bicycle')
+@receiver(post_delete, sender='bicycles.Bicycle')
+def bicycle_changed(sender, **kwargs):
+    """A bicycle save may change a station's counts (status or location)"""
+    invalidate_station_feed()
\ No newline at end of file
@@ -1,3 +1,139 @@
-from django.test import TestCase
+import json
+import tempfile
+from datetime import datetime
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from core import testing
+from core.operating_hours import ALWAYS_OPEN, parse_operating_hours
+from .models import Station
+
+
+class StationViewPerformanceTests(testing.ViewPerformanceTestCase):
+    views = [
+        testing.ViewBudget('station list', 'stations:list', 5, 'rider'),
+        testing.ViewBudget(
+            'station detail', lambda data: reverse('stations:detail', args=[data.station.pk]), 6, 'rider',
+        ),
+        testing.ViewBudget('station feed', 'stations:feed', 1, None),
+        testing.ViewBudget('station admin', 'admin:stations_station_changelist', 5, 'admin'),
+    ]
+
+
+def every_day(opens, closes, days=range(7)):
+    return tuple((weekday, opens, closes) for weekday in days)
+
+
+class OperatingHoursParserTests(SimpleTestCase):
+    cases = [
+        ('24/7', ALWAYS_OPEN),
+        ('Open 24 hours', ALWAYS_OPEN),
+        ('6:00 AM - 10:00 PM', every_day(360, 1320)),
+        ('06:00-22:00', every_day(360, 1320)),
+        ('noon to midnight', every_day(720, 1440)),
+        ('Mon-Fri 6:00 AM - 10:00 PM; Sat-Sun closed', every_day(360, 1320, range(5))),
+        ('Mon-Fri 6am-10pm; Sat 8:00 AM - 2:00 PM', every_day(360, 1320, range(5)) + ((5, 480, 840),)),
+        ('Mon, Wed 9:00-12:00, 13:00-17:00', ((0, 540, 720), (0, 780, 1020), (2, 540, 720), (2, 780, 1020))),
+        ('Sat-Mon 10am-4pm', every_day(600, 960, (0, 5, 6))),
+        ('6am-10pm; Sun closed', every_day(360, 1320, range(6))),
+        ('closed', ()),
+        ('Fri-Sat 8pm - 2am', ((4, 1200, 1440), (5, 0, 120), (5, 1200, 1440), (6, 0, 120))),
+        ('Sun 10pm - 6am', ((0, 0, 360), (6, 1320, 1440))),
+        ('9am-1pm, 12pm-5pm', every_day(540, 1020)),
+    ]
+    unparseable = ['', 'whenever', 'Mon 9am', 'Mon, Tue', '25:00 - 26:00', '13pm - 2pm', 'Mon-Fri sometimes']
+
+    def test_parses_hours(self):
+        for text, intervals in self.cases:
+            with self.subTest(text=text):
+                self.assertEqual(parse_operating_hours(text), intervals)
+
+    def test_rejects_unparseable_hours(self):
+        for text in self.unparseable:
+            with self.subTest(text=text), self.assertRaises(ValueError):
+                parse_operating_hours(text)
+
+    def test_station_treats_unparseable_hours_as_always_open(self):
+        for text in self.unparseable:
+            with self.subTest(text=text):
+                self.assertEqual(Station(operating_hours=text).opening_intervals, ALWAYS_OPEN)
+
+
+class OpeningIntervalSyncTests(TestCase):
+    """
+    open_at() reads StationOpeningInterval rows and is_open_at() parses the
+    text; every way of writing stations must keep the two in agreement
+    """
+
+    # A Monday at noon, the same Monday late at night, and a Sunday afternoon
+    moments = [datetime(2026, 10, 19, 12), datetime(2026, 10, 19, 23, 30), datetime(2026, 10, 25, 15)]
+    hours = {
+        'ALL': '24/7',
+        'DAY': '6:00 AM - 10:00 PM',
+        'WEEK': 'Mon-Fri 6:00 AM - 10:00 PM; Sat-Sun closed',
+        'LATE': 'Mon 8pm - 2am',
+        'SHUT': 'closed',
+        'ODD': 'whenever',
+    }
+
+    def station(self, code, operating_hours):
+        return Station(name=f'Station {code}', code=code, address='Road', operating_hours=operating_hours)
+
+    def assert_in_sync(self):
+        stations = list(Station.objects.all())
+        self.assertEqual(len(stations), len(self.hours))
+        for moment in map(timezone.make_aware, self.moments):
+            with self.subTest(moment=moment):
+                self.assertEqual(
+                    set(Station.objects.open_at(moment).values_list('code', flat=True)),
+                    {station.code for station in stations if station.is_open_at(moment)},
+                )
+        for station in stations:
+            self.assertEqual(
+                tuple(station.opening_periods.values_list('weekday', 'opens_minute', 'closes_minute')),
+                station.opening_intervals,
+            )
+
+    def test_save(self):
+        for code, operating_hours in self.hours.items():
+            self.station(code, operating_hours).save()
+        self.assert_in_sync()
+
+    def test_bulk_create(self):
+        Station.objects.bulk_create([self.station(code, hours) for code, hours in self.hours.items()])
+        self.assert_in_sync()
+
+    def test_update(self):
+        Station.objects.bulk_create([self.station(code, '24/7') for code in self.hours])
+        for code, operating_hours in self.hours.items():
+            Station.objects.filter(code=code).update(operating_hours=operating_hours)
+        self.assert_in_sync()
+
+    def test_bulk_update(self):
+        Station.objects.bulk_create([self.station(code, 'closed') for code in self.hours])
+        stations = list(Station.objects.all())
+        for station in stations:
+            station.operating_hours = self.hours[station.code]
+        Station.objects.bulk_update(stations, ['operating_hours'])
+        self.assert_in_sync()
+
+    def test_loaddata(self):
+        fixture = [
+            {
+                'model': 'stations.station',
+                'pk': pk,
+                'fields': {
+                    'name': f'Station {code}', 'code': code, 'address': 'Road', 'operating_hours': operating_hours,
+                    'created_at': '2026-01-01T00:00:00Z', 'updated_at': '2026-01-01T00:00:00Z',
+                },
+            }
+            for pk, (code, operating_hours) in enumerate(self.hours.items(), start=1)
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as fixture_file:
+            json.dump(fixture, fixture_file)
+            fixture_file.flush()
+            call_command('loaddata', fixture_file.name, verbosity=0)
+        self.assert_in_sync()
\ No newline at end of file
@@ -5,5 +5,8 @@ app_name = 'stations'
 
 urlpatterns = [
     path('', views.StationListView.as_view(), name='list'),
+    path('feed.geojson', views.StationFeedView.as_view(fmt='geojson'), name='feed'),
+    path('feed.json', views.StationFeedView.as_view(fmt='compact'), name='feed_compact'),
+    path('nearest/', views.NearestStationsView.as_view(), name='nearest'),
     path('<int:pk>/', views.StationDetailView.as_view(), name='detail'),
 ]
\ No newline at end of file
@@ -1,5 +1,14 @@
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.urls import reverse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views import View
 from django.views.generic import ListView, DetailView
+from core.mixins import HtmxPartialMixin
+from .feed import FEED_FORMATS, aget_feed
+from .geo import DEFAULT_LIMIT, DEFAULT_RADIUS_KM, nearest_available
 from .models import Station
 
 
@@ -12,7 +21,7 @@ class StationListView(LoginRequiredMixin, ListView):
     context_object_name = 'stations'
     
     def get_queryset(self):
-        return Station.objects.filter(is_active=True).order_by('name')
+        return Station.objects.filter(is_active=True).with_open_flag().with_bike_counts().order_by('name')
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -20,16 +29,97 @@ class StationListView(LoginRequiredMixin, ListView):
         return context
 
 
-class StationDetailView(LoginRequiredMixin, DetailView):
+class StationDetailView(LoginRequiredMixin, HtmxPartialMixin, DetailView):
     """
     Detail view for a single station with available bicycles
+    The availability panel refreshes itself through htmx.
     """
     model = Station
     template_name = 'stations/station_detail.html'
+    partial_template_name = 'stations/_station_availability.html'
+    htmx_target = 'station-availability'
     context_object_name = 'station'
+    bicycle_preview_limit = 24
+    
+    def get_queryset(self):
+        return Station.objects.with_bike_counts()
     
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['title'] = self.object.name
-        context['available_bicycles'] = self.object.bicycles.filter(status='available')
-        return context
\ No newline at end of file
+        context['is_open'] = self.object.is_open_at()
+        context['next_opening'] = self.object.next_opening()
+        if not self.is_partial:
+            context['title'] = self.object.name
+            context['available_bicycles'] = self.object.bicycles.filter(
+                status='available'
+            ).order_by('name')[:self.bicycle_preview_limit]
+        return context
+
+
+class NearestStationsView(LoginRequiredMixin, View):
+    """
+    AJAX endpoint listing the closest stations with bicycles available
+    Usage: /stations/nearest/?lat=-1.3&lng=36.8[&radius=5][&limit=5]
+    """
+    max_limit = 20
+    max_radius_km = 50
+    
+    def get(self, request):
+        try:
+            lat = float(request.GET['lat'])
+            lng = float(request.GET['lng'])
+            radius_km = float(request.GET.get('radius', DEFAULT_RADIUS_KM))
+            limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+        except (KeyError, ValueError):
+            return JsonResponse({'error': 'lat and lng are required numbers'}, status=400)
+        
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return JsonResponse({'error': 'Coordinates out of range'}, status=400)
+        radius_km = min(max(radius_km, 0), self.max_radius_km)
+        limit = min(max(limit, 1), self.max_limit)
+        
+        stations = nearest_available(lat, lng, radius_km=radius_km, limit=limit)
+        return JsonResponse({
+            'stations': [
+                {
+                    'id': station.pk,
+                    'name': station.name,
+                    'code': station.code,
+                    'latitude': float(station.latitude),
+                    'longitude': float(station.longitude),
+                    'distance_km': round(station.distance_km, 3),
+                    'available_bikes': station.available_count,
+                    'url': reverse('stations:detail', args=[station.pk]),
+                }
+                for station in stations
+            ],
+        })
+
+
+class StationFeedView(View):
+    """
+    Map feed of active stations with live availability
+    Public and served pre-serialized from the cache; clients polling with
+    If-None-Match get a 304 until a station or its bicycles change.
+    Usage: /stations/feed.geojson or /stations/feed.json (compact arrays)
+    """
+    fmt = 'geojson'
+    
+    async def get(self, request):
+        entry = await aget_feed(self.fmt)
+        etag = entry['etag']
+        
+        # Weak comparison, as the ETag is shared by both encodings
+        if_none_match = parse_etags(request.headers.get('If-None-Match', ''))
+        if '*' in if_none_match or etag.removeprefix('W/') in [tag.removeprefix('W/') for tag in if_none_match]:
+            response = HttpResponseNotModified()
+        elif 'gzip' in request.headers.get('Accept-Encoding', ''):
+            response = HttpResponse(entry['gzip'], content_type=FEED_FORMATS[self.fmt])
+            response['Content-Encoding'] = 'gzip'
+        else:
+            response = HttpResponse(entry['body'], content_type=FEED_FORMATS[self.fmt])
+        
+        response['ETag'] = etag
+        patch_cache_control(response, public=True, max_age=settings.STATION_FEED_MAX_AGE)
+        patch_vary_headers(response, ['Accept-Encoding'])
+        return response
\ No newline at end of file
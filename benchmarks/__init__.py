@@ -0,0 +1,6 @@
+"""
+Standalone performance benchmarks
+
+Each module runs against a throwaway test database filled with synthetic
+data, e.g. python -m benchmarks.geo --stations 5000
+"""
\ No newline at end of file
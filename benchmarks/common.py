@@ -0,0 +1,65 @@
+"""
+Shared setup for the benchmark scripts
+"""
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django(settings_module='config.settings.development'):
+    """Configure Django for a script run outside manage.py"""
+    if str(BASE_DIR) not in sys.path:
+        sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    django.setup()
+
+
+@contextmanager
+def test_database(keepdb=False):
+    """Create the test database for the duration of a benchmark"""
+    from django.test.utils import get_runner, setup_test_environment, teardown_test_environment
+    from django.conf import settings
+
+    setup_test_environment(debug=False)
+    runner = get_runner(settings)(verbosity=0, keepdb=keepdb)
+    old_config = runner.setup_databases()
+    try:
+        yield
+    finally:
+        runner.teardown_databases(old_config)
+        teardown_test_environment()
+
+
+def timed(func, repeat=100, warmup=3):
+    """Run func repeatedly and return per-call timings in milliseconds"""
+    for _ in range(warmup):
+        func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def summarize(timings):
+    """Mean, median and 95th percentile of a list of timings"""
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.mean(ordered), statistics.median(ordered), p95
+
+
+def report(title, results):
+    """Print a table of (label, timings) rows"""
+    print(f'\n{title}')
+    print(f"{'':<32} {'mean ms':>10} {'median ms':>10} {'p95 ms':>10}")
+    for label, timings in results:
+        mean, median, p95 = summarize(timings)
+        print(f'{label:<32} {mean:>10.3f} {median:>10.3f} {p95:>10.3f}')
\ No newline at end of file
@@ -0,0 +1,93 @@
+"""
+Benchmark request latency with and without persistent database connections
+Usage: DB_NAME=... DB_USER=... python -m benchmarks.connections [--threads 16] [--requests 200]
+
+Meant for a local PostgreSQL (the DB_* settings of config.settings.base), or
+a PgBouncer in front of it with DB_POOL_MODE=transaction. Worker threads
+simulate requests: each sends request_started, runs the queries of a small
+page and sends request_finished, so Django opens and closes connections
+exactly as it does under gunicorn. Runs once with CONN_MAX_AGE=0 (a new
+connection per request) and once with persistent connections.
+"""
+import argparse
+import threading
+import time
+
+from benchmarks.common import report, setup_django, test_database
+
+
+def simulate_requests(requests, timings):
+    """One worker thread's share of the load"""
+    from django.core.signals import request_finished, request_started
+    from django.db import connections
+    from apps.stations.models import Station
+
+    try:
+        for _ in range(requests):
+            start = time.perf_counter()
+            request_started.send(sender=None)
+            list(Station.objects.filter(is_active=True).with_bike_counts()[:10])
+            Station.objects.filter(is_active=True).exists()
+            request_finished.send(sender=None)
+            timings.append((time.perf_counter() - start) * 1000)
+    finally:
+        connections.close_all()
+
+
+def run_load(threads, requests):
+    """Per-request timings and the number of connections opened"""
+    from django.db.backends.signals import connection_created
+
+    timings, opened = [], []
+
+    def count_connection(sender, connection, **kwargs):
+        opened.append(connection.alias)
+
+    connection_created.connect(count_connection)
+    workers = [
+        threading.Thread(target=simulate_requests, args=(requests, timings))
+        for _ in range(threads)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    connection_created.disconnect(count_connection)
+    return timings, len(opened)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--threads', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=200, help='Requests per thread')
+    parser.add_argument('--max-age', type=int, default=600, help='CONN_MAX_AGE for the persistent run')
+    parser.add_argument('--settings', default='config.settings.base')
+    args = parser.parse_args()
+
+    setup_django(args.settings)
+    from django.db import connection, connections
+
+    if connection.vendor != 'postgresql':
+        print(f'Warning: running against {connection.vendor}; connection setup is only costly on PostgreSQL')
+
+    with test_database():
+        from apps.stations.models import Station
+        for index in range(20):
+            Station.objects.create(name=f'Bench Station {index}', code=f'B{index}', address='Synthetic')
+        connections.close_all()
+
+        results = []
+        for label, max_age in (('CONN_MAX_AGE=0', 0), (f'CONN_MAX_AGE={args.max_age}', args.max_age)):
+            connection.settings_dict['CONN_MAX_AGE'] = max_age
+            timings, opened = run_load(args.threads, args.requests)
+            results.append((f'{label}, {opened} conns', timings))
+
+        mode = 'transaction' if connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS') else 'session'
+        report(
+            f'{args.threads} threads x {args.requests} requests, {connection.vendor}, {mode} pooling mode',
+            results,
+        )
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
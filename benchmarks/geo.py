@@ -0,0 +1,114 @@
+"""
+Benchmark nearest-station lookups on a synthetic multi-campus network
+Usage: python -m benchmarks.geo [--campuses 20] [--stations 5000] [--bikes-per-station 8]
+"""
+import argparse
+import random
+
+from benchmarks.common import report, setup_django, test_database, timed
+
+
+def build_network(campuses, stations, bikes_per_station, seed):
+    """Scatter stations around campus centres and fill them with bicycles"""
+    from apps.bicycles.models import Bicycle
+    from apps.stations.models import Station
+
+    rng = random.Random(seed)
+    # Campus centres spread around Nairobi, stations within ~2 km of each
+    centres = [
+        (-1.29 + rng.uniform(-0.5, 0.5), 36.82 + rng.uniform(-0.5, 0.5))
+        for _ in range(campuses)
+    ]
+    station_objects = []
+    for index in range(stations):
+        lat, lng = centres[index % campuses]
+        station_objects.append(Station(
+            name=f'Bench Station {index}',
+            code=f'B{index}',
+            address='Synthetic',
+            latitude=round(lat + rng.gauss(0, 0.008), 6),
+            longitude=round(lng + rng.gauss(0, 0.008), 6),
+            capacity=bikes_per_station * 2,
+        ))
+    Station.objects.bulk_create(station_objects, batch_size=1000)
+
+    bicycles = []
+    statuses = ['available', 'available', 'available', 'in-use', 'maintenance']
+    for station in Station.objects.only('pk'):
+        for slot in range(rng.randint(0, bikes_per_station * 2)):
+            serial = f'BENCH-{station.pk}-{slot}'
+            bicycles.append(Bicycle(
+                name='Bench bike',
+                model='Synthetic',
+                serial_number=serial,
+                slug=serial.lower(),
+                hourly_rate=50,
+                status=rng.choice(statuses),
+                current_station_id=station.pk,
+            ))
+    Bicycle.objects.bulk_create(bicycles, batch_size=2000)
+    return centres
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--campuses', type=int, default=20)
+    parser.add_argument('--stations', type=int, default=5000)
+    parser.add_argument('--bikes-per-station', type=int, default=8)
+    parser.add_argument('--queries', type=int, default=200)
+    parser.add_argument('--radius', type=float, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from apps.stations.geo import (
+        StationGrid, get_station_grid, haversine_km, nearest_available, nearest_stations,
+    )
+    from apps.stations.models import Station
+
+    with test_database():
+        centres = build_network(args.campuses, args.stations, args.bikes_per_station, args.seed)
+        rng = random.Random(args.seed + 1)
+        points = [
+            (lat + rng.gauss(0, 0.01), lng + rng.gauss(0, 0.01))
+            for lat, lng in (rng.choice(centres) for _ in range(args.queries))
+        ]
+        coordinates = [
+            (station_id, float(lat), float(lng))
+            for station_id, lat, lng in Station.objects.values_list('id', 'latitude', 'longitude')
+        ]
+
+        def brute_force(lat, lng):
+            return sorted(
+                (haversine_km(lat, lng, station_lat, station_lng), station_id)
+                for station_id, station_lat, station_lng in coordinates
+            )[:5]
+
+        grid = StationGrid(coordinates)
+        get_station_grid()
+
+        # The two database-backed paths must agree on the ranking
+        for lat, lng in points[:20]:
+            sql_ids = [station.pk for station in nearest_stations(lat, lng, radius_km=args.radius)]
+            grid_ids = [station.pk for station in nearest_available(lat, lng, radius_km=args.radius)]
+            assert sql_ids == grid_ids, (sql_ids, grid_ids)
+            assert [pk for _, pk in grid.nearest(lat, lng, args.radius, limit=5)] == [pk for _, pk in brute_force(lat, lng)]
+
+        def run(func):
+            iterator = iter(points * 1000)
+            return lambda: func(*next(iterator))
+
+        report(
+            f'{args.stations} stations across {args.campuses} campuses, {args.queries} query points',
+            [
+                ('Python full scan (coords only)', timed(run(brute_force), args.queries)),
+                ('Grid index (coords only)', timed(run(lambda lat, lng: grid.nearest(lat, lng, args.radius, limit=5)), args.queries)),
+                ('SQL bbox + haversine + counts', timed(run(lambda lat, lng: list(nearest_stations(lat, lng, radius_km=args.radius))), args.queries)),
+                ('Grid index + counts query', timed(run(lambda lat, lng: nearest_available(lat, lng, radius_km=args.radius)), args.queries)),
+                ('Grid rebuild', timed(StationGrid.build, 10, warmup=1)),
+            ],
+        )
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,32 @@
+"""
+Settings for the server started by benchmarks.load_test
+The database is LOAD_TEST_DATABASE_URL, a throwaway SQLite file unless
+the harness is pointed at a scratch PostgreSQL database.
+"""
+import dj_database_url
+
+from config.settings.base import *
+
+DEBUG = False
+ALLOWED_HOSTS = ['127.0.0.1', 'localhost']
+
+DATABASES = {
+    'default': dj_database_url.parse(
+        config('LOAD_TEST_DATABASE_URL'),
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=True,
+    ),
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Several workers write to one file; wait for the lock instead of failing at once
+    DATABASES['default']['OPTIONS'] = {'timeout': 20}
+
+# No collectstatic manifest is needed to resolve {% static %} URLs
+STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
+EMAIL_BACKEND = 'django.core.mail.backends.dummy.EmailBackend'
+
+# Every response reports its query count in Server-Timing for the harness
+QUERY_SAMPLE_RATE = 1.0
+QUERY_SERVER_TIMING = True
+LOGGING['handlers'] = {key: value for key, value in LOGGING['handlers'].items() if key == 'console'}
+LOGGING['root'] = {'handlers': ['console'], 'level': 'WARNING'}
\ No newline at end of file
@@ -0,0 +1,341 @@
+"""
+Load test the reserve -> status -> pickup -> return flow against a live server
+Usage: python -m benchmarks.load_test [--riders 50] [--trips 3] [--bikes 300] [--profile wsgi]
+
+Seeds a fleet of stations, bicycles and verified riders (with ready-made
+sessions) into a throwaway SQLite database, or into --database-url, which
+must be a scratch database as the harness migrates and fills it. Starts
+gunicorn on it (see config/gunicorn.py), then runs every rider concurrently
+through --trips trips: reserve a random bicycle (retrying another one on a
+conflict), poll the reservation status, start the rental and return it.
+
+Prints throughput, latency percentiles, error and conflict rates and the
+server's query count per step. The same numbers, with the run's settings and
+git commit, are saved as JSON under benchmarks/results/ (or --output) so runs
+of different releases can be compared.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import string
+import subprocess
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from urllib.parse import urlencode
+
+from benchmarks.common import BASE_DIR, setup_django
+from benchmarks.serving import start_server, wait_until_listening
+
+
+SETTINGS_MODULE = 'benchmarks.load_settings'
+STEPS = ('reserve', 'status', 'start', 'return')
+SERVER_TIMING_DB = re.compile(r'\bdb;dur=([\d.]+);desc="(\d+) queries"')
+RESERVATION_URL = re.compile(r'/rentals/reservation/(\d+)/$')
+MAX_RESERVE_ATTEMPTS = 5
+
+
+def seed(run_id, stations, bikes, riders, seed_value):
+    """Create the fleet and riders; returns (bicycle slugs, station ids, session keys)"""
+    from importlib import import_module
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+    from django.contrib.auth.hashers import make_password
+    from django.core.management import call_command
+    from apps.bicycles.models import Bicycle
+    from apps.stations.models import Station
+
+    call_command('migrate', verbosity=0)
+    rng = random.Random(seed_value)
+    station_objects = [
+        Station.objects.create(
+            name=f'Load {run_id} Station {index}',
+            code=f'L{run_id}-{index}',
+            address='Synthetic',
+            capacity=max(20, bikes // stations * 2),
+            operating_hours='24/7',
+        )
+        for index in range(stations)
+    ]
+    bicycles = Bicycle.objects.bulk_create([
+        Bicycle(
+            name=f'Load bike {index}',
+            model='Synthetic',
+            serial_number=f'LOAD-{run_id}-{index}',
+            slug=f'load-{run_id}-{index}',
+            hourly_rate=rng.choice([40, 50, 80]),
+            status='available',
+            current_station=rng.choice(station_objects),
+        )
+        for index in range(bikes)
+    ])
+
+    User = get_user_model()
+    users = User.objects.bulk_create([
+        User(
+            username=f'load-{run_id}-{index}',
+            email=f'load-{run_id}-{index}@example.com',
+            university_id=f'LOAD/{run_id}/{index}',
+            password=make_password(None),
+            is_verified=True,
+        )
+        for index in range(riders)
+    ])
+    SessionStore = import_module(settings.SESSION_ENGINE).SessionStore
+    sessions = []
+    for user in User.objects.filter(pk__in=[user.pk for user in users]):
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions.append(session.session_key)
+    return [bike.slug for bike in bicycles], [station.pk for station in station_objects], sessions
+
+
+async def http(port, method, path, cookies, data=None, timeout=30):
+    """(status, headers, elapsed ms) of one request on a fresh connection"""
+    body = urlencode(data or {}).encode()
+    lines = [
+        f'{method} {path} HTTP/1.1',
+        'Host: localhost',
+        'Connection: close',
+        'Cookie: ' + '; '.join(f'{name}={value}' for name, value in cookies.items()),
+    ]
+    if method == 'POST':
+        lines += [
+            f"X-CSRFToken: {cookies['csrftoken']}",
+            'Content-Type: application/x-www-form-urlencoded',
+            f'Content-Length: {len(body)}',
+        ]
+    start = time.perf_counter()
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode() + body)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+    elapsed = (time.perf_counter() - start) * 1000
+
+    head = response.split(b'\r\n\r\n', 1)[0].decode('latin-1').split('\r\n')
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return int(head[0].split()[1]), headers, elapsed
+
+
+class StepStats:
+    """Outcomes, latencies and server query counts of one step"""
+
+    def __init__(self):
+        self.timings = []
+        self.queries = []
+        self.db_ms = []
+        self.outcomes = defaultdict(int)
+
+    def add(self, outcome, elapsed, headers):
+        self.outcomes[outcome] += 1
+        if elapsed is not None:
+            self.timings.append(elapsed)
+        match = SERVER_TIMING_DB.search((headers or {}).get('server-timing', ''))
+        if match:
+            self.db_ms.append(float(match.group(1)))
+            self.queries.append(int(match.group(2)))
+
+    def summary(self, duration):
+        requests = sum(self.outcomes.values())
+        ordered = sorted(self.timings) or [float('nan')]
+
+        def percentile(fraction):
+            return round(ordered[min(len(ordered) - 1, int(len(ordered) * fraction))], 3)
+
+        return {
+            'requests': requests,
+            'per_second': round(requests / duration, 2),
+            'ok': self.outcomes['ok'],
+            'conflicts': self.outcomes['conflict'],
+            'errors': self.outcomes['error'],
+            'conflict_rate': round(self.outcomes['conflict'] / requests, 4) if requests else 0,
+            'error_rate': round(self.outcomes['error'] / requests, 4) if requests else 0,
+            'mean_ms': round(statistics.fmean(ordered), 3),
+            'p50_ms': percentile(0.50),
+            'p95_ms': percentile(0.95),
+            'p99_ms': percentile(0.99),
+            'queries_mean': round(statistics.fmean(self.queries), 2) if self.queries else None,
+            'queries_max': max(self.queries, default=None),
+            'db_ms_mean': round(statistics.fmean(self.db_ms), 3) if self.db_ms else None,
+        }
+
+
+async def timed_step(stats, port, method, path, cookies, classify, data=None):
+    """Send one request and record it; returns (outcome, headers)"""
+    try:
+        status, headers, elapsed = await http(port, method, path, cookies, data)
+    except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+        stats.add('error', None, None)
+        return 'error', {}
+    outcome = classify(status, headers.get('location', ''))
+    stats.add(outcome, elapsed, headers)
+    return outcome, headers
+
+
+def reserve_outcome(status, location):
+    if status == 302 and RESERVATION_URL.search(location):
+        return 'ok'
+    # Someone else reserved the bicycle first: back to its page with a message
+    if status == 302 and location.startswith('/bicycles/'):
+        return 'conflict'
+    return 'error'
+
+
+def redirect_outcome(target):
+    def classify(status, location):
+        return 'ok' if status == 302 and location.startswith(target) else 'error'
+    return classify
+
+
+def json_outcome(status, location):
+    return 'ok' if status == 200 else 'error'
+
+
+async def ride(port, session_key, slugs, station_ids, trips, polls, stats, rng):
+    """One virtual rider's trips; returns the number completed"""
+    csrf_token = ''.join(rng.choices(string.ascii_letters + string.digits, k=32))
+    cookies = {'sessionid': session_key, 'csrftoken': csrf_token}
+    completed = 0
+    for _ in range(trips):
+        reservation = None
+        for _ in range(MAX_RESERVE_ATTEMPTS):
+            outcome, headers = await timed_step(
+                stats['reserve'], port, 'POST', f'/rentals/reserve/{rng.choice(slugs)}/', cookies, reserve_outcome,
+            )
+            if outcome == 'ok':
+                reservation = RESERVATION_URL.search(headers['location']).group(1)
+                break
+            if outcome == 'error':
+                break
+        if reservation is None:
+            continue
+
+        for _ in range(polls):
+            await timed_step(
+                stats['status'], port, 'GET', f'/rentals/reservation/{reservation}/status/', cookies, json_outcome,
+            )
+        outcome, _ = await timed_step(
+            stats['start'], port, 'POST', f'/rentals/start/{reservation}/', cookies, redirect_outcome('/rentals/active/'),
+        )
+        if outcome != 'ok':
+            continue
+        outcome, _ = await timed_step(
+            stats['return'], port, 'POST', '/rentals/return/', cookies, redirect_outcome('/rentals/history/'),
+            data={'return_station': rng.choice(station_ids), 'distance_km': round(rng.uniform(0.5, 8), 1)},
+        )
+        completed += outcome == 'ok'
+    return completed
+
+
+async def run_riders(port, sessions, slugs, station_ids, trips, polls, seed_value):
+    stats = {step: StepStats() for step in STEPS}
+    rng = random.Random(seed_value)
+    completed = await asyncio.gather(*(
+        ride(port, session_key, slugs, station_ids, trips, polls, stats, random.Random(rng.random()))
+        for session_key in sessions
+    ))
+    return stats, sum(completed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results):
+    print(f"\n{results['riders']} riders x {results['trips']} trips, {results['profile']} profile, "
+          f"{results['workers']} workers, {results['database']}: "
+          f"{results['completed_trips']} trips in {results['duration_s']:.1f}s "
+          f"({results['trips_per_second']:.2f} trips/s)")
+    print(f"{'':<10} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>8} {'conflicts':>10} {'queries':>8}")
+    for step, row in results['steps'].items():
+        queries = '-' if row['queries_mean'] is None else f"{row['queries_mean']:.1f}"
+        print(
+            f"{step:<10} {row['per_second']:>8.1f} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} "
+            f"{row['error_rate']:>8.1%} {row['conflict_rate']:>10.1%} {queries:>8}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--riders', type=int, default=50, help='Concurrent virtual riders')
+    parser.add_argument('--trips', type=int, default=3, help='Trips per rider')
+    parser.add_argument('--polls', type=int, default=2, help='Status polls per reservation')
+    parser.add_argument('--stations', type=int, default=10)
+    parser.add_argument('--bikes', type=int, default=300)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--profile', choices=('wsgi', 'asgi'), default='wsgi')
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help='Scratch database to use instead of a temporary SQLite file')
+    parser.add_argument('--output', help='Results file (default: benchmarks/results/load_test-<time>.json)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['LOAD_TEST_DATABASE_URL'] = args.database_url or f'sqlite:///{directory}/load_test.sqlite3'
+        setup_django(SETTINGS_MODULE)
+        from django.db import connection
+
+        run_id = datetime.now().strftime('%H%M%S')
+        slugs, station_ids, sessions = seed(run_id, args.stations, args.bikes, args.riders, args.seed)
+        connection.close()
+
+        server = start_server(args.profile, args.port, args.workers, SETTINGS_MODULE)
+        try:
+            wait_until_listening(args.port, server)
+            start = time.perf_counter()
+            stats, completed = asyncio.run(
+                run_riders(args.port, sessions, slugs, station_ids, args.trips, args.polls, args.seed)
+            )
+            duration = time.perf_counter() - start
+        finally:
+            server.terminate()
+            server.wait()
+
+    results = {
+        'started_at': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'profile': args.profile,
+        'workers': args.workers,
+        'database': connection.vendor,
+        'riders': args.riders,
+        'trips': args.trips,
+        'polls': args.polls,
+        'stations': args.stations,
+        'bikes': args.bikes,
+        'duration_s': round(duration, 3),
+        'completed_trips': completed,
+        'trips_per_second': round(completed / duration, 3),
+        'steps': {step: stats[step].summary(duration) for step in STEPS},
+    }
+    print_results(results)
+
+    output = args.output or os.path.join(
+        BASE_DIR, 'benchmarks', 'results', f"load_test-{datetime.now():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f'\nResults saved to {output}')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
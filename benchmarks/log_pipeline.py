@@ -0,0 +1,102 @@
+"""
+Benchmark the cost of a logging call to the request that makes it
+Usage: python -m benchmarks.log_pipeline [--repeat 5000] [--disk-delay-ms 2]
+
+Times logger.info() with the old setup (file and console handlers writing in
+the calling thread) and with core.log's pipeline (JSON file with rotation,
+written by a background thread), first on a normal disk and then with
+every file write delayed by --disk-delay-ms to mimic disk contention.
+"""
+import argparse
+import logging
+import logging.config
+import os
+import tempfile
+import time
+
+from benchmarks.common import report, timed
+from core import log
+
+
+class SlowFileHandler(logging.FileHandler):
+    """FileHandler on a disk that takes delay_seconds per write"""
+    delay_seconds = 0
+
+    def emit(self, record):
+        time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+class SlowRotatingFileHandler(log.ConcurrentRotatingFileHandler):
+    delay_seconds = 0
+
+    def emit(self, record):
+        time.sleep(self.delay_seconds)
+        super().emit(record)
+
+
+def logging_settings(directory, file_class, queued):
+    """The LOGGING settings before (plain) and after (queued, JSON, rotating)"""
+    console = {'class': 'logging.StreamHandler', 'stream': open(os.devnull, 'w'), 'formatter': 'verbose'}
+    if queued:
+        file_handler = {
+            'class': file_class, 'filename': os.path.join(directory, 'after.log'),
+            'maxBytes': 10 * 1024 * 1024, 'backupCount': 2, 'formatter': 'json',
+        }
+        verbose = '{levelname} {asctime} {module} [{request_id}] {message}'
+    else:
+        file_handler = {'class': file_class, 'filename': os.path.join(directory, 'before.log'), 'formatter': 'verbose'}
+        verbose = '{levelname} {asctime} {module} {message}'
+    return {
+        'version': 1,
+        'disable_existing_loggers': False,
+        'formatters': {
+            'verbose': {'format': verbose, 'style': '{'},
+            'json': {'()': 'core.log.JsonFormatter'},
+        },
+        'handlers': {'console': console, 'file': file_handler},
+        'root': {'handlers': ['console', 'file'], 'level': 'INFO'},
+    }
+
+
+def time_logging(directory, queued, repeat):
+    if queued:
+        log.configure(logging_settings(directory, f'{__name__}.SlowRotatingFileHandler', queued=True))
+    else:
+        logging.config.dictConfig(logging_settings(directory, f'{__name__}.SlowFileHandler', queued=False))
+    logger = logging.getLogger('benchmarks.requests')
+    stats = {'queries': 12, 'db_ms': 3.5, 'path': '/bicycles/'}
+
+    def log_line():
+        logger.info('GET /bicycles/: %d queries in %.1f ms', 12, 3.5, extra={'query_stats': stats})
+
+    token = log.set_request_id(log.new_request_id())
+    try:
+        timings = timed(log_line, repeat)
+    finally:
+        log.reset_request_id(token)
+        # Wait for the queued records so the next run starts with an idle disk
+        log.stop_listener()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--repeat', type=int, default=5000)
+    parser.add_argument('--disk-delay-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for label, delay in (('normal disk', 0), (f'{args.disk_delay_ms:g} ms per write', args.disk_delay_ms / 1000)):
+            SlowFileHandler.delay_seconds = SlowRotatingFileHandler.delay_seconds = delay
+            # A stalled disk writes far fewer lines; keep that run short
+            repeat = args.repeat if not delay else max(100, args.repeat // 20)
+            results = [
+                ('before (direct)', time_logging(directory, False, repeat)),
+                ('after (queued, JSON)', time_logging(directory, True, repeat)),
+            ]
+            report(f'logger.info() call, {label}, {repeat} calls', results)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
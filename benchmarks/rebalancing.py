@@ -0,0 +1,91 @@
+"""
+Benchmark the rebalancing planner on synthetic station networks
+Usage: python -m benchmarks.rebalancing [--sizes 100 500 1000] [--with-db 500]
+"""
+import argparse
+import random
+
+from benchmarks.common import report, setup_django, test_database, timed
+
+
+def synthetic_inventory(stations, seed):
+    """Station levels skewed the way an evening commute leaves them"""
+    from apps.stations.rebalancing import StationLevel
+
+    rng = random.Random(seed)
+    inventory = []
+    for index in range(stations):
+        capacity = rng.choice([10, 15, 20, 30])
+        # A third of stations overflow, a third run dry, the rest sit near half full
+        bucket = index % 3
+        if bucket == 0:
+            available = rng.randint(int(capacity * 0.8), capacity)
+        elif bucket == 1:
+            available = rng.randint(0, int(capacity * 0.2))
+        else:
+            available = rng.randint(int(capacity * 0.4), int(capacity * 0.6))
+        total = min(capacity, available + rng.randint(0, 2))
+        inventory.append(StationLevel(
+            index, f'S{index}', f'Station {index}',
+            -1.29 + rng.uniform(-0.15, 0.15), 36.82 + rng.uniform(-0.15, 0.15),
+            capacity, available, total,
+        ))
+    return inventory
+
+
+def load_network(inventory):
+    """Write a synthetic inventory to the database as stations and bicycles"""
+    from apps.bicycles.models import Bicycle
+    from apps.stations.models import Station
+
+    stations = Station.objects.bulk_create([
+        Station(
+            name=level.name, code=level.code, address='Synthetic',
+            latitude=round(level.latitude, 6), longitude=round(level.longitude, 6),
+            capacity=level.capacity,
+        )
+        for level in inventory
+    ], batch_size=1000)
+    bicycles = []
+    for station, level in zip(Station.objects.order_by('pk'), inventory):
+        for slot in range(level.total):
+            serial = f'BENCH-{station.pk}-{slot}'
+            bicycles.append(Bicycle(
+                name='Bench bike', model='Synthetic', serial_number=serial, slug=serial.lower(),
+                hourly_rate=50, current_station_id=station.pk,
+                status='available' if slot < level.available else 'in-use',
+            ))
+    Bicycle.objects.bulk_create(bicycles, batch_size=2000)
+    return len(stations), len(bicycles)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 500, 1000])
+    parser.add_argument('--with-db', type=int, default=500, help='Station count for the end-to-end run (0 to skip)')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    setup_django()
+    from apps.stations.rebalancing import plan_rebalancing
+
+    results = []
+    for size in args.sizes:
+        inventory = synthetic_inventory(size, args.seed)
+        plan = plan_rebalancing(inventory=inventory)
+        print(f'{size} stations: {plan.summary()}')
+        results.append((f'Plan {size} stations', timed(lambda: plan_rebalancing(inventory=inventory), args.repeat, warmup=1)))
+    report('Rebalancing solver (in-memory inventory)', results)
+
+    if args.with_db:
+        with test_database():
+            stations, bicycles = load_network(synthetic_inventory(args.with_db, args.seed))
+            report(
+                f'End to end with inventory query ({stations} stations, {bicycles} bicycles)',
+                [('Plan from database', timed(plan_rebalancing, args.repeat, warmup=1))],
+            )
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Benchmark concurrent-connection capacity of the WSGI and ASGI serving profiles
+Usage: python -m benchmarks.serving [--workers 2] [--concurrency 10 50 200] [--path /stations/feed.json]
+
+Starts gunicorn with config/gunicorn.py once per profile (sync workers, then
+uvicorn workers) against the configured database, and hits it from asyncio
+clients that each send one request after another. For every concurrency level
+it reports throughput, median and p99 latency and failed requests (refused,
+reset or timed out connections and 5xx responses). The default path is the
+async station feed; pass --cookie 'sessionid=...' to load endpoints behind a
+login, such as /rentals/reservation/<pk>/status/.
+"""
+import argparse
+import asyncio
+import importlib.util
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from benchmarks.common import BASE_DIR
+
+
+PROFILES = ('wsgi', 'asgi')
+
+
+def start_server(profile, port, workers, settings_module):
+    env = dict(
+        os.environ,
+        SERVER_PROFILE=profile,
+        PORT=str(port),
+        WEB_CONCURRENCY=str(workers),
+        DJANGO_SETTINGS_MODULE=settings_module,
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'config/gunicorn.py'],
+        cwd=BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_listening(port, server, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f'gunicorn exited with status {server.returncode}')
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=0.5).close()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'gunicorn did not listen on port {port} within {timeout}s')
+
+
+async def fetch(port, request, timeout):
+    """Status code of one request on a fresh connection"""
+    reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+    try:
+        writer.write(request)
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+        return int(status_line.split()[1])
+    finally:
+        writer.close()
+
+
+async def client(port, request, timeout, until, timings, failures):
+    while time.monotonic() < until:
+        start = time.perf_counter()
+        try:
+            status = await fetch(port, request, timeout)
+        except (OSError, asyncio.TimeoutError, IndexError, ValueError):
+            status = None
+        if status is None or status >= 500:
+            failures.append(status)
+        else:
+            timings.append((time.perf_counter() - start) * 1000)
+
+
+async def run_level(port, request, concurrency, duration, timeout):
+    timings, failures = [], []
+    until = time.monotonic() + duration
+    await asyncio.gather(*(
+        client(port, request, timeout, until, timings, failures)
+        for _ in range(concurrency)
+    ))
+    return timings, failures
+
+
+def percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[10, 50, 200])
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per concurrency level')
+    parser.add_argument('--timeout', type=float, default=10, help='Seconds before a request counts as failed')
+    parser.add_argument('--path', default='/stations/feed.json')
+    parser.add_argument('--cookie', default='', help='Cookie header to send, e.g. sessionid=...')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--settings', default='config.settings.development')
+    parser.add_argument('--profiles', nargs='+', choices=PROFILES, default=list(PROFILES))
+    args = parser.parse_args()
+
+    headers = [f'GET {args.path} HTTP/1.1', 'Host: localhost', 'Connection: close']
+    if args.cookie:
+        headers.append(f'Cookie: {args.cookie}')
+    request = ('\r\n'.join(headers) + '\r\n\r\n').encode()
+
+    print(f'\n{args.path}: {args.workers} workers, {args.duration:g}s per level')
+    print(f"{'':<16} {'req/s':>10} {'median ms':>10} {'p99 ms':>10} {'failed':>10}")
+    for profile in args.profiles:
+        if profile == 'asgi' and importlib.util.find_spec('uvicorn') is None:
+            print(f'{profile:<16} skipped: uvicorn is not installed')
+            continue
+        server = start_server(profile, args.port, args.workers, args.settings)
+        try:
+            wait_until_listening(args.port, server)
+            for concurrency in args.concurrency:
+                timings, failures = asyncio.run(
+                    run_level(args.port, request, concurrency, args.duration, args.timeout)
+                )
+                ordered = sorted(timings) or [float('nan')]
+                label = f'{profile} x{concurrency}'
+                print(
+                    f'{label:<16} {len(timings) / args.duration:>10.1f} '
+                    f'{statistics.median(ordered):>10.3f} {percentile(ordered, 0.99):>10.3f} {len(failures):>10}'
+                )
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
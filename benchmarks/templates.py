@@ -0,0 +1,140 @@
+"""
+Benchmark page template rendering with and without fragment caching
+Usage: python -m benchmarks.templates [--stations 24] [--bikes 600] [--repeat 200]
+
+Each page's context is built once by its view, then only the template render
+is timed: first with every fragment re-rendered and templates re-read by the
+plain loaders (the old behaviour), then with the cached loader alone, then
+with warm fragment caches as well.
+"""
+import argparse
+import random
+
+from benchmarks.common import report, setup_django, test_database, timed
+
+
+PLAIN_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+CACHED_LOADERS = [('django.template.loaders.cached.Loader', PLAIN_LOADERS)]
+
+
+def build_fleet(stations, bikes, seed):
+    from django.contrib.auth import get_user_model
+    from apps.bicycles.models import Bicycle
+    from apps.stations.models import Station
+
+    rng = random.Random(seed)
+    station_objects = [
+        Station.objects.create(
+            name=f'Bench Station {index}',
+            code=f'B{index}',
+            address='Synthetic',
+            description='A synthetic station used for benchmarking.',
+            latitude=round(-1.29 + rng.uniform(-0.02, 0.02), 6),
+            longitude=round(36.82 + rng.uniform(-0.02, 0.02), 6),
+            capacity=rng.choice([20, 30, 40]),
+            operating_hours='Mon-Fri 6:00 AM - 10:00 PM; Sat-Sun 8:00 AM - 6:00 PM',
+        )
+        for index in range(stations)
+    ]
+    Bicycle.objects.bulk_create([
+        Bicycle(
+            name=f'Bench bike {index}',
+            model='Synthetic',
+            serial_number=f'BENCH-{index}',
+            slug=f'bench-{index}',
+            hourly_rate=rng.choice([40, 50, 80, 150]),
+            gear_count=rng.choice([1, 7, 21]),
+            status=rng.choice(['available', 'available', 'in-use', 'maintenance']),
+            current_station=rng.choice(station_objects),
+        )
+        for index in range(bikes)
+    ])
+    return get_user_model().objects.create_user(
+        username='bench', email='bench@example.com', password='bench',
+        university_id='BENCH001', is_verified=True, is_staff=True,
+    )
+
+
+def page_renderers(user):
+    """(label, render function) pairs; each render reuses one view's context"""
+    from django.contrib.sessions.backends.cache import SessionStore
+    from django.template.loader import get_template
+    from django.test import RequestFactory
+    from django.views.generic import TemplateView
+    from apps.bicycles.models import Bicycle
+    from apps.bicycles.views import BicycleDetailView, BicycleListView
+    from apps.stations.views import StationListView
+
+    factory = RequestFactory()
+    pages = [
+        ('home.html (base)', TemplateView.as_view(template_name='home.html'), '/', {}),
+        ('bicycles/bicycle_list.html', BicycleListView.as_view(), '/bicycles/?status=', {}),
+        ('bicycles/bicycle_detail.html', BicycleDetailView.as_view(), '/bicycles/x/',
+         {'slug': Bicycle.objects.values_list('slug', flat=True).first()}),
+        ('stations/station_list.html', StationListView.as_view(), '/stations/', {}),
+    ]
+
+    renderers = []
+    for label, view, path, kwargs in pages:
+        request = factory.get(path)
+        request.user = user
+        request.session = SessionStore()
+        response = view(request, **kwargs)
+        context = response.context_data
+        template_name = response.template_name
+        if not isinstance(template_name, str):
+            template_name = template_name[0]
+        # Render once so lazy querysets in the context are evaluated before timing
+        get_template(template_name).render(context, request)
+
+        def render(template_name=template_name, context=context, request=request):
+            return get_template(template_name).render(context, request)
+        renderers.append((label, render))
+    return renderers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--stations', type=int, default=24)
+    parser.add_argument('--bikes', type=int, default=600)
+    parser.add_argument('--repeat', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.test.utils import override_settings
+
+    def templates_with(loaders):
+        options = dict(settings.TEMPLATES[0]['OPTIONS'], loaders=loaders)
+        return [dict(settings.TEMPLATES[0], APP_DIRS=False, OPTIONS=options)]
+
+    modes = [
+        ('before', PLAIN_LOADERS, 'django.core.cache.backends.dummy.DummyCache'),
+        ('cached loader', CACHED_LOADERS, 'django.core.cache.backends.dummy.DummyCache'),
+        ('after', CACHED_LOADERS, 'django.core.cache.backends.locmem.LocMemCache'),
+    ]
+
+    with test_database():
+        user = build_fleet(args.stations, args.bikes, args.seed)
+        results = {}
+        for mode, loaders, fragment_backend in modes:
+            caches = dict(settings.CACHES, template_fragments={'BACKEND': fragment_backend})
+            with override_settings(
+                TEMPLATES=templates_with(loaders), CACHES=caches,
+                FRAGMENT_CACHE_SECONDS=3600, SESSION_ENGINE='django.contrib.sessions.backends.cache',
+                # No collectstatic manifest is needed to resolve {% static %} URLs
+                STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+            ):
+                for label, render in page_renderers(user):
+                    results.setdefault(label, []).append((mode, timed(render, args.repeat)))
+
+        for label, rows in results.items():
+            report(f'{label}: {args.stations} stations, {args.bikes} bicycles', rows)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Gunicorn settings for both serving profiles
+Usage: gunicorn -c config/gunicorn.py
+
+SERVER_PROFILE=wsgi (the default) runs config.wsgi with sync workers, one
+request per worker at a time. SERVER_PROFILE=asgi runs config.asgi with
+uvicorn workers: async views (reservation status polls, the station feed,
+the API) wait on the database or cache without holding the worker, so one
+worker serves many slow or idle connections. Sync views still work under
+ASGI, Django runs them in a thread.
+
+ASGI is opt-in because of database connections. Sync workers keep theirs
+open between requests (DB_CONN_MAX_AGE, 600 s in production). Under ASGI
+each request may run on a different thread, so Django cannot reuse them:
+DB_CONN_MAX_AGE defaults to 0 and every request opens a new PostgreSQL
+connection, which costs a few milliseconds and, with many connections
+waiting, can exhaust max_connections. Only choose asgi with a pooler such as
+PgBouncer in front of the database (DB_POOL_MODE=transaction), or when the
+async views' slow connections matter more than the extra connects.
+
+Worker count comes from WEB_CONCURRENCY (gunicorn's own default is 1).
+
+Workers write Prometheus metrics to a fresh PROMETHEUS_MULTIPROC_DIR so the
+/metrics endpoint adds up every worker (see core.metrics).
+"""
+import os
+import shutil
+import tempfile
+
+SERVER_PROFILE = os.environ.get('SERVER_PROFILE', 'wsgi')
+
+if SERVER_PROFILE == 'asgi':
+    wsgi_app = 'config.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'config.wsgi:application'
+    worker_class = 'sync'
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+keepalive = 5
+# Recycle workers now and then so slow leaks cannot build up
+max_requests = 1000
+max_requests_jitter = 100
+
+# Set before the workers fork and import prometheus_client
+OWNS_METRICS_DIR = 'PROMETHEUS_MULTIPROC_DIR' not in os.environ
+if OWNS_METRICS_DIR:
+    os.environ['PROMETHEUS_MULTIPROC_DIR'] = tempfile.mkdtemp(prefix='prometheus-')
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def on_exit(server):
+    if OWNS_METRICS_DIR:
+        shutil.rmtree(os.environ['PROMETHEUS_MULTIPROC_DIR'], ignore_errors=True)
\ No newline at end of file
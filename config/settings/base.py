@@ -33,15 +33,24 @@ INSTALLED_APPS = [
     'apps.stations',
     'apps.payments',
     'apps.api',
+    'apps.events',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.RequestIdMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'core.middleware.MetricsMiddleware',
+    'core.middleware.QueryInstrumentationMiddleware',
+    'core.middleware.ReplicaRoutingMiddleware',
+    'core.middleware.CompressionMiddleware',
+    'django.middleware.http.ConditionalGetMiddleware',
+    'core.middleware.AnonymousPageCacheMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -61,14 +70,30 @@ TEMPLATES = [
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
                 'django.template.context_processors.media',
+                'core.context_processors.fragment_cache',
             ],
         },
     },
 ]
 
 WSGI_APPLICATION = 'config.wsgi.application'
+ASGI_APPLICATION = 'config.asgi.application'
+
+# Serving profile: 'wsgi' (gunicorn sync workers) or 'asgi' (uvicorn workers
+# under gunicorn), see config/gunicorn.py
+SERVER_PROFILE = config('SERVER_PROFILE', default='wsgi')
 
 # Database
+# Connections persist for DB_CONN_MAX_AGE seconds and are health-checked
+# before reuse. DB_POOL_MODE=transaction is for PgBouncer transaction
+# pooling: server-side cursors are disabled and core.db.stream_values()
+# pages by keyset instead. Under ASGI connections are not shared between
+# requests, so they are closed after each one unless DB_CONN_MAX_AGE says
+# otherwise; put PgBouncer in front to pool them.
+DB_CONN_MAX_AGE = config('DB_CONN_MAX_AGE', default=0 if SERVER_PROFILE == 'asgi' else 60, cast=int)
+DB_POOL_MODE = config('DB_POOL_MODE', default='session')
+DB_CONNECT_TIMEOUT = config('DB_CONNECT_TIMEOUT', default=5, cast=int)
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
@@ -77,9 +102,32 @@ DATABASES = {
         'PASSWORD': config('DB_PASSWORD', default=''),
         'HOST': config('DB_HOST', default='localhost'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
+        'DISABLE_SERVER_SIDE_CURSORS': DB_POOL_MODE == 'transaction',
+        'OPTIONS': {
+            'connect_timeout': DB_CONNECT_TIMEOUT,
+        },
     }
 }
 
+# Read replica (optional)
+# With DB_REPLICA_HOST set, GET/HEAD requests read from the 'replica' alias
+# through core.routers.PrimaryReplicaRouter. Visitors are pinned to the
+# primary for REPLICA_PIN_SECONDS after a write, and every read falls back
+# to the primary while the replica lags more than REPLICA_MAX_LAG_SECONDS.
+DATABASE_ROUTERS = ['core.routers.PrimaryReplicaRouter']
+REPLICA_PIN_SECONDS = config('REPLICA_PIN_SECONDS', default=5, cast=int)
+REPLICA_MAX_LAG_SECONDS = config('REPLICA_MAX_LAG_SECONDS', default=2, cast=float)
+
+if config('DB_REPLICA_HOST', default=''):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=config('DB_REPLICA_HOST'),
+        PORT=config('DB_REPLICA_PORT', default=DATABASES['default']['PORT']),
+        TEST={'MIRROR': 'default'},
+    )
+
 # Custom User Model
 AUTH_USER_MODEL = 'accounts.User'
 
@@ -156,6 +204,80 @@ REST_FRAMEWORK = {
     'PAGE_SIZE': 20,
 }
 
+# Cache
+# Shared Redis cache when REDIS_URL is set, per-process memory otherwise; the
+# core.cache backends count hits and misses for the metrics endpoint
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.cache.LocMemCache',
+        }
+    }
+
+# Bicycle Browser Settings
+FACET_CACHE_SECONDS = 60
+
+# Public Page Cache Settings
+PUBLIC_PAGE_CACHE_SECONDS = 300  # Whole-page cache for @public_page views, cookie-less visitors only
+
+# Template Fragment Cache Settings
+# Fragment keys include updated_at (and live counts), so edits invalidate them
+FRAGMENT_CACHE_SECONDS = 3600
+
+# Station Map Feed Settings
+STATION_FEED_MAX_AGE = 5  # Seconds clients may reuse the feed before revalidating
+
+# Query Instrumentation Settings
+# A sampled request logs its query count and DB time to 'core.queries', and a
+# warning when it exceeds QUERY_BUDGET or repeats one SQL shape (a likely N+1)
+QUERY_SAMPLE_RATE = config('QUERY_SAMPLE_RATE', default=0.01, cast=float)  # Fraction of requests recorded
+QUERY_BUDGET = 50  # Queries per request
+QUERY_REPEAT_THRESHOLD = 5
+QUERY_SERVER_TIMING = config('QUERY_SERVER_TIMING', default=False, cast=bool)
+
+# Profiling Settings
+# Staff profile a request with ?_profile=1 or 'X-Profile: 1'; PROFILE_SAMPLE_RATE
+# profiles a fraction of all requests. Results are listed at /admin/profiles/
+PROFILE_SAMPLE_RATE = config('PROFILE_SAMPLE_RATE', default=0.0, cast=float)
+PROFILE_INTERVAL_MS = 5  # Stack sampling interval
+PROFILE_KEEP = 100  # Profiles listed on the admin page
+PROFILE_RETENTION_SECONDS = 24 * 60 * 60
+
+# Metrics Settings
+# Prometheus scrapes /metrics with 'Authorization: Bearer <METRICS_TOKEN>';
+# without a token the endpoint is only served when DEBUG is on
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Domain Event Settings
+# Projections wait this long for a missing event id, which a transaction may
+# still be committing, before taking it for a rollback (see apps.events.projector)
+PROJECTION_GAP_SECONDS = 30
+
+# Partition Settings (PostgreSQL, once partition_tables --apply has run)
+# maintain_partitions keeps this many months of partitions ready ahead and
+# retires months older than each table's retention, by 'drop', 'detach' or
+# 'archive' (see core.partitioning); 0 months keeps every month. Payments
+# still point at their rentals, so rentals are kept unless configured
+PARTITION_MONTHS_AHEAD = 3
+PARTITION_RETENTION = {
+    'rentals_reservation': (
+        config('RESERVATION_RETENTION_MONTHS', default=3, cast=int),
+        config('RESERVATION_RETENTION_MODE', default='drop'),
+    ),
+    'rentals_rental': (
+        config('RENTAL_RETENTION_MONTHS', default=0, cast=int),
+        config('RENTAL_RETENTION_MODE', default='archive'),
+    ),
+}
+
 # Reservation Settings
 RESERVATION_EXPIRY_MINUTES = 30
 
@@ -163,6 +285,21 @@ RESERVATION_EXPIRY_MINUTES = 30
 RENTAL_LATE_FEE_RATE = 0.5  # 50% of hourly rate per hour after 24 hours
 RENTAL_OVERDUE_HOURS = 24
 
+# Maintenance Settings
+MAINTENANCE_INTERVAL_DAYS = 90
+MAINTENANCE_INTERVAL_KM = 500
+MAINTENANCE_INTERVAL_RENTALS = 150
+MAINTENANCE_HARD_LIMIT_FACTOR = 1.5  # Bikes past 1.5x any interval are pulled from service
+
+# Rebalancing Settings
+REBALANCE_TARGET_FILL = 0.5  # Aim for half of each station's docks holding available bikes
+REBALANCE_MIN_IMBALANCE = 2  # Ignore stations within 2 bikes of their target
+REBALANCE_TRUCK_CAPACITY = 12
+
+# Forecast Settings
+FORECAST_HALF_LIFE_WEEKS = 8  # A rental counts half as much after 8 weeks
+FORECAST_HORIZON_HOURS = 3  # Look-ahead used for rebalancing targets
+
 # Payment Settings
 MPESA_CONSUMER_KEY = config('MPESA_CONSUMER_KEY', default='')
 MPESA_CONSUMER_SECRET = config('MPESA_CONSUMER_SECRET', default='')
@@ -183,21 +320,32 @@ CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
 
 # Logging
+# Handlers run on a background thread in each process (see core.log); the
+# file is JSON lines, rotated by size under a lock shared by all workers
+LOGGING_CONFIG = 'core.log.configure'
+LOG_MAX_BYTES = config('LOG_MAX_BYTES', default=10 * 1024 * 1024, cast=int)
+LOG_BACKUP_COUNT = config('LOG_BACKUP_COUNT', default=5, cast=int)
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
     'formatters': {
         'verbose': {
-            'format': '{levelname} {asctime} {module} {message}',
+            'format': '{levelname} {asctime} {module} [{request_id}] {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'core.log.JsonFormatter',
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            'class': 'core.log.ConcurrentRotatingFileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'maxBytes': LOG_MAX_BYTES,
+            'backupCount': LOG_BACKUP_COUNT,
+            'formatter': 'json',
         },
         'console': {
             'level': 'INFO',
@@ -7,9 +7,27 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'CONN_MAX_AGE': DB_CONN_MAX_AGE,
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Try replica routing locally against a copy of db.sqlite3
+if config('DB_REPLICA_SQLITE', default=''):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        NAME=BASE_DIR / config('DB_REPLICA_SQLITE'),
+        TEST={'MIRROR': 'default'},
+    )
+
+# Always re-render pages and fragments so template edits show up immediately
+PUBLIC_PAGE_CACHE_SECONDS = 0
+FRAGMENT_CACHE_SECONDS = 0
+
+# Record every request's queries and show them in the browser's network panel
+QUERY_SAMPLE_RATE = 1.0
+QUERY_SERVER_TIMING = True
+
 # Console email backend for development
 EMAIL_BACKEND = 'django.core.mail.backends.console.EmailBackend'
 
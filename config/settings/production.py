@@ -16,13 +16,41 @@ SECURE_HSTS_PRELOAD = True
 
 # Database from environment
 DATABASES['default'] = dj_database_url.config(
-    conn_max_age=600,
+    conn_max_age=config('DB_CONN_MAX_AGE', default=0 if SERVER_PROFILE == 'asgi' else 600, cast=int),
     conn_health_checks=True,
 )
+DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = DB_POOL_MODE == 'transaction'
+if DATABASES['default'].get('ENGINE') == 'django.db.backends.postgresql':
+    DATABASES['default'].setdefault('OPTIONS', {})['connect_timeout'] = DB_CONNECT_TIMEOUT
+
+# Read replica from environment (optional)
+if config('REPLICA_DATABASE_URL', default=''):
+    DATABASES['replica'] = dict(
+        dj_database_url.parse(
+            config('REPLICA_DATABASE_URL'),
+            conn_max_age=DATABASES['default']['CONN_MAX_AGE'],
+            conn_health_checks=True,
+        ),
+        DISABLE_SERVER_SIDE_CURSORS=DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'],
+        OPTIONS=dict(DATABASES['default'].get('OPTIONS', {})),
+        TEST={'MIRROR': 'default'},
+    )
+elif 'replica' in DATABASES:
+    # A DB_REPLICA_HOST replica of the base settings' database, not of DATABASE_URL
+    del DATABASES['replica']
 
 # Allow all hosts in production (Render provides proper host)
 ALLOWED_HOSTS = ['*']
 
+# Templates - compile each template once per process
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+
 # Static files - use WhiteNoise
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
@@ -3,13 +3,19 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from django.views.generic import TemplateView
+from core.decorators import public_page
+from apps.events.views import KpiDashboardView
+from core.views import MetricsView, ProfileDownloadView, ProfileListView
 
 urlpatterns = [
     # Admin
+    path('admin/profiles/', ProfileListView.as_view(), name='profile-list'),
+    path('admin/profiles/<str:request_id>/', ProfileDownloadView.as_view(), name='profile-download'),
+    path('admin/kpis/', KpiDashboardView.as_view(), name='kpi-dashboard'),
     path('admin/', admin.site.urls),
     
     # Homepage
-    path('', TemplateView.as_view(template_name='home.html'), name='home'),
+    path('', public_page(TemplateView.as_view(template_name='home.html')), name='home'),
     
     # Apps
     path('accounts/', include('apps.accounts.urls')),
@@ -19,6 +25,9 @@ urlpatterns = [
     
     # API (optional)
     path('api/', include('apps.api.urls')),
+    
+    # Prometheus metrics
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
 # Serve media files in development
@@ -0,0 +1,53 @@
+"""
+Cache backends that count hits and misses
+
+Same as Django's Redis and local-memory backends, but every get() and
+get_many() adds the keys it found and missed to the cache_lookups_total
+metric, so the hit ratio of pages, fragments, facets, sessions and the
+station feed can be graphed (see core.metrics).
+"""
+from django.core.cache.backends import locmem, redis
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+
+from .metrics import CACHE_LOOKUPS
+
+
+_MISSING = object()
+CACHE_HITS = CACHE_LOOKUPS.labels(result='hit')
+CACHE_MISSES = CACHE_LOOKUPS.labels(result='miss')
+
+
+class CountedLookupsMixin:
+
+    def get(self, key, default=None, version=None):
+        value = super().get(key, _MISSING, version)
+        if value is _MISSING:
+            CACHE_MISSES.inc()
+            return default
+        CACHE_HITS.inc()
+        return value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, _MISSING, version)
+        if value is not _MISSING:
+            return value
+        if callable(default):
+            default = default()
+        self.add(key, default, timeout=timeout, version=version)
+        # Re-read in case another process added first; not a lookup of its own
+        return super().get(key, default, version)
+
+
+class RedisCache(CountedLookupsMixin, redis.RedisCache):
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = super().get_many(keys, version)
+        CACHE_HITS.inc(len(found))
+        CACHE_MISSES.inc(len(keys) - len(found))
+        return found
+
+
+class LocMemCache(CountedLookupsMixin, locmem.LocMemCache):
+    # The inherited get_many() counts each key through get()
+    pass
\ No newline at end of file
@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def fragment_cache(request):
+    """Expose the template fragment cache timeout to {% cache %} tags"""
+    return {'fragment_cache_seconds': settings.FRAGMENT_CACHE_SECONDS}
\ No newline at end of file
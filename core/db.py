@@ -0,0 +1,66 @@
+"""
+Streaming large querysets under any connection pooling mode
+
+QuerySet.iterator() streams PostgreSQL rows from a server-side (named)
+cursor. Behind PgBouncer in transaction pooling mode those cursors are
+disabled (DISABLE_SERVER_SIDE_CURSORS, set by DB_POOL_MODE=transaction),
+because the server connection may change between transactions, and
+iterator() would then load the whole result into memory. stream_values()
+keeps memory flat either way: it uses iterator() where that streams and
+otherwise pages through the rows by keyset on the ordering columns.
+"""
+from functools import reduce
+from operator import or_
+
+from django.db import connections
+from django.db.models import Q
+
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def streams_with_iterator(using):
+    """Whether QuerySet.iterator() reads rows incrementally on this connection"""
+    connection = connections[using]
+    if connection.vendor == 'postgresql':
+        return not connection.settings_dict.get('DISABLE_SERVER_SIDE_CURSORS')
+    return connection.features.can_use_chunked_reads
+
+
+def keyset_after(keys, values):
+    """Rows strictly after `values` in ascending `keys` order"""
+    return reduce(or_, (
+        Q(**{f'{key}__gt': value}, **dict(zip(keys[:position], values[:position])))
+        for position, (key, value) in enumerate(zip(keys, values))
+    ))
+
+
+def keyset_values(queryset, fields, order_by=('pk',), chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield tuples of `fields` one page at a time, each page starting after the last
+    order_by columns must be ascending, non-null and unique together.
+    """
+    keys = list(order_by)
+    width = len(fields)
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(keyset_after(keys, last))
+        rows = list(page.order_by(*keys).values_list(*fields, *keys)[:chunk_size])
+        for row in rows:
+            yield row[:width]
+        if len(rows) < chunk_size:
+            return
+        last = rows[-1][width:]
+
+
+def stream_values(queryset, fields, order_by=None, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Yield tuples of `fields` for every row of a queryset in constant memory
+    order_by is the row order to keep (default: any order); when paging by
+    keyset it must be ascending and unique, so end it with the primary key.
+    """
+    if streams_with_iterator(queryset.db):
+        if order_by:
+            queryset = queryset.order_by(*order_by)
+        return queryset.values_list(*fields).iterator(chunk_size=chunk_size)
+    return keyset_values(queryset, fields, order_by or ('pk',), chunk_size)
\ No newline at end of file
@@ -0,0 +1,14 @@
+def public_page(view=None, timeout=None):
+    """
+    Let AnonymousPageCacheMiddleware cache a view for cookie-less visitors
+    timeout defaults to PUBLIC_PAGE_CACHE_SECONDS.
+    Usage: public_page(TemplateView.as_view(...)) or @public_page(timeout=60)
+    """
+    def decorator(view_func):
+        view_func.is_public_page = True
+        view_func.public_page_timeout = timeout
+        return view_func
+
+    if view is not None:
+        return decorator(view)
+    return decorator
\ No newline at end of file
@@ -1,7 +1,14 @@
+import logging
+import time
+
 from django.core.mail import EmailMultiAlternatives
 from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils.html import strip_tags
+from .metrics import EMAIL_SEND_LATENCY, EMAILS_SENDING
+
+
+logger = logging.getLogger(__name__)
 
 
 def send_email(subject, template_name, context, recipient_list):
@@ -20,12 +27,19 @@ def send_email(subject, template_name, context, recipient_list):
     
     email.attach_alternative(html_content, "text/html")
     
+    start = time.perf_counter()
     try:
-        email.send()
-        return True
-    except Exception as e:
-        print(f"Error sending email: {e}")
+        with EMAILS_SENDING.track_inprogress():
+            email.send()
+    except Exception:
+        EMAIL_SEND_LATENCY.labels(result='failed').observe(time.perf_counter() - start)
+        logger.exception(
+            'Error sending email %r to %d recipient(s)', subject, len(recipient_list),
+            extra={'template': template_name},
+        )
         return False
+    EMAIL_SEND_LATENCY.labels(result='sent').observe(time.perf_counter() - start)
+    return True
 
 
 def send_reservation_email(reservation):
@@ -0,0 +1,109 @@
+"""
+Per-request database query instrumentation
+
+QueryRecorder hooks into every database connection with execute_wrapper()
+and counts the queries of one request, their total time and how often each
+SQL shape ran. A shape is the SQL without its parameters and with IN lists
+collapsed, so the same query for different rows counts as a repeat. When a
+shape runs a second time the recorder notes where from: the innermost app
+code line and template line on the stack. Shapes repeated
+QUERY_REPEAT_THRESHOLD times or more are reported as likely N+1 queries.
+
+The stack is only inspected once per repeated shape, and the recorder is
+only installed on sampled requests (see QueryInstrumentationMiddleware).
+QueryTimer, which only adds up database time, is cheap enough to run on
+every request (see MetricsMiddleware).
+"""
+import re
+import sys
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.db import connections
+from django.template.base import Node
+
+
+PROJECT_DIR = str(Path(__file__).resolve().parent.parent)
+IN_LIST = re.compile(r'\(\s*%s(?:\s*,\s*%s)+\s*\)')
+RENDER_NODE_CODE = Node.render_annotated.__code__
+
+
+def sql_shape(sql):
+    """The SQL text shared by every execution of the same query"""
+    return IN_LIST.sub('(%s, ...)', sql)
+
+
+def is_app_code(filename):
+    return filename.startswith(PROJECT_DIR) and 'site-packages' not in filename and filename != __file__
+
+
+def query_origin(frame):
+    """(app code line, template line) of the innermost frames issuing a query"""
+    code_line = template_line = None
+    while frame is not None and (code_line is None or template_line is None):
+        code = frame.f_code
+        if code is RENDER_NODE_CODE:
+            node = frame.f_locals.get('self')
+            origin, token = getattr(node, 'origin', None), getattr(node, 'token', None)
+            if template_line is None and origin is not None and token is not None:
+                template_line = f'{origin.template_name}:{token.lineno}'
+        elif code_line is None and is_app_code(code.co_filename):
+            code_line = f'{Path(code.co_filename).relative_to(PROJECT_DIR)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return code_line, template_line
+
+
+class QueryTimer:
+    """Adds up the time of every query run while installed with record()"""
+
+    def __init__(self):
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+
+    @contextmanager
+    def record(self):
+        """Record the queries of every database alias inside the block"""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            yield self
+
+    @property
+    def duration_ms(self):
+        return self.duration * 1000
+
+
+class QueryRecorder(QueryTimer):
+    """Also counts queries and SQL shapes, and locates repeated ones"""
+
+    def __init__(self):
+        super().__init__()
+        self.count = 0
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        try:
+            return super().__call__(execute, sql, params, many, context)
+        finally:
+            self.count += 1
+            shape = sql_shape(sql)
+            self.shapes[shape] += 1
+            if self.shapes[shape] == 2:
+                self.origins[shape] = query_origin(sys._getframe(1))
+
+    def repeated(self, threshold):
+        """Likely N+1s: dicts of sql, count, code and template, most repeated first"""
+        return [
+            {'sql': shape, 'count': count, 'code': self.origins[shape][0], 'template': self.origins[shape][1]}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
\ No newline at end of file
@@ -0,0 +1,189 @@
+"""
+Non-blocking structured logging
+
+configure() is the LOGGING_CONFIG function. It applies LOGGING as usual,
+then moves the root logger's handlers behind a bounded queue. Logging calls
+only format the message and enqueue the record, and a QueueListener thread
+in each process does the slow console and file writes. If the queue fills up
+because the disk stalls, new records are dropped and counted in
+log_records_dropped_total; requests never wait on the disk.
+
+Records carry the id of the request that logged them. RequestIdMiddleware
+sets the id and the queue handler stamps it on each record in the
+request's own thread. JsonFormatter writes one JSON object per line, with
+any extra= fields included.
+
+ConcurrentRotatingFileHandler rotates by size under an flock() shared by
+every worker process writing the same file. A worker notices a rotation
+done by another one and reopens the file.
+"""
+import atexit
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import re
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from .metrics import LOG_RECORDS_DROPPED
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+QUEUE_SIZE = 10000
+NO_REQUEST = '-'
+REQUEST_ID_HEADER = 'X-Request-ID'
+# Accept ids from a proxy or load balancer if they look like ids
+VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{8,64}$')
+# LogRecord attributes that are not extra= fields
+RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+_request_id = ContextVar('request_id', default=NO_REQUEST)
+_listener = None
+
+
+def new_request_id(header_value=None):
+    """The client's request id if it is well formed, otherwise a fresh one"""
+    if header_value and VALID_REQUEST_ID.match(header_value):
+        return header_value
+    return uuid.uuid4().hex
+
+
+def set_request_id(request_id):
+    """Tag log records in this context with request_id; returns a reset token"""
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token):
+    _request_id.reset(token)
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp records with the current request id"""
+
+    def filter(self, record):
+        record.request_id = _request_id.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including extra= fields"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'request_id': getattr(record, 'request_id', NO_REQUEST),
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES and not name.startswith('_'):
+                entry[name] = value
+        return json.dumps(entry, default=str)
+
+
+class BackgroundQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the listener thread; drops them when the queue is full"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.addFilter(RequestIdFilter())
+
+    def prepare(self, record):
+        # Unlike QueueHandler, keep the traceback apart from the message
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+class ConcurrentRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that several processes can share"""
+
+    def __init__(self, filename, *args, **kwargs):
+        super().__init__(filename, *args, **kwargs)
+        self.lock_file = open(f'{self.baseFilename}.lock', 'a')
+
+    def emit(self, record):
+        if fcntl is None:
+            return super().emit(record)
+        try:
+            fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+            try:
+                self.reopen_if_rotated()
+                super().emit(record)
+                if self.stream:
+                    self.stream.flush()
+            finally:
+                fcntl.flock(self.lock_file, fcntl.LOCK_UN)
+        except Exception:
+            self.handleError(record)
+
+    def reopen_if_rotated(self):
+        """Follow a rotation done by another process"""
+        if self.stream is None:
+            return
+        try:
+            rotated = os.stat(self.baseFilename).st_ino != os.fstat(self.stream.fileno()).st_ino
+        except FileNotFoundError:
+            rotated = True
+        if rotated:
+            self.stream.close()
+            self.stream = self._open()
+
+    def close(self):
+        super().close()
+        self.lock_file.close()
+
+
+def stop_listener():
+    """Write out the records still queued and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_listener)
+
+
+def configure(logging_settings):
+    """LOGGING_CONFIG: dictConfig, then move the root handlers behind a queue"""
+    global _listener
+    stop_listener()
+    logging.config.dictConfig(logging_settings)
+
+    root = logging.getLogger()
+    handlers = list(root.handlers)
+    if not handlers:
+        return
+    log_queue = queue.Queue(QUEUE_SIZE)
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(BackgroundQueueHandler(log_queue))
+
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
\ No newline at end of file
@@ -0,0 +1,66 @@
+"""
+Prometheus metrics
+
+Metrics are kept in prometheus_client's registry in each process and scraped
+from MetricsView. With several gunicorn workers each worker has its own
+registry, so config/gunicorn.py points PROMETHEUS_MULTIPROC_DIR at a fresh
+directory: prometheus_client then writes every sample to memory-mapped files
+there and MetricsView adds up the files of all workers, dead ones included.
+Updating a metric is a dictionary lookup and a float add, so it is cheap
+enough for every request.
+"""
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+
+# Requests
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to respond to a request, by URL name',
+    ['url_name', 'method'], buckets=LATENCY_BUCKETS,
+)
+REQUESTS = Counter(
+    'http_requests_total', 'Responses by URL name and status class',
+    ['url_name', 'method', 'status'],
+)
+REQUEST_DB_TIME = Histogram(
+    'http_request_db_seconds', 'Database time spent in a request, by URL name',
+    ['url_name'], buckets=LATENCY_BUCKETS,
+)
+
+# Cache
+CACHE_LOOKUPS = Counter('cache_lookups_total', 'Cache keys read, by hit or miss', ['result'])
+
+# Email
+EMAIL_SEND_LATENCY = Histogram(
+    'email_send_duration_seconds', 'Time to hand one email to the mail backend',
+    ['result'], buckets=LATENCY_BUCKETS,
+)
+EMAILS_SENDING = Gauge(
+    'email_sends_in_progress', 'Emails waiting on the mail backend right now',
+    multiprocess_mode='livesum',
+)
+
+# Logging
+LOG_RECORDS_DROPPED = Counter('log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+# Rental funnel
+RESERVATION_EVENTS = Counter('reservations_total', 'Reservation state transitions', ['event'])
+RENTAL_EVENTS = Counter('rentals_total', 'Rental state transitions', ['event'])
+
+
+def registry():
+    """The registry to scrape: every worker's samples in multiprocess mode"""
+    if 'PROMETHEUS_MULTIPROC_DIR' not in os.environ:
+        return REGISTRY
+    collected = CollectorRegistry()
+    multiprocess.MultiProcessCollector(collected)
+    return collected
+
+
+def latest():
+    """(body, content type) of the text exposition format"""
+    return generate_latest(registry()), CONTENT_TYPE_LATEST
\ No newline at end of file
@@ -0,0 +1,422 @@
+"""
+Response caching and compression for public pages
+
+AnonymousPageCacheMiddleware keeps whole responses of views marked with
+@public_page in the shared cache, but only for cookie-less GET requests: a
+visitor with a session, CSRF or messages cookie always gets a freshly
+rendered page, so nothing rendered for a logged-in user is ever stored or
+served from the cache. Stored pages carry an ETag and Last-Modified, which
+ConditionalGetMiddleware turns into 304 responses.
+
+CompressionMiddleware compresses dynamic responses with Brotli when the
+client accepts it and the optional brotli package is installed, and falls
+back to Django's gzip middleware otherwise.
+
+ReplicaRoutingMiddleware lets read-only requests read from the replica
+database (see core.routers).
+
+QueryInstrumentationMiddleware logs the query count, database time and likely
+N+1 queries of a sample of requests (see core.instrumentation).
+
+MetricsMiddleware observes the latency and database time of every request
+for the Prometheus endpoint (see core.metrics).
+
+ProfilingMiddleware runs requests under a sampling profiler when a staff
+member asks for it, and a PROFILE_SAMPLE_RATE fraction of all requests
+(see core.profiling).
+
+RequestIdMiddleware gives every request an id that is added to its log
+records and returned in the X-Request-ID header (see core.log).
+"""
+import hashlib
+import logging
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.middleware.gzip import GZipMiddleware
+from django.urls import reverse
+from django.utils.cache import cc_delim_re, patch_cache_control, patch_vary_headers, set_response_etag
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.http import http_date
+
+from .instrumentation import QueryRecorder, QueryTimer
+from .log import REQUEST_ID_HEADER, new_request_id, reset_request_id, set_request_id
+from .metrics import REQUEST_DB_TIME, REQUEST_LATENCY, REQUESTS
+from .profiling import StackSampler, save_profile
+from .routers import reads_from_primary, reads_from_replica
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+query_logger = logging.getLogger('core.queries')
+
+PAGE_CACHE_PREFIX = 'public-page'
+MESSAGES_COOKIE_NAME = 'messages'
+PIN_PRIMARY_COOKIE_NAME = 'pin_primary'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'POST', 'PUT', 'PATCH', 'DELETE'))
+ACCEPTS_BROTLI = re.compile(r'\bbr\b')
+PROFILE_PARAMETER = '_profile'
+PROFILE_HEADER = 'X-Profile'
+
+
+def private_cookie_names():
+    """Cookies that mean the response may depend on who is asking"""
+    return {settings.SESSION_COOKIE_NAME, settings.CSRF_COOKIE_NAME, MESSAGES_COOKIE_NAME}
+
+
+def is_anonymous_request(request):
+    """A GET/HEAD request without any cookie that identifies the visitor"""
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    return not private_cookie_names() & set(request.COOKIES)
+
+
+def page_cache_key(request):
+    url = hashlib.md5(request.build_absolute_uri().encode()).hexdigest()
+    return f'{PAGE_CACHE_PREFIX}:{url}'
+
+
+def is_cacheable_response(response):
+    """A complete 200 response that sets no cookies and opts out of nothing"""
+    if response.status_code != 200 or response.streaming or response.cookies:
+        return False
+    cache_control = response.get('Cache-Control', '').lower()
+    if any(directive in cache_control for directive in ('private', 'no-store', 'no-cache')):
+        return False
+    # Cookie-less requests share one Cookie value; any other Vary header would need its own key
+    varies = {header.strip().lower() for header in cc_delim_re.split(response.get('Vary', '')) if header.strip()}
+    return varies <= {'cookie'}
+
+
+class AnonymousPageCacheMiddleware(MiddlewareMixin):
+    """
+    Serve @public_page views to cookie-less visitors from the shared cache
+    Must sit above the session, CSRF and messages middleware so it sees the
+    cookies and Vary headers they add to the response.
+    """
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if not getattr(view_func, 'is_public_page', False) or not is_anonymous_request(request):
+            return None
+        timeout = view_func.public_page_timeout
+        timeout = settings.PUBLIC_PAGE_CACHE_SECONDS if timeout is None else timeout
+        if timeout <= 0:
+            return None
+        request._public_page_seconds = timeout
+
+        response = cache.get(page_cache_key(request))
+        if response is not None:
+            response['X-Page-Cache'] = 'hit'
+        return response
+
+    def process_response(self, request, response):
+        timeout = getattr(request, '_public_page_seconds', None)
+        if timeout is None or response.has_header('X-Page-Cache'):
+            return response
+        if request.method != 'GET' or not is_cacheable_response(response):
+            return response
+
+        set_response_etag(response)
+        if not response.has_header('Last-Modified'):
+            response['Last-Modified'] = http_date(time.time())
+        # Browsers revalidate every time, so logging in is never hidden by a stale copy
+        patch_cache_control(response, max_age=0, must_revalidate=True)
+        patch_vary_headers(response, ['Cookie'])
+
+        cache.set(page_cache_key(request), response, timeout)
+        response['X-Page-Cache'] = 'miss'
+        return response
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """Brotli for clients that accept it when brotli is installed, gzip otherwise"""
+
+    def process_response(self, request, response):
+        if brotli is None or not ACCEPTS_BROTLI.search(request.headers.get('Accept-Encoding', '')):
+            return super().process_response(request, response)
+        if response.streaming or response.has_header('Content-Encoding'):
+            return super().process_response(request, response)
+        if len(response.content) < 200:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        compressed = brotli.compress(response.content, quality=5)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Length'] = str(len(compressed))
+
+        # Same content under a different encoding: the ETag is only weakly equal
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = 'br'
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Read from the replica for safe requests, except right after the visitor wrote
+    Any other request pins the visitor to the primary for REPLICA_PIN_SECONDS
+    with a short-lived cookie, so the pages they see next include their writes.
+    Runs natively in both the WSGI and ASGI profiles.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def reads_from(self, request):
+        if request.method in SAFE_METHODS and PIN_PRIMARY_COOKIE_NAME not in request.COOKIES:
+            return reads_from_replica()
+        return reads_from_primary()
+
+    def pin_after_write(self, request, response):
+        if request.method not in SAFE_METHODS:
+            response.set_cookie(
+                PIN_PRIMARY_COOKIE_NAME, '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with self.reads_from(request):
+            response = self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        with self.reads_from(request):
+            response = await self.get_response(request)
+        return self.pin_after_write(request, response)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Log query statistics for a QUERY_SAMPLE_RATE fraction of requests
+    Every sampled request logs its view, query count and database time to the
+    'core.queries' logger; requests over QUERY_BUDGET queries or with SQL
+    repeated QUERY_REPEAT_THRESHOLD times log a warning naming the code and
+    template lines behind each repeat. With QUERY_SERVER_TIMING the numbers
+    are also sent in a Server-Timing header for the browser's network panel.
+    Queries run while a streaming response is consumed are not counted.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def is_sampled(self):
+        rate = settings.QUERY_SAMPLE_RATE
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self.is_sampled():
+            return self.get_response(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = self.get_response(request)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not self.is_sampled():
+            return await self.get_response(request)
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = await self.get_response(request)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        match = request.resolver_match
+        repeated = recorder.repeated(settings.QUERY_REPEAT_THRESHOLD)
+        stats = {
+            'method': request.method,
+            'path': request.path,
+            'view': match._func_path if match else None,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'db_ms': round(recorder.duration_ms, 2),
+            'repeated': repeated,
+        }
+        query_logger.info(
+            '%s %s: %d queries in %.1f ms', request.method, request.path, recorder.count, recorder.duration_ms,
+            extra={'query_stats': stats},
+        )
+        if recorder.count > settings.QUERY_BUDGET:
+            query_logger.warning(
+                '%s ran %d queries, over the budget of %d', stats['view'], recorder.count, settings.QUERY_BUDGET,
+                extra={'query_stats': stats},
+            )
+        for query in repeated:
+            query_logger.warning(
+                'Likely N+1 in %s: %d x %s (from %s, template %s)',
+                stats['view'], query['count'], query['sql'][:200], query['code'], query['template'],
+                extra={'query_stats': stats},
+            )
+
+        if settings.QUERY_SERVER_TIMING:
+            timing = f'db;dur={recorder.duration_ms:.1f};desc="{recorder.count} queries"'
+            if response.has_header('Server-Timing'):
+                timing = f"{response['Server-Timing']}, {timing}"
+            response['Server-Timing'] = timing
+        return response
+
+
+class MetricsMiddleware:
+    """
+    Observe latency, status and database time of every request, by URL name
+    Label values are bounded: requests that match no URL are 'unmatched' and
+    unusual methods are 'other'.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start = time.perf_counter()
+        timer = QueryTimer()
+        with timer.record():
+            response = self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, timer)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        timer = QueryTimer()
+        with timer.record():
+            response = await self.get_response(request)
+        self.observe(request, response, time.perf_counter() - start, timer)
+        return response
+
+    def observe(self, request, response, elapsed, timer):
+        match = request.resolver_match
+        if match is None:
+            url_name = 'unmatched'
+        else:
+            url_name = match.view_name if match.url_name else match.route
+        method = request.method if request.method in HTTP_METHODS else 'other'
+        REQUEST_LATENCY.labels(url_name, method).observe(elapsed)
+        REQUEST_DB_TIME.labels(url_name).observe(timer.duration)
+        REQUESTS.labels(url_name, method, f'{response.status_code // 100}xx').inc()
+
+
+class ProfilingMiddleware:
+    """
+    Profile a request and keep the result for the admin profiles page
+    Staff members opt in with ?_profile=1 or an 'X-Profile: 1' header, and
+    get an X-Profile-URL header pointing at the result; PROFILE_SAMPLE_RATE
+    profiles a random fraction of everyone's requests. Must sit below
+    AuthenticationMiddleware, so the middleware above it are not profiled.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def asks_for_profile(self, request):
+        return request.GET.get(PROFILE_PARAMETER) == '1' or request.headers.get(PROFILE_HEADER) == '1'
+
+    def is_sampled(self):
+        rate = settings.PROFILE_SAMPLE_RATE
+        return rate >= 1 or random.random() < rate
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        requested = self.asks_for_profile(request) and request.user.is_staff
+        if not (requested or self.is_sampled()):
+            return self.get_response(request)
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        with sampler.profile():
+            response = self.get_response(request)
+        return self.save(request, response, sampler, requested)
+
+    async def __acall__(self, request):
+        requested = self.asks_for_profile(request) and (await request.auser()).is_staff
+        if not (requested or self.is_sampled()):
+            return await self.get_response(request)
+        sampler = StackSampler(settings.PROFILE_INTERVAL_MS / 1000)
+        with sampler.profile():
+            response = await self.get_response(request)
+        return await sync_to_async(self.save)(request, response, sampler, requested)
+
+    def save(self, request, response, sampler, requested):
+        match = request.resolver_match
+        profile = sampler.result(
+            id=request.id,
+            method=request.method,
+            path=request.path,
+            view=match._func_path if match else None,
+            status=response.status_code,
+            user=request.user.get_username() if request.user.is_authenticated else None,
+            started=time.time() - sampler.wall_time,
+        )
+        save_profile(profile)
+        if requested:
+            response['X-Profile-URL'] = reverse('profile-download', args=[request.id])
+        return response
+
+
+class RequestIdMiddleware:
+    """
+    Correlate log records with the request that wrote them
+    Reuses a well-formed X-Request-ID from the proxy, otherwise makes one.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request.id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        token = set_request_id(request.id)
+        try:
+            response = self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
+
+    async def __acall__(self, request):
+        request.id = new_request_id(request.headers.get(REQUEST_ID_HEADER))
+        token = set_request_id(request.id)
+        try:
+            response = await self.get_response(request)
+        finally:
+            reset_request_id(token)
+        response[REQUEST_ID_HEADER] = request.id
+        return response
\ No newline at end of file
@@ -1,6 +1,7 @@
-from django.contrib.auth.mixins import UserPassesTestMixin
+from django.contrib.auth.mixins import AccessMixin, UserPassesTestMixin
 from django.shortcuts import redirect
 from django.contrib import messages
+from django.utils.cache import patch_vary_headers
 
 
 class AdminRequiredMixin(UserPassesTestMixin):
@@ -36,4 +37,48 @@ class ActiveRenterRequiredMixin(UserPassesTestMixin):
     
     def handle_no_permission(self):
         messages.error(self.request, 'You are not currently eligible to rent bicycles.')
-        return redirect('bicycles:list')
\ No newline at end of file
+        return redirect('bicycles:list')
+
+
+class HtmxPartialMixin:
+    """
+    Render only a fragment of the page for htmx requests aimed at it
+    htmx_target is the id of the element the fragment replaces; views check
+    self.is_partial to skip context that only feeds the surrounding layout.
+    """
+    partial_template_name = None
+    htmx_target = None
+    
+    @property
+    def is_partial(self):
+        htmx = getattr(self.request, 'htmx', None)
+        return bool(
+            htmx and
+            not htmx.history_restore_request and
+            htmx.target == self.htmx_target
+        )
+    
+    def get_template_names(self):
+        if self.is_partial:
+            return [self.partial_template_name]
+        return super().get_template_names()
+    
+    def render_to_response(self, context, **response_kwargs):
+        response = super().render_to_response(context, **response_kwargs)
+        # The same URL answers with a fragment or a full page
+        patch_vary_headers(response, ['HX-Request', 'HX-Target'])
+        return response
+
+
+class AsyncLoginRequiredMixin(AccessMixin):
+    """
+    LoginRequiredMixin for views whose handlers are async
+    The user is loaded with request.auser(), so the check never runs a
+    blocking query on the event loop. Handlers should await request.auser()
+    too instead of reading request.user.
+    """
+    async def dispatch(self, request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return self.handle_no_permission()
+        return await super().dispatch(request, *args, **kwargs)
\ No newline at end of file
@@ -0,0 +1,213 @@
+"""
+Operating hours parsing and evaluation
+
+Free-text station hours such as "6:00 AM - 10:00 PM", "24/7" or
+"Mon-Fri 6:00 AM - 10:00 PM; Sat 8:00 AM - 2:00 PM; Sun closed" are parsed
+once into a tuple of (weekday, opens_minute, closes_minute) intervals, with
+Monday as weekday 0 and minutes counted from local midnight (closes_minute is
+exclusive, at most 1440). Ranges that run past midnight are split across the
+two days. Parsing is memoised per string, so evaluating hours never re-parses.
+"""
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.utils import timezone
+
+
+MINUTES_PER_DAY = 24 * 60
+DAY_NAMES = ['mon', 'tue', 'wed', 'thu', 'fri', 'sat', 'sun']
+ALWAYS_OPEN = tuple((weekday, 0, MINUTES_PER_DAY) for weekday in range(7))
+ALWAYS_OPEN_WORDS = {'24/7', '24h', '24 hours', 'always open', 'open 24 hours'}
+
+DAY = r'(?:mon|tue|wed|thu|fri|sat|sun)[a-z]*\.?'
+DAY_RANGE = rf'{DAY}(?:\s*(?:-|–|to)\s*{DAY})?'
+DAY_SPEC = re.compile(rf'^\s*({DAY_RANGE}(?:\s*(?:,|&|and)\s*{DAY_RANGE})*)\s*:?\s*', re.IGNORECASE)
+TIME = r'\d{1,2}(?:[:.]\d{2})?\s*(?:[ap]\.?m\.?)?|noon|midnight'
+TIME_RANGE = re.compile(rf'({TIME})\s*(?:-|–|to)\s*({TIME})', re.IGNORECASE)
+# Rules are separated by ';', '|', new lines, or a comma that starts a new day spec
+RULE_SEPARATOR = re.compile(r'[;|\n]|,(?=\s*(?:mon|tue|wed|thu|fri|sat|sun))', re.IGNORECASE)
+
+
+def parse_days(spec):
+    """Weekday numbers named by a spec like 'Mon-Fri, Sun'"""
+    days = []
+    for part in re.split(r'\s*(?:,|&|\band\b)\s*', spec.strip().lower()):
+        bounds = re.split(r'\s*(?:-|–|\bto\b)\s*', part)
+        first = DAY_NAMES.index(bounds[0][:3])
+        last = DAY_NAMES.index(bounds[-1][:3])
+        days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+    return days
+
+
+def parse_time(value):
+    """Minutes after midnight for '6:00 AM', '6am', '18:30', 'noon' or 'midnight'"""
+    value = value.strip().lower().replace('.', ':')
+    if value == 'noon':
+        return 12 * 60
+    if value == 'midnight':
+        return 0
+
+    match = re.fullmatch(r'(\d{1,2})(?::(\d{2}))?\s*([ap])?:?m?:?', value)
+    if not match:
+        raise ValueError(f"Unrecognised time '{value}'")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            raise ValueError(f"Unrecognised time '{value}'")
+        hour = hour % 12 + (12 if meridiem == 'p' else 0)
+    if minute > 59 or hour > 24 or (hour == 24 and minute):
+        raise ValueError(f"Unrecognised time '{value}'")
+    return hour * 60 + minute
+
+
+def day_intervals(text):
+    """Intervals for a list of time ranges on a single day, as (start, end) minutes"""
+    text = text.strip().lower()
+    if text in ALWAYS_OPEN_WORDS or text in ('open', 'all day'):
+        return [(0, MINUTES_PER_DAY)]
+    if text in ('closed', 'close', 'shut'):
+        return []
+
+    ranges = TIME_RANGE.findall(text)
+    leftover = TIME_RANGE.sub('', text)
+    if not ranges or re.sub(r'[\s,&]|\band\b', '', leftover):
+        raise ValueError(f"Could not understand '{text}'")
+    return [(parse_time(start), parse_time(end)) for start, end in ranges]
+
+
+@lru_cache(maxsize=512)
+def parse_operating_hours(text):
+    """
+    Parse free-text hours into sorted (weekday, opens_minute, closes_minute) intervals
+    Raises ValueError when the text cannot be understood.
+    """
+    text = (text or '').strip()
+    if not text:
+        raise ValueError('Operating hours are empty')
+    if text.lower() in ALWAYS_OPEN_WORDS:
+        return ALWAYS_OPEN
+
+    # Later rules replace earlier ones for the days they name
+    schedule = {weekday: [] for weekday in range(7)}
+    # Days split off by a comma ('Mon, Wed 9-5') share the hours of the rule after them
+    pending_days = []
+    for rule in RULE_SEPARATOR.split(text):
+        if not rule.strip():
+            continue
+        match = DAY_SPEC.match(rule)
+        if match and not rule[match.end():].strip():
+            pending_days.extend(parse_days(match.group(1)))
+            continue
+        days = pending_days + parse_days(match.group(1)) if match else pending_days or range(7)
+        pending_days = []
+        ranges = day_intervals(rule[match.end():] if match else rule)
+        for weekday in days:
+            schedule[weekday] = ranges
+    if pending_days:
+        raise ValueError(f"No hours given for '{text}'")
+
+    intervals = []
+    for weekday, ranges in schedule.items():
+        for start, end in ranges:
+            if end == 0:
+                end = MINUTES_PER_DAY
+            if end > start:
+                intervals.append((weekday, start, end))
+            else:
+                # Runs past midnight into the next day
+                intervals.append((weekday, start, MINUTES_PER_DAY))
+                if end:
+                    intervals.append(((weekday + 1) % 7, 0, end))
+    return merge_intervals(intervals)
+
+
+def merge_intervals(intervals):
+    """Sort intervals and merge overlapping ones on the same day"""
+    merged = []
+    for weekday, start, end in sorted(intervals):
+        if merged and merged[-1][0] == weekday and start <= merged[-1][2]:
+            merged[-1] = (weekday, merged[-1][1], max(end, merged[-1][2]))
+        else:
+            merged.append((weekday, start, end))
+    return tuple(merged)
+
+
+def weekly_minute(moment):
+    """Minutes since Monday 00:00 local time"""
+    local = timezone.localtime(moment)
+    return local.weekday() * MINUTES_PER_DAY + local.hour * 60 + local.minute
+
+
+def is_open_at(intervals, moment=None):
+    """Whether the hours include a given moment (default: now)"""
+    minute = weekly_minute(moment or timezone.now())
+    weekday, minute_of_day = divmod(minute, MINUTES_PER_DAY)
+    return any(
+        day == weekday and start <= minute_of_day < end
+        for day, start, end in intervals
+    )
+
+
+def weekly_spans(intervals):
+    """Intervals as merged (start, end) minutes-of-week over two consecutive weeks"""
+    spans = []
+    for week in (0, 1):
+        for weekday, start, end in intervals:
+            offset = (week * 7 + weekday) * MINUTES_PER_DAY
+            if spans and offset + start <= spans[-1][1]:
+                spans[-1] = (spans[-1][0], max(spans[-1][1], offset + end))
+            else:
+                spans.append((offset + start, offset + end))
+    return spans
+
+
+def next_change(intervals, moment=None):
+    """
+    (open now, datetime of the next opening or closing) for a moment
+    The datetime is None when the hours never change (24/7 or never open).
+    """
+    moment = moment or timezone.now()
+    local = timezone.localtime(moment)
+    minute = weekly_minute(moment)
+    week_start = timezone.make_aware(
+        datetime.combine(local.date() - timedelta(days=local.weekday()), time.min)
+    )
+
+    spans = weekly_spans(intervals)
+    if not spans or spans == [(0, 2 * 7 * MINUTES_PER_DAY)]:
+        return bool(spans), None
+
+    def at(week_minute):
+        # Step through local days so DST changes do not shift the wall-clock time
+        days, minute_of_day = divmod(week_minute, MINUTES_PER_DAY)
+        day = week_start.date() + timedelta(days=days)
+        return timezone.make_aware(datetime.combine(day, time.min) + timedelta(minutes=minute_of_day))
+
+    for start, end in spans:
+        if start <= minute < end:
+            return True, at(end)
+        if start > minute:
+            return False, at(start)
+    return False, at(spans[0][0] + 7 * MINUTES_PER_DAY)
+
+
+def describe_intervals(intervals):
+    """Compact human-readable form, e.g. 'Mon-Fri 06:00-22:00; Sat 08:00-14:00'"""
+    if intervals == ALWAYS_OPEN:
+        return 'Open 24/7'
+    by_day = {}
+    for weekday, start, end in intervals:
+        by_day.setdefault(weekday, []).append(f'{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}')
+
+    parts = []
+    weekday = 0
+    while weekday < 7:
+        hours = ', '.join(by_day.get(weekday, [])) or 'closed'
+        last = weekday
+        while last + 1 < 7 and (', '.join(by_day.get(last + 1, [])) or 'closed') == hours:
+            last += 1
+        days = DAY_NAMES[weekday].title() + (f'-{DAY_NAMES[last].title()}' if last > weekday else '')
+        parts.append(f'{days} {hours}')
+        weekday = last + 1
+    return '; '.join(parts)
\ No newline at end of file
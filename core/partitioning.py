@@ -0,0 +1,387 @@
+"""
+Monthly range partitioning of time-ordered tables on PostgreSQL
+
+partition_table() turns a plain table into one partitioned by month on a
+timestamp column: a table per UTC month, named <table>_p<YYYY>_<MM>, plus a
+<table>_default partition that catches rows outside them (history loaded
+later, or a month nobody created in time). ensure_partitions() creates the
+coming months and moves any default rows into months of their own, so the
+default partition stays near empty and cheap to check when a month is
+attached.
+
+A partitioned table can only enforce uniqueness on columns that include the
+partition key. The primary key becomes (id, <column>); ids still come from
+one sequence, so they stay unique. Unique indexes on other columns become
+plain indexes, and other tables cannot hold a foreign key constraint on the
+id alone, so their foreign keys must be declared with db_constraint=False.
+Lookups by id alone probe every partition's primary key index.
+
+partition_table() and unpartition_table() rebuild the table by copying
+every row into a new one, in one transaction. The table is locked in
+EXCLUSIVE mode first, so reads go on during the copy but writes wait for
+it, and the swap at the end briefly blocks reads as well. The lock is only
+waited for lock_timeout, after which nothing has changed. Expect writes to
+stall for as long as the copy takes; they are run by the partition_tables
+command in a maintenance window, never by a migration.
+
+Old months are retired one partition at a time, by detaching it (it stays
+as a plain table), dropping it, or archiving it: the partition is detached,
+its rows moved into <table>_archive in chunks of chunk_size, each chunk in
+its own transaction, and the emptied table dropped. An interrupted archive
+run leaves the detached table behind, and the next one carries on with it.
+PostgreSQL only compresses large values, so the archive is kept small by
+what it leaves out: it has no B-tree indexes, only a BRIN index on the time
+column, and its pages are filled completely (fillfactor 100) since archived
+rows are never updated.
+"""
+import re
+from datetime import date
+
+from django.db import transaction
+from django.utils import timezone
+
+
+ARCHIVE_CHUNK_SIZE = 10000
+# DDL waits this long for a lock before giving up, rather than queueing every later query behind it
+LOCK_TIMEOUT = '5s'
+
+
+def month_start(value):
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, months):
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y_%m}'
+
+
+def default_partition(table):
+    return f'{table}_default'
+
+
+def archive_table(table):
+    return f'{table}_archive'
+
+
+def bound(month):
+    return f"'{month:%Y-%m-%d} 00:00:00+00'"
+
+
+def month_bounds(month):
+    return f'FOR VALUES FROM ({bound(month)}) TO ({bound(add_months(month, 1))})'
+
+
+def month_of(table, name):
+    """The month a <table>_pYYYY_MM name stands for, or None"""
+    match = re.fullmatch(rf'{re.escape(table)}_p(\d{{4}})_(\d{{2}})', name)
+    return date(int(match[1]), int(match[2]), 1) if match else None
+
+
+def is_partitioned(connection, table):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))', [table])
+        return cursor.fetchone()[0]
+
+
+def attached_partitions(connection, table):
+    """{month: partition name} of the monthly partitions attached to table"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits JOIN pg_class child ON child.oid = pg_inherits.inhrelid'
+            ' WHERE pg_inherits.inhparent = to_regclass(%s)',
+            [table],
+        )
+        names = [name for name, in cursor.fetchall()]
+    return {month_of(table, name): name for name in names if month_of(table, name)}
+
+
+def detached_partitions(connection, table):
+    """{month: table name} of monthly partitions detached from table and not yet dropped"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname LIKE %s",
+            [f'{table}_p%'],
+        )
+        names = [name for name, in cursor.fetchall()]
+    return {month_of(table, name): name for name in names if month_of(table, name)}
+
+
+def columns(connection, table):
+    """[(name, type)] of a table's columns, in order"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT attname, format_type(atttypid, atttypmod) FROM pg_attribute'
+            ' WHERE attrelid = to_regclass(%s) AND attnum > 0 AND NOT attisdropped ORDER BY attnum',
+            [table],
+        )
+        return cursor.fetchall()
+
+
+def table_definition(connection, table):
+    """
+    (index statements, foreign key constraints) of a table, primary key left out
+    Unique indexes come back as plain ones, see the module docstring.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_get_indexdef(indexrelid), indisunique FROM pg_index'
+            ' WHERE indrelid = to_regclass(%s) AND NOT indisprimary ORDER BY indexrelid',
+            [table],
+        )
+        # A partitioned table's indexes are defined ON ONLY the parent
+        indexes = [
+            (definition.replace('CREATE UNIQUE INDEX', 'CREATE INDEX', 1) if unique else definition)
+            .replace(' ON ONLY ', ' ON ', 1)
+            for definition, unique in cursor.fetchall()
+        ]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint"
+            " WHERE conrelid = to_regclass(%s) AND contype = 'f' ORDER BY conname",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+    return indexes, foreign_keys
+
+
+def lock_table(connection, table, lock_timeout=LOCK_TIMEOUT):
+    """Block writes to table until the transaction ends, waiting at most lock_timeout for the lock"""
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL lock_timeout = %s', [lock_timeout])
+        cursor.execute(f'LOCK TABLE {quote(table)} IN EXCLUSIVE MODE')
+
+
+def rebuild_table(connection, table, create, primary_key, pk='id', identity=False):
+    """
+    Copy table into a new one made by the `create` statements and swap it in
+    The caller holds lock_table() for the transaction, or rows written during
+    the copy would be lost with the old table.
+    create holds statements for a table named <table>_new, which start empty.
+    Its pk gets a sequence of its own, or an identity column if identity is
+    set (identity columns cannot be partitioned before PostgreSQL 17). The
+    indexes and foreign keys are recreated once the rows are in.
+    """
+    quote = connection.ops.quote_name
+    new_table = f'{table}_new'
+    indexes, foreign_keys = table_definition(connection, table)
+    with connection.cursor() as cursor:
+        for statement in create:
+            cursor.execute(statement)
+        # The copied default still uses the old table's sequence
+        cursor.execute(f'ALTER TABLE {quote(new_table)} ALTER COLUMN {quote(pk)} DROP DEFAULT')
+        cursor.execute(f'INSERT INTO {quote(new_table)} SELECT * FROM {quote(table)}')
+        cursor.execute(f'DROP TABLE {quote(table)}')
+        cursor.execute(f'ALTER TABLE {quote(new_table)} RENAME TO {quote(table)}')
+        if identity:
+            cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk)} ADD GENERATED BY DEFAULT AS IDENTITY')
+            sequence = f"pg_get_serial_sequence('{table}', '{pk}')"
+        else:
+            sequence = f"'{table}_{pk}_seq'"
+            cursor.execute(f'CREATE SEQUENCE {quote(table + "_" + pk + "_seq")} OWNED BY {quote(table)}.{quote(pk)}')
+            cursor.execute(f'ALTER TABLE {quote(table)} ALTER COLUMN {quote(pk)} SET DEFAULT nextval({sequence})')
+        cursor.execute(f'SELECT setval({sequence}, COALESCE(MAX({quote(pk)}), 0) + 1, false) FROM {quote(table)}')
+        cursor.execute(
+            f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(table + "_pkey")} PRIMARY KEY ({primary_key})'
+        )
+        for statement in indexes:
+            cursor.execute(statement)
+        for name, definition in foreign_keys:
+            cursor.execute(f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} {definition}')
+
+
+def partition_table(connection, table, column, months_ahead, pk='id', lock_timeout=LOCK_TIMEOUT):
+    """
+    Rebuild a plain table as one partitioned by month on column
+    Every month from the oldest row to months_ahead from now gets a partition.
+    Writes to the table wait while its rows are copied.
+    """
+    quote = connection.ops.quote_name
+    new_table = f'{table}_new'
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MIN({quote(column)}) FROM {quote(table)}')
+        oldest = cursor.fetchone()[0]
+    this_month = month_start(timezone.now())
+    month = month_start(oldest) if oldest and oldest < timezone.now() else this_month
+    create = [
+        f'CREATE TABLE {quote(new_table)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS'
+        f' INCLUDING STORAGE) PARTITION BY RANGE ({quote(column)})',
+    ]
+    while month <= add_months(this_month, months_ahead):
+        create.append(
+            f'CREATE TABLE {quote(partition_name(table, month))} PARTITION OF {quote(new_table)} {month_bounds(month)}'
+        )
+        month = add_months(month, 1)
+    create.append(f'CREATE TABLE {quote(default_partition(table))} PARTITION OF {quote(new_table)} DEFAULT')
+    with transaction.atomic(using=connection.alias):
+        lock_table(connection, table, lock_timeout)
+        rebuild_table(connection, table, create, f'{quote(pk)}, {quote(column)}', pk)
+
+
+def unpartition_table(connection, table, unique=(), pk='id', lock_timeout=LOCK_TIMEOUT):
+    """
+    Rebuild a partitioned table as a plain one, the reverse of partition_table()
+    unique names the indexes to turn back into unique constraints. Detached
+    partitions and the archive table are left alone.
+    """
+    quote = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias):
+        lock_table(connection, table, lock_timeout)
+        rebuild_table(
+            connection, table,
+            [f'CREATE TABLE {quote(table + "_new")} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS'
+             f' INCLUDING STORAGE)'],
+            quote(pk), pk, identity=True,
+        )
+        with connection.cursor() as cursor:
+            for name in unique:
+                cursor.execute('SELECT pg_get_indexdef(to_regclass(%s))', [name])
+                definition = cursor.fetchone()[0]
+                cursor.execute(f'DROP INDEX {quote(name)}')
+                cursor.execute(definition.replace('CREATE INDEX', 'CREATE UNIQUE INDEX', 1))
+                cursor.execute(
+                    f'ALTER TABLE {quote(table)} ADD CONSTRAINT {quote(name)} UNIQUE USING INDEX {quote(name)}'
+                )
+
+
+def create_partition(connection, table, column, month):
+    """Attach a partition for month, moving its rows out of the default partition"""
+    quote = connection.ops.quote_name
+    name, default = partition_name(table, month), default_partition(table)
+    in_month = f'{quote(column)} >= {bound(month)} AND {quote(column)} < {bound(add_months(month, 1))}'
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        cursor.execute(
+            f'CREATE TABLE {quote(name)} (LIKE {quote(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS'
+            f' INCLUDING STORAGE)'
+        )
+        cursor.execute(
+            f'WITH moved AS (DELETE FROM {quote(default)} WHERE {in_month} RETURNING *)'
+            f' INSERT INTO {quote(name)} SELECT * FROM moved'
+        )
+        moved = cursor.rowcount
+        cursor.execute(f'ALTER TABLE {quote(table)} ATTACH PARTITION {quote(name)} {month_bounds(month)}')
+    return moved
+
+
+def months_to_create(connection, table, column, months_ahead):
+    """Months without a partition that are coming up or have rows in the default partition"""
+    quote = connection.ops.quote_name
+    this_month = month_start(timezone.now())
+    months = {add_months(this_month, offset) for offset in range(months_ahead + 1)}
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {quote(column)} AT TIME ZONE 'UTC')::date"
+            f' FROM {quote(default_partition(table))}'
+        )
+        months.update(month for month, in cursor.fetchall())
+    return sorted(months - set(attached_partitions(connection, table)))
+
+
+def ensure_partitions(connection, table, column, months_ahead):
+    """Create the missing partitions; returns {month: rows moved from the default partition}"""
+    return {
+        month: create_partition(connection, table, column, month)
+        for month in months_to_create(connection, table, column, months_ahead)
+    }
+
+
+def retirable_partitions(connection, table, keep_months, open_rows=None):
+    """
+    [(month, name, has open rows)] of the attached partitions older than keep_months
+    open_rows is an SQL condition for rows still in use (e.g. active
+    rentals); a partition holding any is reported but must not be retired.
+    """
+    quote = connection.ops.quote_name
+    cutoff = add_months(month_start(timezone.now()), -keep_months)
+    retirable = []
+    for month, name in sorted(attached_partitions(connection, table).items()):
+        if month >= cutoff:
+            continue
+        has_open_rows = False
+        if open_rows:
+            with connection.cursor() as cursor:
+                cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {quote(name)} WHERE {open_rows})')
+                has_open_rows = cursor.fetchone()[0]
+        retirable.append((month, name, has_open_rows))
+    return retirable
+
+
+def detach_partition(connection, table, name):
+    quote = connection.ops.quote_name
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        cursor.execute(f"SET LOCAL lock_timeout = '{LOCK_TIMEOUT}'")
+        cursor.execute(f'ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}')
+
+
+def drop_partition(connection, table, name):
+    detach_partition(connection, table, name)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {connection.ops.quote_name(name)}')
+
+
+def ensure_archive(connection, table, column, source):
+    """Create <table>_archive, or add the columns of source it does not have yet"""
+    quote = connection.ops.quote_name
+    archive = archive_table(table)
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {quote(archive)} (LIKE {quote(source)}) WITH (fillfactor = 100)')
+        cursor.execute(
+            f'CREATE INDEX IF NOT EXISTS {quote(archive + "_" + column + "_brin")}'
+            f' ON {quote(archive)} USING brin ({quote(column)})'
+        )
+        archived = {name for name, _ in columns(connection, archive)}
+        for name, column_type in columns(connection, source):
+            if name not in archived:
+                cursor.execute(f'ALTER TABLE {quote(archive)} ADD COLUMN {quote(name)} {column_type}')
+
+
+def null_references(connection, name, table, column, chunk_size=ARCHIVE_CHUNK_SIZE, pk='id'):
+    """
+    Set table.column to NULL where it points at a row of partition name
+    For references without a database constraint whose rows are about to
+    leave the partitioned table, as on_delete=SET_NULL would. Each chunk of
+    chunk_size rows is its own transaction; returns the number of rows changed.
+    """
+    quote = connection.ops.quote_name
+    changed = 0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {quote(table)} SET {quote(column)} = NULL WHERE {quote(pk)} IN ('
+                f'SELECT {quote(pk)} FROM {quote(table)}'
+                f' WHERE {quote(column)} IN (SELECT {quote(pk)} FROM {quote(name)}) LIMIT %s)',
+                [chunk_size],
+            )
+            chunk = cursor.rowcount
+        changed += chunk
+        if chunk < chunk_size:
+            return changed
+
+
+def archive_partition(connection, table, column, name, chunk_size=ARCHIVE_CHUNK_SIZE, attached=True):
+    """Move a partition's rows into the archive table in chunks; returns the number moved"""
+    quote = connection.ops.quote_name
+    if attached:
+        detach_partition(connection, table, name)
+    ensure_archive(connection, table, column, name)
+    column_list = ', '.join(quote(column_name) for column_name, _ in columns(connection, name))
+    moved = 0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {quote(name)} WHERE ctid = ANY(ARRAY('
+                f'SELECT ctid FROM {quote(name)} LIMIT %s)) RETURNING {column_list})'
+                f' INSERT INTO {quote(archive_table(table))} ({column_list}) SELECT {column_list} FROM moved',
+                [chunk_size],
+            )
+            chunk = cursor.rowcount
+        moved += chunk
+        if chunk < chunk_size:
+            break
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP TABLE {quote(name)}')
+    return moved
\ No newline at end of file
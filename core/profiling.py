@@ -0,0 +1,218 @@
+"""
+Opt-in request profiling
+
+StackSampler runs a request under a sampling profiler: a background thread
+wakes every PROFILE_INTERVAL_MS, reads the request thread's stack with
+sys._current_frames() and adds the time since the last sample to that
+stack. Nothing is traced between samples, so a profiled request runs at
+close to its normal speed. The sampler is also the request's database
+execute wrapper: it times every query exactly, and a sample taken while a
+query runs ends in a '[db] <sql>' frame, so database time shows up apart
+from Python time and under the code that ran the query.
+
+Under ASGI the event loop thread is sampled, plus every thread that runs a
+query for the request (sync views run by sync_to_async). The loop thread
+runs every request's coroutines in turn, so an async profile also holds the
+stacks of whatever other requests the loop ran meanwhile; profile ASGI
+requests on a quiet worker, or read their stacks as the loop's, not the
+request's. Sync views are unaffected: their own thread holds the request.
+
+Profiles are stored in the database (apps.events.models.RequestProfile), so
+every worker process sees them, for PROFILE_RETENTION_SECONDS; the admin page
+(see core.views) lists the latest PROFILE_KEEP.
+
+to_speedscope() and to_folded() export a profile for speedscope.app and for
+flamegraph.pl / other collapsed-stack tools.
+"""
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.conf import settings
+from django.db import connections
+
+from apps.events.models import RequestProfile
+from .instrumentation import PROJECT_DIR, is_app_code, sql_shape
+
+
+DB_FRAME_FILE = '<database>'
+SQL_FRAME_LENGTH = 120
+
+
+def frame_key(frame):
+    code = frame.f_code
+    return (getattr(code, 'co_qualname', code.co_name), code.co_filename, code.co_firstlineno)
+
+
+class StackSampler:
+    """Samples the stacks of the threads handling one request"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.thread_ids = {threading.get_ident()}
+        self.frames = {}
+        self.stacks = {}
+        self.samples = 0
+        self.queries = 0
+        self.db_time = 0.0
+        self.current_query = {}
+        self.stopped = threading.Event()
+
+    def __call__(self, execute, sql, params, many, context):
+        thread_id = threading.get_ident()
+        self.thread_ids.add(thread_id)
+        self.current_query[thread_id] = sql_shape(sql)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+            self.current_query.pop(thread_id, None)
+
+    def frame_index(self, key):
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def stack_of(self, frame, thread_id):
+        """Frame indexes from the outermost call in, database leaf included"""
+        stack = []
+        while frame is not None:
+            stack.append(self.frame_index(frame_key(frame)))
+            frame = frame.f_back
+        stack.reverse()
+        query = self.current_query.get(thread_id)
+        if query is not None:
+            stack.append(self.frame_index((f'[db] {query[:SQL_FRAME_LENGTH]}', DB_FRAME_FILE, 0)))
+        return tuple(stack)
+
+    def sample(self, elapsed):
+        current_frames = sys._current_frames()
+        for thread_id in list(self.thread_ids):
+            frame = current_frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = self.stack_of(frame, thread_id)
+            self.stacks[stack] = self.stacks.get(stack, 0.0) + elapsed
+            self.samples += 1
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            now = time.perf_counter()
+            self.sample(now - last)
+            last = now
+
+    @contextmanager
+    def profile(self):
+        """Sample the calling thread and time every query inside the block"""
+        sampler = threading.Thread(target=self.run, name='request-profiler', daemon=True)
+        self.start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self))
+            sampler.start()
+            try:
+                yield self
+            finally:
+                self.stopped.set()
+                sampler.join()
+                self.wall_time = time.perf_counter() - self.start
+
+    def result(self, **details):
+        """The profile as a JSON-able dict, stack weights in milliseconds"""
+        frames = [None] * len(self.frames)
+        for (name, filename, line), index in self.frames.items():
+            frames[index] = [name, filename, line]
+        sampled_db = sum(weight for stack, weight in self.stacks.items() if frames[stack[-1]][1] == DB_FRAME_FILE)
+        return {
+            **details,
+            'wall_ms': round(self.wall_time * 1000, 2),
+            'db_ms': round(self.db_time * 1000, 2),
+            'python_ms': round((self.wall_time - self.db_time) * 1000, 2),
+            'sampled_db_ms': round(sampled_db * 1000, 2),
+            'queries': self.queries,
+            'samples': self.samples,
+            'interval_ms': self.interval * 1000,
+            'frames': frames,
+            'stacks': [[list(stack), round(weight * 1000, 3)] for stack, weight in self.stacks.items()],
+        }
+
+
+def expiry():
+    return datetime.now(timezone.utc) - timedelta(seconds=settings.PROFILE_RETENTION_SECONDS)
+
+
+def save_profile(profile):
+    """Store a profile and drop the expired ones"""
+    RequestProfile.objects.filter(started_at__lt=expiry()).delete()
+    RequestProfile.objects.update_or_create(
+        request_id=profile['id'],
+        defaults={
+            'started_at': datetime.fromtimestamp(profile['started'], timezone.utc),
+            'summary': {name: value for name, value in profile.items() if name not in ('frames', 'stacks')},
+            'profile': profile,
+        },
+    )
+
+
+def get_profile(request_id):
+    return RequestProfile.objects.filter(
+        request_id=request_id, started_at__gte=expiry(),
+    ).values_list('profile', flat=True).first()
+
+
+def recent_profiles():
+    """Summaries of the latest PROFILE_KEEP stored profiles, newest first"""
+    return list(
+        RequestProfile.objects.filter(started_at__gte=expiry())
+        .values_list('summary', flat=True)[:settings.PROFILE_KEEP]
+    )
+
+
+def frame_label(frame):
+    name, filename, line = frame
+    if filename == DB_FRAME_FILE:
+        return name
+    if is_app_code(filename):
+        filename = filename[len(PROJECT_DIR) + 1:]
+    return f'{name} ({filename}:{line})'
+
+
+def to_folded(profile):
+    """Collapsed stacks, one 'outer;...;inner microseconds' line per stack"""
+    labels = [frame_label(frame).replace(';', ',') for frame in profile['frames']]
+    return ''.join(
+        f"{';'.join(labels[index] for index in stack)} {round(weight * 1000)}\n"
+        for stack, weight in profile['stacks']
+    )
+
+
+def to_speedscope(profile):
+    """A speedscope file with one sampled profile, weights in milliseconds"""
+    name = f"{profile['method']} {profile['path']} ({profile['id']})"
+    return {
+        '$schema': 'https://www.speedscope.app/file-format-schema.json',
+        'name': name,
+        'exporter': 'core.profiling',
+        'shared': {
+            'frames': [
+                {'name': frame[0], 'file': frame[1], 'line': frame[2]} if frame[1] != DB_FRAME_FILE
+                else {'name': frame[0]}
+                for frame in profile['frames']
+            ],
+        },
+        'profiles': [{
+            'type': 'sampled',
+            'name': name,
+            'unit': 'milliseconds',
+            'startValue': 0,
+            'endValue': sum(weight for _, weight in profile['stacks']),
+            'samples': [stack for stack, _ in profile['stacks']],
+            'weights': [weight for _, weight in profile['stacks']],
+        }],
+    }
\ No newline at end of file
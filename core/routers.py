@@ -0,0 +1,137 @@
+"""
+Primary/replica database routing
+
+Writes always go to the primary ('default'). Reads go to the 'replica' alias
+only inside a replica-read context, which ReplicaRoutingMiddleware opens for
+GET/HEAD requests; management commands, background jobs and POSTs read from
+the primary unless they opt in with reads_from_replica().
+
+Reads stay on the primary when:
+
+* the replica alias is not configured,
+* the visitor wrote something in the last REPLICA_PIN_SECONDS (the
+  middleware pins them with a short cookie, so they read their own writes),
+* the current request has already written,
+* the replica is unreachable or more than REPLICA_MAX_LAG_SECONDS behind.
+"""
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+
+logger = logging.getLogger(__name__)
+
+REPLICA_DB_ALIAS = 'replica'
+# Seconds between replication lag checks in each process
+LAG_CHECK_INTERVAL = 5
+
+# 'replica' while replica reads are allowed, 'primary' once the context wrote
+_read_target = ContextVar('read_target', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reads_from_replica():
+    """Send reads in this block to the replica, if one is configured and fresh"""
+    token = _read_target.set(REPLICA_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+@contextmanager
+def reads_from_primary():
+    """Keep reads in this block on the primary"""
+    token = _read_target.set(DEFAULT_DB_ALIAS)
+    try:
+        yield
+    finally:
+        _read_target.reset(token)
+
+
+def replication_lag():
+    """
+    Seconds the replica is behind the primary, or None if it cannot be asked
+    Databases without streaming replication (e.g. a SQLite copy) report 0.
+    """
+    connection = connections[REPLICA_DB_ALIAS]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT CASE'
+                ' WHEN NOT pg_is_in_recovery() THEN 0'
+                ' WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0'
+                ' ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END'
+            )
+            lag = cursor.fetchone()[0]
+    except DatabaseError:
+        logger.warning('Replica lag check failed; reading from the primary', exc_info=True)
+        return None
+    return float(lag) if lag is not None else None
+
+
+class ReplicaHealth:
+    """Per-process cache of whether the replica is fresh enough to read from"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked_at = None
+        self.healthy = False
+
+    def is_healthy(self):
+        now = time.monotonic()
+        if self.checked_at is not None and now - self.checked_at < LAG_CHECK_INTERVAL:
+            return self.healthy
+        with self.lock:
+            if self.checked_at is None or now - self.checked_at >= LAG_CHECK_INTERVAL:
+                lag = replication_lag()
+                self.healthy = lag is not None and lag <= settings.REPLICA_MAX_LAG_SECONDS
+                self.checked_at = now
+        return self.healthy
+
+    def reset(self):
+        self.checked_at = None
+
+
+replica_health = ReplicaHealth()
+
+
+class PrimaryReplicaRouter:
+    """Route writes to the primary and eligible reads to the replica"""
+
+    def db_for_read(self, model, **hints):
+        if _read_target.get() != REPLICA_DB_ALIAS or not replica_configured():
+            return DEFAULT_DB_ALIAS
+        # Objects loaded from the primary keep reading related rows from there
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db == DEFAULT_DB_ALIAS:
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS if replica_health.is_healthy() else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        # Read your own writes for the rest of the context
+        if _read_target.get() == REPLICA_DB_ALIAS:
+            _read_target.set(DEFAULT_DB_ALIAS)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
\ No newline at end of file
@@ -0,0 +1,454 @@
+"""
+Synthetic datasets for performance work
+
+generate() fills the database with stations, riders, bicycles and a rental
+history of any size (the generate_data command defaults to 10k users, 50k
+bicycles and 10M rentals). The history follows the patterns the forecasts and
+dashboards care about: weekday commuting peaks and flatter weekends, a few
+busy stations and many quiet ones, stations that mostly send riders out in
+the morning and take them back in the evening (or the reverse), heavy and
+occasional riders, and lognormal trip lengths.
+
+Everything is drawn from NumPy generators seeded from one SeedSequence, so a
+seed and a set of sizes always produce the same rows. Rentals are generated
+in fixed-size chunks, each with its own child seed, so the output does not
+depend on how many worker processes write them. On PostgreSQL the chunks run
+in a process pool and are written with COPY; elsewhere they are written from
+this process with batched executemany() INSERTs (see insert_rows()). The
+smaller tables use bulk_create(). Every rider shares one password hash (see
+DEFAULT_PASSWORD), hashed once.
+
+The bulk writes skip the model methods that record domain events, so
+write_events() adds the events the history implies (registrations, rental
+starts and ends) to the outbox afterwards, for the projections to read.
+"""
+import csv
+import io
+import json
+import multiprocessing
+from itertools import islice, repeat
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import django
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connections, transaction
+from django.utils import timezone
+
+from apps.bicycles.models import Bicycle, BicycleStatusEvent
+from apps.events import outbox
+from apps.events.models import DomainEvent
+from apps.rentals.models import Rental
+from apps.stations.models import Station
+from .db import stream_values
+
+
+BATCH_SIZE = 5000
+RENTAL_CHUNK_SIZE = 100000
+DEFAULT_PASSWORD = 'password123'
+
+# Relative rentals started in each hour of the day
+WEEKDAY_HOURS = np.array([
+    0.2, 0.1, 0.05, 0.05, 0.1, 0.4, 1.5, 4.0, 6.0, 3.5, 2.5, 3.0,
+    4.0, 3.5, 2.5, 2.5, 3.5, 5.5, 4.5, 2.5, 1.5, 1.0, 0.6, 0.3,
+])
+WEEKEND_HOURS = np.array([
+    0.3, 0.2, 0.1, 0.05, 0.05, 0.1, 0.3, 0.6, 1.0, 1.6, 2.2, 2.6,
+    2.8, 2.8, 2.6, 2.4, 2.2, 2.0, 1.6, 1.2, 0.9, 0.7, 0.5, 0.4,
+])
+WEEKEND_SHARE = 0.45
+
+# Parts of the day with their own station mix: night (only 24/7 stations), morning, rest of the day
+NIGHT, MORNING, DAY = range(3)
+PART_OF_DAY = np.array([NIGHT] * 6 + [MORNING] * 6 + [DAY] * 10 + [NIGHT] * 2)
+
+OPERATING_HOURS = ['24/7', '6:00 AM - 10:00 PM']
+PLACES = ['Library', 'Hostel', 'Engineering', 'Science', 'Gate', 'Sports', 'Cafeteria', 'Admin', 'Market', 'Clinic']
+FIRST_NAMES = ['Amina', 'Brian', 'Cynthia', 'David', 'Esther', 'Felix', 'Grace', 'Hassan', 'Irene', 'James', 'Kevin', 'Lucy']
+LAST_NAMES = ['Otieno', 'Wanjiru', 'Kamau', 'Achieng', 'Mutua', 'Njoroge', 'Chebet', 'Omondi', 'Wambui', 'Kiprop']
+MODELS = [('City Cruiser', 'Raleigh', 3), ('Mountain Pro', 'Trek', 21), ('Campus Hybrid', 'Giant', 7), ('Roadster', 'Hero', 1)]
+HOURLY_RATES = [40, 50, 80]
+
+
+@contextmanager
+def explicit_timestamps(model, *field_names):
+    """Let bulk_create() keep the given auto_now_add values instead of now()"""
+    fields = [model._meta.get_field(name) for name in field_names]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def to_datetimes(seconds):
+    return [datetime.fromtimestamp(value, dt_timezone.utc) for value in seconds.tolist()]
+
+
+def uses_copy(using='default'):
+    return connections[using].vendor == 'postgresql'
+
+
+def copy_rows(model, columns, rows, using='default'):
+    """Write rows (tuples in `columns` order) with PostgreSQL COPY"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(r'\N' if value is None else value for value in row)
+    buffer.seek(0)
+
+    target = connections[using]
+    quote = target.ops.quote_name
+    column_list = ', '.join(quote(model._meta.get_field(name).column) for name in columns)
+    with target.cursor() as cursor:
+        cursor.cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+            buffer,
+        )
+
+
+def insert_rows(model, columns, rows, using='default'):
+    """
+    Write rows (tuples in `columns` order) with batched executemany()
+    bulk_create() spends most of its time preparing each value of each
+    model instance, which adds up to hours over millions of rows.
+    """
+    target = connections[using]
+    quote = target.ops.quote_name
+    fields = [model._meta.get_field(name) for name in columns]
+    adapters = [
+        target.ops.adapt_datetimefield_value if field.get_internal_type() == 'DateTimeField' else None
+        for field in fields
+    ]
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    rows = iter(rows)
+    with target.cursor() as cursor:
+        while batch := list(islice(rows, BATCH_SIZE)):
+            cursor.executemany(sql, [
+                tuple(value if adapt is None else adapt(value) for adapt, value in zip(adapters, row))
+                for row in batch
+            ])
+
+
+def create_stations(rng, prefix, count, start):
+    with explicit_timestamps(Station, 'created_at'):
+        Station.objects.bulk_create([
+            Station(
+                name=f'{prefix} {PLACES[index % len(PLACES)]} {index}',
+                code=f'{prefix}{index}',
+                address=f'{PLACES[index % len(PLACES)]} Road {index}',
+                latitude=round(-1.2245 + rng.normal(0, 0.02), 6),
+                longitude=round(36.8874 + rng.normal(0, 0.02), 6),
+                capacity=int(rng.integers(15, 60)),
+                # One station in five closes at night
+                operating_hours=OPERATING_HOURS[int(rng.random() < 0.2)],
+                created_at=start,
+            )
+            for index in range(count)
+        ], batch_size=BATCH_SIZE)
+    return list(Station.objects.filter(code__startswith=prefix).order_by('pk'))
+
+
+def create_users(rng, prefix, count, start):
+    User = get_user_model()
+    # Hashing is deliberately slow; every rider gets the same hash
+    password = make_password(DEFAULT_PASSWORD)
+    # Riders joined during the year before the history starts
+    joined = [start - timedelta(seconds=seconds) for seconds in rng.integers(0, 365 * 86400, count).tolist()]
+    first_names = rng.choice(FIRST_NAMES, count).tolist()
+    last_names = rng.choice(LAST_NAMES, count).tolist()
+    staff = rng.random(count) < 0.1
+    verified = rng.random(count) < 0.95
+    for batch_start in range(0, count, BATCH_SIZE):
+        with explicit_timestamps(User, 'created_at'):
+            User.objects.bulk_create([
+                User(
+                    username=f'{prefix.lower()}{index:06d}',
+                    email=f'{prefix.lower()}{index:06d}@example.com',
+                    password=password,
+                    first_name=first_names[index],
+                    last_name=last_names[index],
+                    university_id=f'{prefix}/{index:06d}',
+                    role='staff' if staff[index] else 'student',
+                    is_verified=bool(verified[index]),
+                    date_joined=joined[index],
+                    created_at=joined[index],
+                )
+                for index in range(batch_start, min(count, batch_start + BATCH_SIZE))
+            ])
+    return np.array(User.objects.filter(username__startswith=prefix.lower()).order_by('pk').values_list('pk', flat=True))
+
+
+def create_bicycles(rng, prefix, count, stations, popularity, start):
+    homes = rng.choice(len(stations), count, p=popularity / popularity.sum())
+    kinds = rng.integers(0, len(MODELS), count)
+    rates = rng.choice(HOURLY_RATES, count, p=[0.3, 0.5, 0.2])
+    in_maintenance = rng.random(count) < 0.03
+    for batch_start in range(0, count, BATCH_SIZE):
+        with explicit_timestamps(Bicycle, 'created_at'):
+            Bicycle.objects.bulk_create([
+                Bicycle(
+                    name=MODELS[kinds[index]][0],
+                    model=MODELS[kinds[index]][0],
+                    manufacturer=MODELS[kinds[index]][1],
+                    gear_count=MODELS[kinds[index]][2],
+                    serial_number=f'{prefix}-{index:07d}',
+                    slug=Bicycle.build_slug(MODELS[kinds[index]][0], f'{prefix}-{index:07d}'),
+                    hourly_rate=int(rates[index]),
+                    status='maintenance' if in_maintenance[index] else 'available',
+                    current_station=stations[homes[index]],
+                    created_at=start,
+                )
+                for index in range(batch_start, min(count, batch_start + BATCH_SIZE))
+            ])
+    rows = Bicycle.objects.filter(serial_number__startswith=f'{prefix}-').order_by('pk')
+    ids, station_ids, rates, statuses = zip(*rows.values_list('pk', 'current_station_id', 'hourly_rate', 'status'))
+    # bulk_create() skips Bicycle.save(), which starts each bicycle's status log
+    BicycleStatusEvent.objects.bulk_create([
+        BicycleStatusEvent(
+            bicycle_id=pk, station_id=station_id, status=BicycleStatusEvent.STATUS_CODES[status], occurred_at=start,
+        )
+        for pk, station_id, status in zip(ids, station_ids, statuses)
+    ], batch_size=BATCH_SIZE)
+    return np.array(ids), np.array(station_ids), np.array(rates, dtype=np.float64)
+
+
+def demand_plan(rng, stations, popularity, bike_ids, bike_stations, bike_rates, user_ids, start, days):
+    """Everything a rental chunk needs, as plain arrays that pickle cheaply"""
+    station_ids = np.array([station.pk for station in stations])
+    # Share of a station's pickups that happen in the morning (home) or later (campus)
+    morning_bias = rng.beta(2, 2, len(stations))
+    always_open = np.array([station.operating_hours == '24/7' for station in stations])
+    pickup = np.vstack([popularity * always_open, popularity * morning_bias, popularity * (1 - morning_bias)])
+    dropoff = np.vstack([popularity * always_open, popularity * (1 - morning_bias), popularity * morning_bias])
+
+    # Bicycles grouped by home station, so a rental picks a bicycle kept at its pickup station
+    order = np.argsort(np.searchsorted(station_ids, bike_stations), kind='stable')
+    bike_station_index = np.searchsorted(station_ids, bike_stations)[order]
+    bike_offsets = np.searchsorted(bike_station_index, np.arange(len(station_ids) + 1))
+
+    # Heavy and occasional riders
+    activity = rng.pareto(1.5, len(user_ids)) + 0.1
+
+    local_start = timezone.localtime(start).replace(hour=0, minute=0, second=0, microsecond=0)
+    weekdays = (local_start.weekday() + np.arange(days)) % 7
+    # A weekend day sees WEEKEND_SHARE of a weekday's rentals
+    slot_weights = np.where(
+        (weekdays >= 5)[:, None], WEEKEND_SHARE * WEEKEND_HOURS / WEEKEND_HOURS.sum(),
+        WEEKDAY_HOURS / WEEKDAY_HOURS.sum(),
+    ).ravel()
+    return {
+        'start': local_start.timestamp(),
+        'slot_probabilities': slot_weights / slot_weights.sum(),
+        'station_ids': station_ids,
+        'pickup': normalized(pickup, popularity),
+        'dropoff': normalized(dropoff, popularity),
+        'bike_ids': bike_ids[order],
+        'bike_rates': bike_rates[order],
+        'bike_offsets': bike_offsets,
+        'user_ids': user_ids,
+        'user_probabilities': activity / activity.sum(),
+    }
+
+
+def normalized(weights, fallback):
+    """Each row scaled to sum to 1; all-zero rows (no station open at night) use fallback"""
+    weights = np.where(weights.sum(axis=1, keepdims=True) > 0, weights, fallback)
+    return weights / weights.sum(axis=1, keepdims=True)
+
+
+def sample_stations(rng, parts, probabilities):
+    """A station index for each part of the day, drawn from that part's station mix"""
+    stations = np.empty(len(parts), dtype=np.int64)
+    for part in (NIGHT, MORNING, DAY):
+        mask = parts == part
+        stations[mask] = rng.choice(probabilities.shape[1], int(mask.sum()), p=probabilities[part])
+    return stations
+
+
+def generate_rentals(seed_sequence, size, plan):
+    """Rental rows and per-bicycle totals for one chunk"""
+    rng = np.random.default_rng(seed_sequence)
+    slots = rng.choice(len(plan['slot_probabilities']), size, p=plan['slot_probabilities'])
+    start = plan['start'] + slots * 3600 + rng.integers(0, 3600, size)
+    duration = np.clip(rng.lognormal(np.log(25 * 60), 0.7, size), 180, 20 * 3600).astype(np.int64)
+    end = start + duration
+
+    pickup = sample_stations(rng, PART_OF_DAY[slots % 24], plan['pickup'])
+    end_hours = ((end - plan['start']) // 3600 % 24).astype(np.int64)
+    dropoff = sample_stations(rng, PART_OF_DAY[end_hours], plan['dropoff'])
+
+    offsets = plan['bike_offsets']
+    kept = offsets[pickup + 1] - offsets[pickup]
+    # Stations without bicycles of their own lend one from anywhere
+    bikes = np.where(
+        kept > 0,
+        offsets[pickup] + (rng.random(size) * np.maximum(kept, 1)).astype(np.int64),
+        rng.integers(0, len(plan['bike_ids']), size),
+    )
+    users = rng.choice(len(plan['user_ids']), size, p=plan['user_probabilities'])
+
+    cancelled = rng.random(size) < 0.03
+    end = np.where(cancelled, start + rng.integers(60, 600, size), end)
+    hours = (end - start) / 3600
+    speed = np.clip(rng.normal(11, 2.5, size), 4, 22)
+    distance = np.where(cancelled, 0, np.round(hours * speed, 2))
+    cost = np.where(cancelled, 0, np.round(plan['bike_rates'][bikes] * hours, 2))
+
+    rows = list(zip(
+        plan['user_ids'][users].tolist(),
+        plan['bike_ids'][bikes].tolist(),
+        plan['station_ids'][pickup].tolist(),
+        np.where(cancelled, None, plan['station_ids'][dropoff].astype(object)).tolist(),
+        np.where(cancelled, 'cancelled', 'completed').tolist(),
+        to_datetimes(start),
+        to_datetimes(end),
+        plan['bike_rates'][bikes].tolist(),
+        cost.tolist(),
+        distance.tolist(),
+        repeat(0), repeat(0), repeat(''), repeat(''),
+    ))
+    completed = ~cancelled
+    totals = (
+        np.bincount(bikes[completed], minlength=len(plan['bike_ids'])),
+        np.bincount(bikes[completed], weights=distance[completed], minlength=len(plan['bike_ids'])),
+    )
+    return rows, totals
+
+
+RENTAL_COLUMNS = [
+    'user_id', 'bicycle_id', 'pickup_station_id', 'return_station_id', 'status',
+    'start_time', 'end_time', 'hourly_rate', 'total_cost', 'distance_km',
+    'late_fee', 'damage_fee', 'pickup_notes', 'return_notes',
+]
+
+
+def write_rentals(seed_sequence, size, plan, use_copy):
+    """Generate and write one chunk; returns its per-bicycle (rentals, km) totals"""
+    rows, totals = generate_rentals(seed_sequence, size, plan)
+    with transaction.atomic():
+        (copy_rows if use_copy else insert_rows)(Rental, RENTAL_COLUMNS, rows)
+    return totals
+
+
+def update_bicycle_totals(bike_ids, rentals, distance):
+    bicycles = [
+        Bicycle(pk=pk, total_rentals=count, total_distance_km=round(km, 2))
+        for pk, count, km in zip(bike_ids.tolist(), rentals.tolist(), distance.tolist())
+    ]
+    Bicycle.objects.bulk_update(bicycles, ['total_rentals', 'total_distance_km'], batch_size=1000)
+
+
+EVENT_COLUMNS = ['type', 'payload', 'occurred_at']
+EVENT_RENTAL_FIELDS = [
+    'pk', 'user_id', 'bicycle_id', 'pickup_station_id', 'return_station_id', 'status',
+    'start_time', 'end_time', 'total_cost', 'distance_km', 'late_fee', 'damage_fee',
+]
+
+
+def event_row(event_type, occurred_at, **payload):
+    event = event_type.build(occurred_at, **payload)
+    return (event.type, json.dumps(event.payload), event.occurred_at)
+
+
+def generated_events(prefix, start):
+    """Outbox rows for the generated bicycles and rentals, streamed"""
+    bicycles = Bicycle.objects.filter(serial_number__startswith=f'{prefix}-')
+    for pk, station_id, status in stream_values(bicycles, ['pk', 'current_station_id', 'status'], ['pk']):
+        yield event_row(outbox.BICYCLE_REGISTERED, start, bicycle_id=pk, station_id=station_id, status=status)
+
+    rentals = Rental.objects.filter(bicycle__serial_number__startswith=f'{prefix}-')
+    for values in stream_values(rentals, EVENT_RENTAL_FIELDS, ['pk']):
+        rental = Rental(**dict(zip(EVENT_RENTAL_FIELDS, values)))
+        yield event_row(
+            outbox.RENTAL_STARTED, rental.start_time, rental_id=rental.pk, user_id=rental.user_id,
+            bicycle_id=rental.bicycle_id, station_id=rental.pickup_station_id,
+        )
+        if rental.status == 'cancelled':
+            yield event_row(
+                outbox.RENTAL_CANCELLED, rental.end_time, rental_id=rental.pk, user_id=rental.user_id,
+                bicycle_id=rental.bicycle_id, station_id=rental.pickup_station_id,
+            )
+        else:
+            yield event_row(outbox.RENTAL_COMPLETED, rental.end_time, **outbox.rental_completed_payload(rental))
+
+
+def write_events(prefix, start, use_copy):
+    """
+    Record the generated history in the domain event outbox
+    Events go in by rental rather than by time; the projections only
+    need each bicycle's own events in order.
+    """
+    rows = generated_events(prefix, start)
+    with transaction.atomic():
+        while batch := list(islice(rows, RENTAL_CHUNK_SIZE)):
+            (copy_rows if use_copy else insert_rows)(DomainEvent, EVENT_COLUMNS, batch)
+
+
+def generate(users, bicycles, rentals, stations=None, days=365, seed=0, prefix='SYN', workers=None, progress=None):
+    """
+    Create a synthetic dataset; returns the number of rows created per model
+    Rentals cover the `days` before today. progress(message) is called as
+    each step finishes.
+    """
+    progress = progress or (lambda message: None)
+    root = np.random.SeedSequence(seed)
+    entity_sequence, rental_sequence = root.spawn(2)
+    rng = np.random.default_rng(entity_sequence)
+    stations = stations or max(10, bicycles // 40)
+    start = timezone.now() - timedelta(days=days)
+
+    with transaction.atomic():
+        station_objects = create_stations(rng, prefix, stations, start)
+        user_ids = create_users(rng, prefix, users, start)
+        # A few busy stations and a long tail of quiet ones; the fleet is spread the same way
+        popularity = rng.lognormal(0, 0.9, stations)
+        bike_ids, bike_stations, bike_rates = create_bicycles(rng, prefix, bicycles, station_objects, popularity, start)
+    progress(f'{stations} stations, {users} users and {bicycles} bicycles created')
+
+    plan = demand_plan(rng, station_objects, popularity, bike_ids, bike_stations, bike_rates, user_ids, start, days)
+    sizes = [min(RENTAL_CHUNK_SIZE, rentals - offset) for offset in range(0, rentals, RENTAL_CHUNK_SIZE)]
+    chunk_sequences = rental_sequence.spawn(len(sizes))
+    use_copy = uses_copy()
+    # SQLite allows one writer at a time, so only a server database gets a pool
+    workers = workers if use_copy else 1
+    total_rentals = np.zeros(len(bike_ids), dtype=np.int64)
+    total_distance = np.zeros(len(bike_ids))
+
+    def add(totals, written):
+        total_rentals[:] += totals[0]
+        total_distance[:] += totals[1]
+        progress(f'{written} of {rentals} rentals written')
+
+    written = 0
+    if workers == 1:
+        for sequence, size in zip(chunk_sequences, sizes):
+            written += size
+            add(write_rentals(sequence, size, plan, use_copy), written)
+    else:
+        # Spawned rather than forked: a forked child shares this process's connections and logging thread
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=django.setup) as pool:
+            futures = [
+                pool.submit(write_rentals, sequence, size, plan, use_copy)
+                for sequence, size in zip(chunk_sequences, sizes)
+            ]
+            for future, size in zip(futures, sizes):
+                written += size
+                add(future.result(), written)
+
+    # Bulk writes skip complete_rental(), which keeps these totals
+    update_bicycle_totals(plan['bike_ids'], total_rentals, total_distance)
+    progress('bicycle totals updated')
+    write_events(prefix, start, use_copy)
+    progress('domain events recorded')
+    return {'stations': stations, 'users': users, 'bicycles': bicycles, 'rentals': rentals}
\ No newline at end of file
@@ -0,0 +1,254 @@
+"""
+View performance regression tests
+
+ViewPerformanceTestCase renders a list of views at each of several data
+sizes (SCALES) and fails when a view's query count changes with the size of
+the data (an N+1 in a template or view) or exceeds its budget. The failure
+lists the repeated queries and the code and template lines that ran them
+(see core.instrumentation.QueryRecorder).
+
+Each app's tests.py subclasses it with the views it owns, importing this
+module rather than the class so the test loader does not run the base.
+seed() grows the database between sizes with the synthetic data generator, and gives the
+test rider a matching rental history so the rider's own pages grow too. It then runs the
+event projections, so the views that read them grow as well.
+
+Render times at the largest size are compared with PERF_BASELINES. A view
+is slow when it is more than PERF_TOLERANCE times its baseline (default 3)
+plus a few milliseconds of slack. Timings depend on the machine, so slow
+views are only reported on stderr unless PERF_ENFORCE_TIMINGS=1 makes them
+fail; the query count checks always fail. Refresh the baselines with
+PERF_UPDATE_BASELINES=1 python manage.py test --parallel 1.
+"""
+import json
+import os
+import statistics
+import sys
+import time
+from collections import namedtuple
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.accounts.models import PenaltyLog
+from apps.bicycles.models import Bicycle, BicycleStatusEvent, MaintenanceLog
+from apps.events.projections import PROJECTIONS
+from apps.events.projector import run_projection
+from apps.payments.models import Payment, Refund
+from apps.rentals.models import Rental, Reservation
+from apps.stations.models import Station
+from .instrumentation import QueryRecorder
+from .synthetic import explicit_timestamps, generate
+
+
+PERF_BASELINES = os.path.join(os.path.dirname(__file__), 'perf_baselines.json')
+SCALES = (1, 4)
+TIMING_REPEAT = 5
+TIMING_SLACK_MS = 10
+REPEAT_THRESHOLD = 3
+
+# url is a URL name without arguments or url(data) -> path;
+# user is 'rider', 'admin' or None (anonymous)
+ViewBudget = namedtuple('ViewBudget', ['label', 'url', 'budget', 'user'])
+
+
+class SeedData:
+    """The fixed objects views are rendered for; seed() adds data around them"""
+
+    def __init__(self):
+        User = get_user_model()
+        self.station = Station.objects.create(name='Perf Home', code='PERF', address='Home Road', capacity=500)
+        self.rider = User.objects.create_user(
+            username='perf-rider', password='password123', email='rider@example.com',
+            university_id='PERF/RIDER', is_verified=True,
+        )
+        self.admin = User.objects.create_superuser(
+            username='perf-admin', password='password123', email='admin@example.com', university_id='PERF/ADMIN',
+        )
+        self.bicycle, reserved_bicycle, rented_bicycle = (
+            Bicycle.objects.create(
+                name=f'Perf {index}', model='City', serial_number=f'PERF-{index}', current_station=self.station,
+            )
+            for index in range(3)
+        )
+        reserved_bicycle.mark_as_reserved()
+        self.reservation = Reservation.objects.create(user=self.rider, bicycle=reserved_bicycle, station=self.station)
+        rented_bicycle.mark_as_in_use()
+        self.rental = Rental.objects.create(user=self.rider, bicycle=rented_bicycle, pickup_station=self.station)
+
+    def seed(self, scale):
+        """
+        Add data in proportion to scale, around and for the fixed objects
+        At scale 1 every list is shorter than a page, so a query per row
+        shows up as a count that grows with the scale.
+        """
+        prefix = f'P{scale}'
+        generate(
+            users=5 * scale, bicycles=6 * scale, rentals=20 * scale, stations=2 * scale,
+            days=30, seed=scale, prefix=prefix, workers=1,
+        )
+        generated = list(Bicycle.objects.filter(serial_number__startswith=f'{prefix}-').order_by('pk'))
+        moved = [bicycle.pk for bicycle in generated[:2 * scale]]
+        Bicycle.objects.filter(pk__in=moved).update(current_station=self.station)
+
+        now = timezone.now()
+        with explicit_timestamps(Rental, 'start_time'):
+            rentals = Rental.objects.bulk_create([
+                Rental(
+                    user=self.rider, bicycle=generated[index % len(generated)], pickup_station=self.station,
+                    return_station=self.station, status='completed', hourly_rate=50, total_cost=25,
+                    start_time=now - timedelta(days=index + 1, hours=1), end_time=now - timedelta(days=index + 1),
+                )
+                for index in range(3 * scale)
+            ])
+        with explicit_timestamps(Reservation, 'created_at'):
+            Reservation.objects.bulk_create([
+                Reservation(
+                    user=self.rider, bicycle=generated[index % len(generated)], station=self.station, status='expired',
+                    created_at=now - timedelta(days=index + 1), expires_at=now - timedelta(days=index + 1, minutes=-30),
+                )
+                for index in range(2 * scale)
+            ])
+        payments = Payment.objects.bulk_create([
+            Payment(
+                user=self.rider, rental=rental, method='mpesa', amount=rental.total_cost, status='completed',
+                transaction_id=f'{prefix}-{rental.pk}',
+            )
+            for rental in Rental.objects.filter(pk__in=[rental.pk for rental in rentals])
+        ])
+        Refund.objects.bulk_create([
+            Refund(payment=payment, amount=5, reason='Overcharged') for payment in payments[:scale]
+        ])
+        PenaltyLog.objects.bulk_create([PenaltyLog(user=self.rider, reason='Late return') for _ in range(scale)])
+        MaintenanceLog.objects.bulk_create([
+            MaintenanceLog(bicycle=self.bicycle, description=f'Inspection {index}', performed_by='Workshop')
+            for index in range(2 * scale)
+        ])
+        # The generator logs each bicycle's first state; log the move above too
+        BicycleStatusEvent.objects.bulk_create([
+            BicycleStatusEvent(
+                bicycle_id=pk, station=self.station, status=BicycleStatusEvent.STATUS_CODES[bicycle.status],
+            )
+            for pk, bicycle in zip(moved, generated)
+        ])
+        for projection in PROJECTIONS.values():
+            run_projection(projection)
+
+
+@override_settings(
+    # The manifest storage needs collectstatic to have run
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+    # The per-request query log would repeat what these tests record
+    QUERY_SAMPLE_RATE=0,
+    # Ids left behind by rolled-back test transactions are not waited for
+    PROJECTION_GAP_SECONDS=0,
+)
+class ViewPerformanceTestCase(TestCase):
+    """Query budgets and render times of `views` as the data grows"""
+    views = []
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = SeedData()
+
+    def test_query_counts_do_not_grow_with_data(self):
+        counts = {}
+        for scale in SCALES:
+            self.data.seed(scale)
+            for view in self.views:
+                with self.subTest(view=view.label, scale=scale):
+                    recorder = self.render(view)
+                    counts.setdefault(view.label, []).append(recorder.count)
+                    self.assertLessEqual(
+                        recorder.count, view.budget,
+                        f'{view.label} ran {recorder.count} queries, over its budget of {view.budget}'
+                        f'{describe_repeats(recorder)}',
+                    )
+                    self.assertEqual(
+                        recorder.count, counts[view.label][0],
+                        f'{view.label} ran {counts[view.label][0]} queries at {SCALES[0]}x data and '
+                        f'{recorder.count} at {scale}x{describe_repeats(recorder)}',
+                    )
+        self.check_render_times()
+
+    def url(self, view):
+        return view.url(self.data) if callable(view.url) else reverse(view.url)
+
+    def client_for(self, view):
+        if view.user:
+            self.client.force_login(getattr(self.data, view.user))
+        else:
+            self.client.logout()
+        return self.client
+
+    def render(self, view):
+        """Render once to warm per-process caches, then again counting queries"""
+        client = self.client_for(view)
+        url = self.url(view)
+        cache.clear()
+        client.get(url)
+        cache.clear()
+        recorder = QueryRecorder()
+        with recorder.record():
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200, f'{view.label} ({url}) returned {response.status_code}')
+        return recorder
+
+    def render_time(self, view):
+        """Median milliseconds to render the view, caches cleared"""
+        client = self.client_for(view)
+        url = self.url(view)
+        timings = []
+        for _ in range(TIMING_REPEAT):
+            cache.clear()
+            start = time.perf_counter()
+            client.get(url)
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def check_render_times(self):
+        baselines = load_baselines()
+        tolerance = float(os.environ.get('PERF_TOLERANCE', 3))
+        measured = {}
+        for view in self.views:
+            key = f'{type(self).__module__}.{view.label}'
+            measured[key] = round(self.render_time(view), 2)
+            if key not in baselines or os.environ.get('PERF_UPDATE_BASELINES'):
+                continue
+            limit = baselines[key] * tolerance + TIMING_SLACK_MS
+            message = f'{view.label} took {measured[key]:.1f} ms, baseline {baselines[key]:.1f} ms'
+            if os.environ.get('PERF_ENFORCE_TIMINGS') == '1':
+                with self.subTest(view=view.label):
+                    self.assertLessEqual(measured[key], limit, message)
+            elif measured[key] > limit:
+                sys.stderr.write(f'\nslow view (set PERF_ENFORCE_TIMINGS=1 to fail): {message}\n')
+        if os.environ.get('PERF_UPDATE_BASELINES'):
+            save_baselines({**load_baselines(), **measured})
+
+
+def describe_repeats(recorder):
+    repeated = recorder.repeated(REPEAT_THRESHOLD)
+    if not repeated:
+        return ''
+    return ''.join(
+        f"\n  {query['count']}x {query['sql'][:200]}\n     from {query['code']} {query['template'] or ''}"
+        for query in repeated
+    )
+
+
+def load_baselines():
+    try:
+        with open(PERF_BASELINES) as baseline_file:
+            return json.load(baseline_file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(baselines):
+    with open(PERF_BASELINES, 'w') as baseline_file:
+        json.dump(dict(sorted(baselines.items())), baseline_file, indent=2)
+        baseline_file.write('\n')
\ No newline at end of file
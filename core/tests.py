@@ -0,0 +1,190 @@
+import warnings
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from apps.stations.models import Station
+from .decorators import public_page
+from .middleware import PIN_PRIMARY_COOKIE_NAME, AnonymousPageCacheMiddleware, ReplicaRoutingMiddleware
+from .routers import REPLICA_DB_ALIAS, PrimaryReplicaRouter, reads_from_replica, replica_health
+
+
+@override_settings(
+    PUBLIC_PAGE_CACHE_SECONDS=300,
+    QUERY_SAMPLE_RATE=0,
+    STATICFILES_STORAGE='django.contrib.staticfiles.storage.StaticFilesStorage',
+)
+class AnonymousPageCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.factory = RequestFactory()
+        self.middleware = AnonymousPageCacheMiddleware(lambda request: HttpResponse())
+        self.rendered = 0
+
+    @public_page
+    def page(self, request):
+        self.rendered += 1
+        return HttpResponse(f'render {self.rendered}')
+
+    @public_page
+    def page_setting_cookie(self, request):
+        response = self.page(request)
+        response.set_cookie('seen', '1')
+        return response
+
+    def serve(self, view, **cookies):
+        """Pass a request through the middleware hooks the way the handler does"""
+        request = self.factory.get('/page/')
+        request.COOKIES.update(cookies)
+        response = self.middleware.process_view(request, view, (), {}) or view(request)
+        return self.middleware.process_response(request, response)
+
+    def test_cookie_less_requests_share_one_rendering(self):
+        first = self.serve(self.page)
+        second = self.serve(self.page)
+        self.assertEqual(first['X-Page-Cache'], 'miss')
+        self.assertEqual(second['X-Page-Cache'], 'hit')
+        self.assertEqual(second.content, b'render 1')
+        self.assertEqual(self.rendered, 1)
+
+    def test_requests_with_private_cookies_bypass_the_cache(self):
+        self.serve(self.page)
+        for cookie in ('sessionid', 'csrftoken', 'messages'):
+            with self.subTest(cookie=cookie):
+                response = self.serve(self.page, **{cookie: 'value'})
+                self.assertFalse(response.has_header('X-Page-Cache'))
+                self.assertNotEqual(response.content, b'render 1')
+        self.assertEqual(self.rendered, 4)
+        self.assertEqual(self.serve(self.page).content, b'render 1')
+
+    def test_other_cookies_still_use_the_cache(self):
+        self.serve(self.page)
+        self.assertEqual(self.serve(self.page, theme='dark')['X-Page-Cache'], 'hit')
+
+    def test_responses_setting_cookies_are_not_stored(self):
+        first = self.serve(self.page_setting_cookie)
+        second = self.serve(self.page_setting_cookie)
+        self.assertFalse(first.has_header('X-Page-Cache'))
+        self.assertFalse(second.has_header('X-Page-Cache'))
+        self.assertEqual(second.content, b'render 2')
+        self.assertEqual(second.cookies['seen'].value, '1')
+
+    def test_authenticated_users_never_get_the_cached_anonymous_page(self):
+        user = get_user_model().objects.create_user(
+            username='cache-rider', password='password123', email='cache@example.com', university_id='CACHE/1',
+        )
+        anonymous = self.client.get(reverse('home'))
+        self.assertEqual(anonymous['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(reverse('home'))['X-Page-Cache'], 'hit')
+
+        self.client.force_login(user)
+        response = self.client.get(reverse('home'))
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'cache-rider')
+        self.assertNotEqual(response.content, anonymous.content)
+
+        self.client.logout()
+        self.assertEqual(self.client.get(reverse('home'))['X-Page-Cache'], 'hit')
+
+
+@override_settings(
+    # A replica that mirrors the test database; only routing decisions are checked, no query reaches it
+    DATABASES={
+        **settings.DATABASES,
+        REPLICA_DB_ALIAS: {**settings.DATABASES['default'], 'TEST': {'MIRROR': 'default'}},
+    },
+    REPLICA_PIN_SECONDS=5,
+    REPLICA_MAX_LAG_SECONDS=2,
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        # Only the replica alias is added, so the connections already open are unaffected
+        with warnings.catch_warnings():
+            warnings.filterwarnings('ignore', 'Overriding setting DATABASES')
+            super().setUpClass()
+
+    def setUp(self):
+        replica_health.reset()
+        self.addCleanup(replica_health.reset)
+        lag = mock.patch('core.routers.replication_lag', return_value=0.0)
+        self.replication_lag = lag.start()
+        self.addCleanup(lag.stop)
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def read_alias(self, request, write=False):
+        """The alias a request's reads go to, after an optional write"""
+        seen = {}
+
+        def view(request):
+            if write:
+                self.router.db_for_write(Station)
+            seen['alias'] = Station.objects.all().db
+            return HttpResponse()
+
+        response = ReplicaRoutingMiddleware(view)(request)
+        return seen['alias'], response
+
+    def test_safe_requests_read_from_the_replica(self):
+        for method in ('get', 'head'):
+            with self.subTest(method=method):
+                alias, response = self.read_alias(getattr(self.factory, method)('/'))
+                self.assertEqual(alias, REPLICA_DB_ALIAS)
+                self.assertNotIn(PIN_PRIMARY_COOKIE_NAME, response.cookies)
+
+    def test_reads_outside_a_request_use_the_primary(self):
+        self.assertEqual(Station.objects.all().db, DEFAULT_DB_ALIAS)
+        with reads_from_replica():
+            self.assertEqual(Station.objects.all().db, REPLICA_DB_ALIAS)
+
+    def test_writes_pin_the_visitor_to_the_primary_until_the_cookie_expires(self):
+        alias, response = self.read_alias(self.factory.post('/'))
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        cookie = response.cookies[PIN_PRIMARY_COOKIE_NAME]
+        self.assertEqual(cookie['max-age'], 5)
+        self.assertTrue(cookie['httponly'])
+
+        pinned = self.factory.get('/')
+        pinned.COOKIES[PIN_PRIMARY_COOKIE_NAME] = cookie.value
+        alias, response = self.read_alias(pinned)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+        # Reads do not extend the pin
+        self.assertNotIn(PIN_PRIMARY_COOKIE_NAME, response.cookies)
+
+        # Once the browser drops the expired cookie, reads go back to the replica
+        self.assertEqual(self.read_alias(self.factory.get('/'))[0], REPLICA_DB_ALIAS)
+
+    def test_reads_after_a_write_in_the_same_request_use_the_primary(self):
+        alias, _ = self.read_alias(self.factory.get('/'), write=True)
+        self.assertEqual(alias, DEFAULT_DB_ALIAS)
+
+    def test_objects_from_the_primary_read_related_rows_there(self):
+        station = Station(pk=1)
+        station._state.db = DEFAULT_DB_ALIAS
+        with reads_from_replica():
+            self.assertEqual(self.router.db_for_read(Station, instance=station), DEFAULT_DB_ALIAS)
+
+    def test_reads_fall_back_to_the_primary_while_the_replica_lags(self):
+        for lag, alias in ((1.5, REPLICA_DB_ALIAS), (30.0, DEFAULT_DB_ALIAS), (None, DEFAULT_DB_ALIAS)):
+            with self.subTest(lag=lag):
+                replica_health.reset()
+                self.replication_lag.return_value = lag
+                self.assertEqual(self.read_alias(self.factory.get('/'))[0], alias)
+
+    def test_lag_is_checked_once_per_interval(self):
+        self.read_alias(self.factory.get('/'))
+        self.replication_lag.return_value = 30.0
+        self.assertEqual(self.read_alias(self.factory.get('/'))[0], REPLICA_DB_ALIAS)
+        self.assertEqual(self.replication_lag.call_count, 1)
+
+    def test_the_replica_is_never_migrated(self):
+        self.assertIs(self.router.allow_migrate(REPLICA_DB_ALIAS, 'stations'), False)
+        self.assertIsNone(self.router.allow_migrate(DEFAULT_DB_ALIAS, 'stations'))
\ No newline at end of file
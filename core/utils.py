@@ -1,5 +1,6 @@
 from datetime import datetime, timedelta
 from django.utils import timezone
+from .operating_hours import is_open_at, parse_operating_hours
 
 
 def format_duration(duration):
@@ -51,13 +52,13 @@ def get_time_remaining_display(expires_at):
     return format_duration(remaining)
 
 
-def is_during_operating_hours(operating_hours):
+def is_during_operating_hours(operating_hours, moment=None):
     """
-    Check if current time is within operating hours
+    Check if a moment (default: now) is within operating hours
+    Hours that cannot be parsed are treated as always open.
     """
-    if operating_hours == "24/7":
+    try:
+        intervals = parse_operating_hours(operating_hours)
+    except ValueError:
         return True
-    
-    # Parse operating hours (e.g., "6:00 AM - 10:00 PM")
-    # This is a simplified version
-    return True  # Always return True for now
\ No newline at end of file
+    return is_open_at(intervals, moment)
\ No newline at end of file
@@ -1,4 +1,5 @@
 from django.core.exceptions import ValidationError
+from .operating_hours import parse_operating_hours
 
 
 def validate_file_size(file):
@@ -26,4 +27,15 @@ def validate_university_id(value):
     
     # Check length
     if len(value) < 8:
-        raise ValidationError('Invalid university ID format')
\ No newline at end of file
+        raise ValidationError('Invalid university ID format')
+
+
+def validate_operating_hours(value):
+    """
+    Validate station operating hours
+    Examples: 24/7, 6:00 AM - 10:00 PM, Mon-Fri 6:00 AM - 10:00 PM; Sun closed
+    """
+    try:
+        parse_operating_hours(value)
+    except ValueError as e:
+        raise ValidationError(f'Invalid operating hours: {e}')
\ No newline at end of file
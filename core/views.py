@@ -0,0 +1,70 @@
+import json
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+from django.template.response import TemplateResponse
+from django.utils.cache import add_never_cache_headers
+from django.utils.crypto import constant_time_compare
+from django.utils.decorators import method_decorator
+from django.views import View
+from .metrics import latest
+from .profiling import get_profile, recent_profiles, to_folded, to_speedscope
+
+
+class MetricsView(View):
+    """
+    Prometheus scrape endpoint
+    Requires 'Authorization: Bearer <METRICS_TOKEN>'; with no token configured
+    it is only served when DEBUG is on.
+    """
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token:
+            if not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+                return HttpResponseForbidden()
+        elif not settings.DEBUG:
+            raise Http404
+        
+        body, content_type = latest()
+        response = HttpResponse(body, content_type=content_type)
+        add_never_cache_headers(response)
+        return response
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class ProfileListView(View):
+    """Admin page listing the recent request profiles (see core.profiling)"""
+    def get(self, request):
+        profiles = [
+            {**profile, 'started': datetime.fromtimestamp(profile['started'], timezone.utc)}
+            for profile in recent_profiles()
+        ]
+        context = {
+            **admin.site.each_context(request),
+            'title': 'Request profiles',
+            'profiles': profiles,
+            'sample_rate': settings.PROFILE_SAMPLE_RATE,
+            'asgi': settings.SERVER_PROFILE == 'asgi',
+        }
+        return TemplateResponse(request, 'admin/profiles/profile_list.html', context)
+
+
+@method_decorator(staff_member_required, name='dispatch')
+class ProfileDownloadView(View):
+    """One profile as a speedscope file (default) or collapsed stacks (?format=folded)"""
+    def get(self, request, request_id):
+        profile = get_profile(request_id)
+        if profile is None:
+            raise Http404('No profile with that request id; it may have expired.')
+        if request.GET.get('format') == 'folded':
+            response = HttpResponse(to_folded(profile), content_type='text/plain; charset=utf-8')
+            filename = f'profile-{request_id}.folded.txt'
+        else:
+            response = HttpResponse(json.dumps(to_speedscope(profile)), content_type='application/json')
+            filename = f'profile-{request_id}.speedscope.json'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        add_never_cache_headers(response)
+        return response
\ No newline at end of file